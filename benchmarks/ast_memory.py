@@ -0,0 +1,98 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Compares the memory retained by parsed expressions in the parser's Symbol
+form and in the lowered form of jsonata.nodes, for every expression of the
+jsonata-js test suite.
+
+    python benchmarks/ast_memory.py
+"""
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from jsonata import parser
+
+SUITE = os.path.join(os.path.dirname(__file__), "..", "jsonata", "test", "test-suite")
+
+
+def load_expressions() -> list[str]:
+    exprs = []
+    groups = os.path.join(SUITE, "groups")
+    for group in sorted(os.listdir(groups)):
+        for name in sorted(os.listdir(os.path.join(groups, group))):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(groups, group, name)) as fd:
+                cases = json.load(fd)
+            for case in cases if isinstance(cases, list) else [cases]:
+                if "expr" in case:
+                    exprs.append(case["expr"])
+                elif "expr-file" in case:
+                    with open(os.path.join(groups, group, case["expr-file"])) as fd:
+                        exprs.append(fd.read())
+    return exprs
+
+
+def parse_all(p: parser.Parser, exprs: list[str]) -> list:
+    trees = []
+    for expr in exprs:
+        try:
+            trees.append(p.parse(expr))
+        except Exception:
+            pass
+    return trees
+
+
+def measure(exprs: list[str], lower: bool) -> tuple[int, int, float]:
+    # the parser itself is shared, as it is per thread in Jsonata, and is
+    # not counted against the trees
+    p = parser.Parser()
+    p.lower_ast = lower
+
+    start = time.perf_counter()
+    parse_all(p, exprs)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    trees = parse_all(p, exprs)
+    p.node = p.lexer = None
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(trees), retained, elapsed
+
+
+def main() -> None:
+    exprs = load_expressions()
+    print(f"{len(exprs)} expressions")
+    results = {}
+    for lower in (False, True):
+        count, retained, elapsed = measure(exprs, lower)
+        results[lower] = retained
+        form = "lowered nodes" if lower else "parser symbols"
+        print(f"{form:>15}: {retained / 1024:10.1f} KiB retained, {retained / count:8.0f} B/expression, "
+              f"parse {elapsed * 1000:8.1f} ms")
+    print(f"lowered form retains {results[True] / results[False]:.1%} of the symbol form")
+
+
+if __name__ == "__main__":
+    main()
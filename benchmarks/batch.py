@@ -0,0 +1,56 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Evaluates one expression over many small records with bindings, with a
+plain loop over Jsonata.evaluate and with Jsonata.evaluate_many, which sets
+up the bindings and the evaluation context once, and prints the records
+per second of each.
+
+    python benchmarks/batch.py
+"""
+
+import time
+
+import jsonata
+
+EXPR = "{'id': id, 'name': $uppercase(name), 'total': $round(price * quantity * (1 + $rate), 2)}"
+BINDINGS = {"rate": 0.2, "currency": "EUR", "region": "EU", "channel": "web"}
+RECORDS = [{"id": i, "name": "item %d" % i, "price": i % 100 + 0.5, "quantity": i % 7} for i in range(20000)]
+
+
+def main() -> None:
+    for compile in (False, True):
+        expr = jsonata.Jsonata(EXPR, compile=compile)
+
+        start = time.perf_counter()
+        expected = [expr.evaluate(record, BINDINGS) for record in RECORDS]
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = list(expr.evaluate_many(RECORDS, BINDINGS))
+        batch = time.perf_counter() - start
+        if results != expected:
+            raise AssertionError("different results")
+
+        label = "compiled" if compile else "interpreted"
+        print("%-12s loop %.0f records/s  evaluate_many %.0f records/s" %
+              (label, len(RECORDS) / loop, len(RECORDS) / batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measures calls to builtin functions from inside nested lambdas, with and
+without the resolver binding the references to the builtins.
+
+    python benchmarks/builtin_lookup.py
+"""
+
+import time
+
+import jsonata
+
+EXPR = """(
+    $f := function($x) { $map($x, function($v) { $string($abs($v)) & $uppercase("a") }) };
+    $g := function($x) { $f($x) };
+    $count($g(items))
+)"""
+DATA = {"items": list(range(-500, 500))}
+ROUNDS = 50
+
+
+def run(expr: jsonata.Jsonata) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        expr.evaluate(DATA)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    for compile in (False, True):
+        resolved = jsonata.Jsonata(EXPR, compile=compile)
+        ast, _ = jsonata.Jsonata.parse_expression(EXPR, compile=compile, resolve=False)
+        unresolved = jsonata.Jsonata(EXPR, compile=compile)
+        unresolved.ast = ast
+        assert resolved.evaluate(DATA) == unresolved.evaluate(DATA)
+        base = run(unresolved)
+        fast = run(resolved)
+        print("compile=%-5s unresolved %.3fs  resolved %.3fs  (%.1f%%)"
+              % (compile, base, fast, 100.0 * (base - fast) / base))
+
+
+if __name__ == "__main__":
+    main()
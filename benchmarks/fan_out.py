@@ -0,0 +1,71 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Evaluates an object constructor whose values call slow registered functions
+that release the GIL, sequentially and with a thread pool executor (see
+Jsonata.eval_branches), and prints the time per evaluation. The lookup
+function waits as for a local cache service; the inflate function
+decompresses data. The cheap case only has entries and arguments that
+call builtins, which the executor must not slow down.
+
+    python benchmarks/fan_out.py
+"""
+
+import concurrent.futures
+import time
+import zlib
+
+import jsonata
+
+EXPR = "{'a': $f(a), 'b': $f(b), 'c': $f(c), 'd': [$f(d), $f(e)]}"
+CHEAP = "$sum([1..2000].($length($substring($string($), 0, 3)) + $max([$, a])))"
+DATA = {"a": 1, "b": 2, "c": 3, "d": 4, "e": 5}
+PAYLOAD = zlib.compress(bytes(range(256)) * 40000)
+EVALUATIONS = 20
+
+
+def lookup(value):
+    time.sleep(0.005)
+    return value
+
+
+def inflate(value):
+    return len(zlib.decompress(PAYLOAD)) + value
+
+
+def measure(expr) -> float:
+    expected = expr.evaluate(DATA)
+    start = time.perf_counter()
+    for _ in range(EVALUATIONS):
+        if expr.evaluate(DATA) != expected:
+            raise AssertionError(expected)
+    return (time.perf_counter() - start) / EVALUATIONS
+
+
+def main() -> None:
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        for name, text, function in (("lookup", EXPR, lookup), ("inflate", EXPR, inflate), ("cheap", CHEAP, None)):
+            for label, pool in (("sequential", None), ("executor", executor)):
+                expr = jsonata.Jsonata(text, compile=True, executor=pool)
+                if function is not None:
+                    expr.register_lambda("f", function)
+                print("%-8s %-10s %.2fms" % (name, label, measure(expr) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times expressions built from constant subexpressions, which are folded
+when the expression is parsed, against the same expressions evaluated
+with $eval (which does not fold them).
+
+    python benchmarks/folding.py
+"""
+
+import time
+
+import jsonata
+
+EXPRS = [
+    ("arithmetic", "items.(price * (60 * 60 * 24 / 1000))"),
+    ("strings", "items.($string(price) & \" \" & $uppercase(\"eur\"))"),
+    ("object", "items.{\"price\": price, \"limits\": {\"low\": [1, 2, 3], \"high\": [10, 20, 30]}}"),
+]
+SIZE = 10000
+
+
+def timed(expr, data, bindings=None) -> float:
+    start = time.perf_counter()
+    expr.evaluate(data, bindings)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    data = {"items": [{"price": i % 101} for i in range(SIZE)]}
+    unfolded = jsonata.Jsonata("$eval($text)")
+    for label, text in EXPRS:
+        folded = timed(jsonata.Jsonata(text), data)
+        plain = timed(unfolded, data, {"text": text})
+        print("%-10s folded %.3fs  unfolded %.3fs  %.1fx" % (label, folded, plain, plain / folded))
+
+
+if __name__ == "__main__":
+    main()
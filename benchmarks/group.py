@@ -0,0 +1,53 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Times group-by aggregations over a skewed key distribution (90% of the
+records share one key) for growing inputs: the time per record should
+stay flat, for plain and for tuple-stream (focus variable) grouping.
+
+    python benchmarks/group.py
+"""
+
+import time
+
+import jsonata
+
+EXPRS = [
+    ("group-by", "records{category: $sum(price)}"),
+    ("tuple group-by", "records@$r{$r.category: $sum($r.price)}"),
+]
+SIZES = [12500, 25000, 50000, 100000]
+
+
+def records(size: int) -> dict:
+    return {"records": [{"category": "hot" if i % 10 else "c%d" % (i % 100), "price": i % 97}
+                        for i in range(size)]}
+
+
+def main() -> None:
+    for label, text in EXPRS:
+        expr = jsonata.Jsonata(text)
+        for size in SIZES:
+            data = records(size)
+            start = time.perf_counter()
+            expr.evaluate(data)
+            elapsed = time.perf_counter() - start
+            print("%-15s %7d records  %.3fs  %.2fus/record" % (label, size, elapsed, 1e6 * elapsed / size))
+
+
+if __name__ == "__main__":
+    main()
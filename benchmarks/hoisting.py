@@ -0,0 +1,49 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times predicates and path steps with a loop-invariant aggregate for
+growing inputs: with the aggregate hoisted out of the loop, the time per
+item should stay flat.
+
+    python benchmarks/hoisting.py
+"""
+
+import time
+
+import jsonata
+
+EXPRS = [
+    ("predicate", "items[price > $average($$.items.price)]"),
+    ("step", "items.(price / $sum($$.items.price))"),
+]
+SIZES = [1000, 2000, 4000, 8000]
+
+
+def main() -> None:
+    for label, text in EXPRS:
+        expr = jsonata.Jsonata(text)
+        for size in SIZES:
+            data = {"items": [{"price": i % 101} for i in range(size)]}
+            start = time.perf_counter()
+            expr.evaluate(data)
+            elapsed = time.perf_counter() - start
+            print("%-10s %6d items  %.3fs  %.2fus/item" % (label, size, elapsed, 1e6 * elapsed / size))
+
+
+if __name__ == "__main__":
+    main()
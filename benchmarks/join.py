@@ -0,0 +1,50 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times a join of two arrays written with focus variables, executed as a
+hash join, against the same join with its predicate in parentheses, which
+is executed by nested loops. The hash join should scale linearly.
+
+    python benchmarks/join.py
+"""
+
+import time
+
+import jsonata
+
+JOIN = "library.loans@$l.books@$b[$l.isbn=$b.isbn].{'who': $l.who, 'title': $b.title}"
+NESTED = "library.loans@$l.books@$b[($l.isbn=$b.isbn)].{'who': $l.who, 'title': $b.title}"
+SIZES = [250, 500, 1000, 20000]
+NESTED_MAX = 500
+
+
+def main() -> None:
+    for size in SIZES:
+        data = {"library": {"loans": [{"isbn": i * 7 % size, "who": i} for i in range(size)],
+                            "books": [{"isbn": i, "title": "t%d" % i} for i in range(size)]}}
+        for label, text in [("hash", JOIN), ("nested", NESTED)]:
+            if label == "nested" and size > NESTED_MAX:
+                continue
+            expr = jsonata.Jsonata(text)
+            start = time.perf_counter()
+            expr.evaluate(data)
+            print("%-6s %6d x %-6d %.3fs" % (label, size, size, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Evaluates a CPU-bound expression over many records with evaluate_many in
+this process, and with evaluate_parallel in 1, 2, 4 and 8 worker processes,
+and prints the records per second of each. On a multi-core host, the
+throughput scales with the number of processes up to the number of cores,
+less the cost of pickling the records and results.
+
+    python benchmarks/processes.py
+"""
+
+import os
+import time
+
+import jsonata
+
+EXPR = ("{'id': id, 'total': $sum(items.(price * quantity)), "
+        "'top': items^(>price)[[0..2]].name, 'tags': $distinct(items.tag)}")
+RECORDS = [{"id": i, "items": [{"name": "n%d" % j, "price": (i * j) % 97, "quantity": j % 5, "tag": "t%d" % (j % 7)}
+                               for j in range(30)]} for i in range(4000)]
+
+
+def measure(results) -> float:
+    start = time.perf_counter()
+    count = sum(1 for _ in results)
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    expr = jsonata.Jsonata(EXPR, compile=True)
+    print("%d CPUs" % os.cpu_count())
+    print("evaluate_many      %6.0f records/s" % measure(expr.evaluate_many(RECORDS)))
+    for processes in (1, 2, 4, 8):
+        rate = measure(expr.evaluate_parallel(RECORDS, processes=processes, chunksize=100))
+        print("%d processes        %6.0f records/s" % (processes, rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Micro-benchmarks of the constructs that accumulate sequences: array
+constructors, wildcards and $spread, from 10k to 1M result elements.
+The time per element should stay flat as the size grows.
+
+    python benchmarks/sequences.py [max size]
+"""
+
+import sys
+import time
+
+import jsonata
+
+# number of arrays spliced by the array constructor
+PARTS = 1000
+
+
+def array_constructor(size: int) -> tuple[str, dict]:
+    part = size // PARTS
+    expr = "[" + ", ".join("v%d" % i for i in range(PARTS)) + "]"
+    return expr, {"v%d" % i: list(range(part)) for i in range(PARTS)}
+
+
+def wildcard(size: int) -> tuple[str, dict]:
+    # one array per key, so that each value is spliced into the result
+    return "*", {"k%d" % i: [i, i + 1] for i in range(size // 2)}
+
+
+def spread(size: int) -> tuple[str, list]:
+    return "$spread($)", [{"k%d" % i: i} for i in range(size)]
+
+
+def main() -> None:
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for label, build in (("array constructor", array_constructor), ("wildcard", wildcard), ("$spread", spread)):
+        size = 10000
+        while size <= max_size:
+            text, data = build(size)
+            expr = jsonata.Jsonata(text)
+            start = time.perf_counter()
+            result = expr.evaluate(data)
+            elapsed = time.perf_counter() - start
+            assert len(result) == size
+            print("%-18s %8d elements  %.3fs  %.3fus/element" % (label, size, elapsed, 1e6 * elapsed / size))
+            size *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Times the order-by operator on 100k-item arrays, for a plain sort and for
+a tuple sort (focus/index variables), next to $sort with a comparator
+function, which still compares items pairwise.
+
+    python benchmarks/sort.py [items]
+"""
+
+import random
+import sys
+import time
+
+import jsonata
+
+EXPRS = [
+    ("order-by", "items^(>price, name).name"),
+    ("tuple order-by", "items#$i^(>price, $i).name"),
+    ("$sort", "$sort(items, function($l, $r) { $l.price < $r.price }).name"),
+]
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rnd = random.Random(42)
+    data = {"items": [{"name": "item%d" % i, "price": rnd.randint(0, size // 10)} for i in range(size)]}
+    for label, text in EXPRS:
+        expr = jsonata.Jsonata(text)
+        start = time.perf_counter()
+        expr.evaluate(data)
+        print("%-16s %8d items  %.3fs" % (label, size, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
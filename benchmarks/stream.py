@@ -0,0 +1,63 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times expressions that only need the first items of a large path result
+(a positional predicate, $exists, $single and the first matches of
+$filter) against the full evaluation of the same path. The "input only"
+row is the cost of preparing the input (see Jsonata.evaluate), which is
+paid by every expression.
+
+    python benchmarks/stream.py
+"""
+
+import time
+
+import jsonata
+
+EXPRS = [
+    ("input only", "0"),
+    ("full path", "orders.items.sku"),
+    ("first item", "(orders.items.sku)[0]"),
+    ("$exists", "$exists(orders.items.sku)"),
+    ("$single", "$single(orders.items[qty > 0].sku)"),
+    ("first matches", "$filter(orders.items, function($i) { $i.qty = 3 })[1].sku"),
+]
+SIZES = [10000, 100000]
+
+
+def orders(size: int) -> dict:
+    return {"orders": [{"items": [{"sku": "s%d" % i, "qty": i % 5} for i in range(i, i + 10)]}
+                       for i in range(0, size, 10)]}
+
+
+def main() -> None:
+    for size in SIZES:
+        data = orders(size)
+        for label, text in EXPRS:
+            expr = jsonata.Jsonata(text)
+            start = time.perf_counter()
+            try:
+                expr.evaluate(data)
+            except jsonata.JException:
+                pass
+            elapsed = time.perf_counter() - start
+            print("%-14s %7d items  %.4fs" % (label, size, elapsed))
+
+
+if __name__ == "__main__":
+    main()
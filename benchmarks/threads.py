@@ -0,0 +1,71 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Evaluates one compiled expression from 1, 2, 4 and 8 threads at once, each
+with its own input and bindings, and prints the throughput and the speedup
+over one thread. Evaluations have their own context (see
+Jsonata.create_context) and root frame, so the threads share no lock and no
+mutable state: on a free-threaded build (python3.13t and later), the
+throughput can scale with the number of cores.
+
+    python benchmarks/threads.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import jsonata
+
+EXPR = "$sum(items[price > $min].(price * quantity)) & ' ' & $uppercase(name)"
+EVALUATIONS = 4000
+
+
+def run(expr, evaluations, data, errors) -> None:
+    expected = expr.evaluate(data, {"min": 10})
+    for _ in range(evaluations):
+        if expr.evaluate(data, {"min": 10}) != expected:
+            errors.append(expected)
+
+
+def main() -> None:
+    gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print("%d CPUs, GIL %s" % (os.cpu_count(), "enabled" if gil else "disabled"))
+    expr = jsonata.Jsonata(EXPR, compile=True)
+    base = None
+    for count in (1, 2, 4, 8):
+        errors = []
+        threads = []
+        for t in range(count):
+            data = {"name": "thread %d" % t,
+                    "items": [{"price": i + t, "quantity": i % 3} for i in range(20)]}
+            threads.append(threading.Thread(target=run, args=(expr, EVALUATIONS // count, data, errors)))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print("%d threads  %.3fs  %.0f evaluations/s  x%.2f  %d errors" %
+              (count, elapsed, EVALUATIONS / elapsed, base / elapsed, len(errors)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times expressions without runtime bounds, with the bounds checked by the
+evaluator (a timeout and a stack limit), and with the same bounds checked
+by entry and exit callbacks, which is how they used to be implemented.
+
+    python benchmarks/timebox.py
+"""
+
+import time
+
+import jsonata
+
+EXPRS = [
+    ("path", "items[price > 50].{'name': name, 'total': price * quantity}"),
+    ("lambda", "$map(items, function($v) { $v.price * $v.quantity })"),
+    ("recursion", "($f := function($n) { $n <= 1 ? 1 : $n * $f($n - 1) }; items.$f(quantity % 20))"),
+]
+SIZE = 20000
+TIMEOUT = 60000
+STACK = 1000
+
+
+def callbacks(frame, timeout, max_depth):
+    state = {"depth": 0, "time": time.time() * 1000}
+
+    def check():
+        if state["depth"] > max_depth:
+            raise jsonata.JException("D1011", -1)
+        if time.time() * 1000 - state["time"] > timeout:
+            raise jsonata.JException("D1012", -1, timeout)
+
+    def entry(exp, input, env):
+        if not env.is_parallel_call:
+            state["depth"] += 1
+            check()
+
+    def exit(exp, input, env, res):
+        if not env.is_parallel_call:
+            state["depth"] -= 1
+            check()
+
+    frame.set_evaluate_entry_callback(entry)
+    frame.set_evaluate_exit_callback(exit)
+
+
+def timed(expr, data) -> float:
+    start = time.perf_counter()
+    expr.evaluate(data)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    data = {"items": [{"name": "item %d" % i, "price": i % 101, "quantity": i % 7} for i in range(SIZE)]}
+    for label, text in EXPRS:
+        plain = timed(jsonata.Jsonata(text), data)
+        bounded = timed(jsonata.Jsonata(text, timeout=TIMEOUT, stack=STACK), data)
+        expr = jsonata.Jsonata(text)
+        callbacks(expr.environment, TIMEOUT, STACK)
+        hooked = timed(expr, data)
+        print("%-10s none %.3fs  bounds %.3fs (+%.0f%%)  callbacks %.3fs (+%.0f%%)"
+              % (label, plain, bounded, (bounded / plain - 1) * 100, hooked, (hooked / plain - 1) * 100))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Queries one field of a large document with full input validation, lazy
+input validation and no validation, and prints the time of each. Full
+validation walks the whole document before evaluating it; lazy validation
+only checks the values that the query touches.
+
+    python benchmarks/validation.py
+"""
+
+import time
+
+import jsonata
+
+DOCUMENT = {
+    "header": {"id": "doc-1", "version": 3},
+    "rows": [{"id": i, "name": "row %d" % i, "tags": ["a", "b"], "values": [i, i / 2, None]} for i in range(200000)],
+}
+
+
+def main() -> None:
+    for compile in (False, True):
+        expr = jsonata.Jsonata("header.id", compile=compile)
+        times = []
+        for validate_input, lazy in ((True, False), (True, True), (False, False)):
+            expr.set_validate_input(validate_input, lazy)
+            start = time.perf_counter()
+            if expr.evaluate(DOCUMENT) != "doc-1":
+                raise AssertionError("different result")
+            times.append((time.perf_counter() - start) * 1000)
+        label = "compiled" if compile else "interpreted"
+        print("%-12s full %.2fms  lazy %.3fms  none %.3fms" % (label, *times))
+
+
+if __name__ == "__main__":
+    main()
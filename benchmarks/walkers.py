@@ -0,0 +1,118 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""
+Times the walkers over input and result data (validation of the input,
+conversion of nulls in the result, the descendant operator ** and $clone),
+which use explicit stacks, against recursive versions of the same walks on
+a wide document. Also times them on a document nested deeper than the
+interpreter recursion limit, which the recursive versions cannot walk.
+
+    python benchmarks/walkers.py
+"""
+
+import json
+import time
+
+import jsonata
+from jsonata import functions, utils
+
+SIZE = 20000
+DEPTH = 50000
+REPEAT = 5
+
+
+def recursive_validate(arg) -> None:
+    if isinstance(arg, dict):
+        for k, v in arg.items():
+            recursive_validate(k)
+            recursive_validate(v)
+    elif isinstance(arg, list):
+        for v in arg:
+            recursive_validate(v)
+    else:
+        functions.Functions.validate_scalar(arg)
+
+
+def recursive_descendants(input, results) -> None:
+    if not isinstance(input, list):
+        results.append(input)
+    if isinstance(input, list):
+        for member in input:
+            recursive_descendants(member, results)
+    elif isinstance(input, dict):
+        for value in input.values():
+            recursive_descendants(value, results)
+
+
+def recursive_convert_nulls(val) -> None:
+    if isinstance(val, dict):
+        for key, item in val.items():
+            v = utils.Utils.thaw(utils.Utils.convert_value(item))
+            if v is not item:
+                val[key] = v
+            recursive_convert_nulls(v)
+    elif isinstance(val, list):
+        for i, item in enumerate(val):
+            v = utils.Utils.thaw(utils.Utils.convert_value(item))
+            if v is not item:
+                val[i] = v
+            recursive_convert_nulls(v)
+
+
+def clone_round_trip(data):
+    return json.loads(functions.Functions.string(data, False))
+
+
+def timed(fn, data) -> float:
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def walkers():
+    return [
+        ("validate", functions.Functions.validate_input, recursive_validate),
+        ("nulls", utils.Utils.convert_nulls, recursive_convert_nulls),
+        ("**", lambda data: jsonata.Jsonata("**").recurse_descendants(data, []),
+         lambda data: recursive_descendants(data, [])),
+        ("$clone", functions.Functions.function_clone, clone_round_trip),
+    ]
+
+
+def main() -> None:
+    wide = {"items": [{"id": i, "name": "item %d" % i, "tags": ["a", "b", None], "price": {"amount": i * 1.5}}
+                      for i in range(SIZE)]}
+    deep = 1
+    for i in range(DEPTH):
+        deep = {"a": deep} if i % 2 else [deep]
+    utils.Utils.MAX_DATA_DEPTH = DEPTH + 1
+
+    for label, iterative, recursive in walkers():
+        stack = timed(iterative, wide)
+        plain = timed(recursive, wide)
+        nested = timed(iterative, deep)
+        print("%-10s stack %.3fs  recursive %.3fs  %.2fx  (depth %d: %.3fs)"
+              % (label, stack, plain, plain / stack, DEPTH, nested))
+
+
+if __name__ == "__main__":
+    main()
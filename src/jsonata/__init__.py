@@ -1,10 +1,10 @@
 from jsonata.constants import Constants
 from jsonata.datetimeutils import DateTimeUtils
 from jsonata.functions import Functions
-from jsonata.jexception import JException
+from jsonata.jexception import ConstantModified, EvaluationCancelled, JException
 from jsonata.jsonata import Jsonata
 from jsonata.parser import Parser
 from jsonata.signature import Signature
-from jsonata.timebox import Timebox
+from jsonata.timebox import CancellationToken, Timebox, Usage
 from jsonata.tokenizer import Tokenizer
 from jsonata.utils import Utils
@@ -0,0 +1,528 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from typing import Any, Callable, Optional
+
+from jsonata import functions, hoister, jexception, nodes, parser, utils
+
+# A compiled node: (jsonata, input, environment) -> result
+CompiledNode = Callable[[Any, Optional[Any], Any], Optional[Any]]
+
+# Node types whose evaluation can never produce a sequence, so the result
+# mangling step of Jsonata._eval can be skipped for them
+_SCALAR_TYPES = frozenset(("string", "number", "value", "regex", "lambda", "partial", "transform"))
+
+# Attributes that refer back up the tree (or to label holders) rather than
+# to child expressions, and must not be compiled
+_NON_CHILD_ATTRS = frozenset(("_outer_instance", "slot", "ancestor", "seeking_parent", "environment", "input",
+                              "builtin", "builtins", "owner"))
+
+
+#
+# Compiles a processed AST into a tree of nested closures.
+#
+# Each node of the tree is given a closure in its `compiled` slot
+# that behaves exactly like Jsonata._eval for that node, but with the type
+# dispatch, predicate and group handling and sequence mangling decided once
+# at compile time.  The hot node types (paths, names, literals, variables,
+# operators, conditions, blocks, array constructors and function calls) call
+# the closures of their children directly; the remaining types delegate to
+# the matching Jsonata.evaluate_* method, whose calls back into Jsonata.eval
+# pick up the compiled closures of their subexpressions.
+#
+class Compiler:
+
+    #
+    # Compile an expression tree
+    # @param {Object} expr - processed AST
+    # @returns {Function} closure evaluating the root node
+    #
+    @staticmethod
+    def compile(expr: Optional[nodes.Node]) -> CompiledNode:
+        if not isinstance(expr, nodes.Node):
+            return Compiler._none
+        if expr.compiled is not None:
+            return expr.compiled
+        # mark the node first, so that shared or cyclic references terminate
+        expr.compiled = Compiler._none
+        Compiler._compile_children(expr)
+        node = Compiler._compile_node(expr)
+        expr.compiled = node
+        return node
+
+    @staticmethod
+    def _none(jsonata: Any, input: Optional[Any], environment: Any) -> None:
+        return None
+
+    @staticmethod
+    def _compile_children(expr: nodes.Node) -> None:
+        # make sure that every subexpression reachable from this node has its
+        # closure, including those only ever evaluated through Jsonata.eval
+        # (lambda bodies, predicates, sort terms, group pairs, ...)
+        for name, value in expr.items():
+            if name in _NON_CHILD_ATTRS or name == "compiled":
+                continue
+            Compiler._compile_value(value)
+
+    @staticmethod
+    def _compile_value(value: Any) -> None:
+        if isinstance(value, nodes.Node):
+            Compiler.compile(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                Compiler._compile_value(item)
+
+    @staticmethod
+    def _compile_node(expr: nodes.Node) -> CompiledNode:
+        body = Compiler._compile_body(expr)
+
+        predicates = [item.expr for item in expr.predicate] if expr.predicate is not None else None
+        group = expr.group if expr.type != "path" else None
+        mangle = predicates is not None or group is not None or expr.type not in _SCALAR_TYPES
+        keep_array = expr.keep_array
+        is_sequence = utils.Utils.is_sequence
+
+        def node(jsonata, input, environment):
+            # same contract as Jsonata.eval: expose the current input and
+            # environment to $eval() and friends, and restore them afterwards
+            saved_input = jsonata.input
+            saved_environment = jsonata.environment
+            jsonata.input = input
+            jsonata.environment = environment
+            try:
+                bounds = jsonata.bounds
+                if bounds is not None:
+                    bounds.enter(environment)
+
+                if environment.hooked:
+                    environment.evaluate_entry(expr, input)
+
+                result = body(jsonata, input, environment)
+
+                if predicates is not None:
+                    for predicate in predicates:
+                        result = jsonata.evaluate_filter(predicate, result, environment)
+
+                if group is not None:
+                    result = jsonata.evaluate_group_expression(group, result, environment)
+
+                if environment.hooked:
+                    environment.evaluate_exit(expr, input, result)
+
+                if bounds is not None:
+                    bounds.exit(environment, result)
+
+                # mangle result (list of 1 element -> 1 element, empty list -> null)
+                if mangle and result is not None and is_sequence(result) and not result.tuple_stream:
+                    if keep_array:
+                        result.keep_singleton = True
+                    if not result:
+                        result = None
+                    elif len(result) == 1:
+                        result = result if result.keep_singleton else result[0]
+
+                return result
+            finally:
+                jsonata.input = saved_input
+                jsonata.environment = saved_environment
+
+        return node
+
+    @staticmethod
+    def _compile_body(expr: nodes.Node) -> CompiledNode:
+        type = expr.type
+        if type == "path":
+            return Compiler._compile_path(expr)
+        elif type == "binary":
+            return Compiler._compile_binary(expr)
+        elif type == "unary":
+            return Compiler._compile_unary(expr)
+        elif type == "name":
+            key = str(expr.value)
+            lookup = functions.Functions.lookup
+            return lambda jsonata, input, environment: lookup(input, key, jsonata.validate_lazily)
+        elif type == "string" or type == "number" or type == "value":
+            value = expr.value if expr.value is not None else utils.Utils.NULL_VALUE
+            return lambda jsonata, input, environment: value
+        elif type == "wildcard":
+            return lambda jsonata, input, environment: jsonata.evaluate_wildcard(expr, input)
+        elif type == "descendant":
+            return lambda jsonata, input, environment: jsonata.evaluate_descendants(expr, input)
+        elif type == "parent":
+            label = expr.slot.label
+            return lambda jsonata, input, environment: environment.lookup(label)
+        elif type == "condition":
+            return Compiler._compile_condition(expr)
+        elif type == "block":
+            return Compiler._compile_block(expr)
+        elif type == "bind":
+            name = str(expr.lhs.value)
+            rhs = Compiler.compile(expr.rhs)
+
+            def bind(jsonata, input, environment):
+                value = rhs(jsonata, input, environment)
+                environment.bind(name, value)
+                return value
+
+            return bind
+        elif type == "regex":
+            value = expr.value
+            return lambda jsonata, input, environment: value
+        elif type == "function":
+            return Compiler._compile_function(expr)
+        elif type == "variable":
+            return Compiler._compile_variable(expr)
+        elif type == "lambda":
+            return lambda jsonata, input, environment: jsonata.evaluate_lambda(expr, input, environment)
+        elif type == "partial":
+            return lambda jsonata, input, environment: jsonata.evaluate_partial_application(expr, input, environment)
+        elif type == "apply":
+            return lambda jsonata, input, environment: jsonata.evaluate_apply_expression(expr, input, environment)
+        elif type == "transform":
+            return lambda jsonata, input, environment: jsonata.evaluate_transform_expression(expr, input, environment)
+        elif type == "hoisted":
+            return lambda jsonata, input, environment: jsonata.evaluate_hoisted(expr, input, environment)
+        elif type == "folded":
+            return lambda jsonata, input, environment: jsonata.evaluate_folded(expr, input, environment)
+        return Compiler._none
+
+    @staticmethod
+    def _compile_variable(expr: nodes.Node) -> CompiledNode:
+        if expr.value == "":
+            # Empty string == "$" !
+            def context(jsonata, input, environment):
+                if isinstance(input, utils.Utils.JList) and input.outer_wrapper:
+                    return input[0]
+                return input
+
+            return context
+
+        name = str(expr.value)
+        builtin = getattr(expr, "builtin", None)
+        if builtin is not None:
+            # unshadowed builtin, bound by the resolver
+            return lambda jsonata, input, environment: environment.lookup_builtin(name, builtin)
+        return lambda jsonata, input, environment: environment.lookup(name)
+
+    @staticmethod
+    def _compile_binary(expr: nodes.Node) -> CompiledNode:
+        lhs = Compiler.compile(expr.lhs)
+        rhs = Compiler.compile(expr.rhs)
+        op = str(expr.value)
+
+        if op == "and" or op == "or":
+            def boolean(jsonata, input, environment):
+                lhs_value = lhs(jsonata, input, environment)
+                # defer evaluation of RHS to allow short-circuiting
+                evalrhs = lambda: rhs(jsonata, input, environment)
+                try:
+                    return jsonata.evaluate_boolean_expression(lhs_value, evalrhs, op)
+                except Exception as err:
+                    if not (isinstance(err, jexception.JException)):
+                        raise jexception.JException("Unexpected", expr.position)
+                    raise err
+
+            return boolean
+
+        if op == "+" or op == "-" or op == "*" or op == "/" or op == "%":
+            return lambda jsonata, input, environment: jsonata.evaluate_numeric_expression(
+                lhs(jsonata, input, environment), rhs(jsonata, input, environment), op)
+        elif op == "=" or op == "!=":
+            return lambda jsonata, input, environment: jsonata.evaluate_equality_expression(
+                lhs(jsonata, input, environment), rhs(jsonata, input, environment), op)
+        elif op == "<" or op == "<=" or op == ">" or op == ">=":
+            return lambda jsonata, input, environment: jsonata.evaluate_comparison_expression(
+                lhs(jsonata, input, environment), rhs(jsonata, input, environment), op)
+        elif op == "&":
+            return lambda jsonata, input, environment: jsonata.evaluate_string_concat(
+                lhs(jsonata, input, environment), rhs(jsonata, input, environment))
+        elif op == "..":
+            return lambda jsonata, input, environment: jsonata.evaluate_range_expression(
+                lhs(jsonata, input, environment), rhs(jsonata, input, environment))
+        elif op == "in":
+            def includes(jsonata, input, environment):
+                lhs_value = lhs(jsonata, input, environment)
+                if jsonata.includes_indexes is not None:
+                    return jsonata.evaluate_indexed_includes(expr, lhs_value,
+                                                             lambda: rhs(jsonata, input, environment))
+                return jsonata.evaluate_includes_expression(lhs_value, rhs(jsonata, input, environment))
+
+            return includes
+        # unknown operator - leave the error reporting to the interpreter
+        return lambda jsonata, input, environment: jsonata.evaluate_binary(expr, input, environment)
+
+    @staticmethod
+    def _compile_unary(expr: nodes.Node) -> CompiledNode:
+        value = str(expr.value)
+        if value == "-":
+            expression = Compiler.compile(expr.expression)
+
+            def negate(jsonata, input, environment):
+                result = expression(jsonata, input, environment)
+                if result is None:
+                    return None
+                elif utils.Utils.is_numeric(result):
+                    return utils.Utils.convert_number(-float(result))
+                raise jexception.JException("D1002", expr.position, expr.value, result)
+
+            return negate
+        elif value == "[":
+            return Compiler._compile_array_constructor(expr)
+        elif value == "{":
+            # object constructor - apply grouping
+            return lambda jsonata, input, environment: jsonata.evaluate_group_expression(expr, input, environment)
+        return Compiler._none
+
+    @staticmethod
+    def _compile_array_constructor(expr: nodes.Node) -> CompiledNode:
+        items = [(Compiler.compile(item), str(item.value) == "[") for item in expr.expressions]
+        blocking = hoister.Hoister.branch_mask(expr, expr.expressions)
+        fan_out = sum(blocking) > 1
+        consarray = expr.consarray
+        append = utils.Utils.append_to_sequence
+
+        def array(jsonata, input, environment):
+            result = utils.Utils.JList()
+            values = None
+            if fan_out and jsonata.executor is not None:
+                # independent entries, evaluated concurrently
+                values = jsonata.eval_branches(lambda context, entry: entry[0](context, input, environment), items,
+                                               blocking)
+            for idx, (item, nested) in enumerate(items):
+                if values is None:
+                    environment.is_parallel_call = idx > 0
+                    value = item(jsonata, input, environment)
+                else:
+                    value = values[idx]
+                if value is not None:
+                    if nested:
+                        result.append(value)
+                    else:
+                        append(result, value)
+            if consarray:
+                if not (isinstance(result, utils.Utils.JList)):
+                    result = utils.Utils.JList(result)
+                result.cons = True
+            return result
+
+        return array
+
+    @staticmethod
+    def _compile_condition(expr: nodes.Node) -> CompiledNode:
+        condition = Compiler.compile(expr.condition)
+        then = Compiler.compile(expr.then)
+        _else = Compiler.compile(expr._else) if expr._else is not None else None
+
+        def conditional(jsonata, input, environment):
+            if jsonata.boolize(condition(jsonata, input, environment)):
+                return then(jsonata, input, environment)
+            elif _else is not None:
+                return _else(jsonata, input, environment)
+            return None
+
+        return conditional
+
+    @staticmethod
+    def _compile_block(expr: nodes.Node) -> CompiledNode:
+        from jsonata import jsonata
+        expressions = [Compiler.compile(ex) for ex in expr.expressions]
+        if jsonata.Jsonata.positional_limit(expr) is not None and jsonata.Jsonata.is_streamed_block(expr):
+            # the path is evaluated lazily (see Jsonata.stream_path)
+            def streamed_block(jsonata, input, environment):
+                return jsonata.evaluate_block(expr, input, environment)
+
+            return streamed_block
+
+        def block(jsonata, input, environment):
+            result = None
+            # create a new frame to limit the scope of variable assignments
+            frame = jsonata.create_frame(environment)
+            for ex in expressions:
+                result = ex(jsonata, input, frame)
+            return result
+
+        return block
+
+    @staticmethod
+    def _compile_function(expr: nodes.Node) -> CompiledNode:
+        procedure = expr.procedure
+        proc_fn = Compiler.compile(procedure)
+        arg_fns = [Compiler.compile(arg) for arg in expr.arguments] if expr.arguments is not None else []
+        blocking = hoister.Hoister.branch_mask(expr, expr.arguments or [])
+        fan_out = sum(blocking) > 1
+        is_path = getattr(procedure, "type", None) == "path"
+        first_step = str(procedure.steps[0].value) if is_path else None
+        proc_val = procedure.value if procedure is not None else None
+        proc_name = procedure.steps[0].value if is_path else proc_val
+        position = expr.position
+        from jsonata import jsonata
+        streamable = (bool(expr.arguments) and expr.arguments[0].predicate is None and
+                      jsonata.Jsonata.is_streamable_path(expr.arguments[0]))
+
+        def function(jsonata, input, environment):
+            proc = proc_fn(jsonata, input, environment)
+
+            if proc is None and is_path and environment.lookup(first_step) is not None:
+                # help the user out here if they simply forgot the leading $
+                raise jexception.JException("T1005", position, procedure.steps[0].value)
+
+            if streamable and proc is not None:
+                result = jsonata.evaluate_streamed_call(expr, proc, input, environment)
+                if result is not utils.Utils.NONE:
+                    return result
+
+            # eager evaluation - evaluate the arguments
+            if not fan_out or jsonata.executor is None:
+                evaluated_args = [arg(jsonata, input, environment) for arg in arg_fns]
+            else:
+                # independent arguments, evaluated concurrently
+                evaluated_args = jsonata.eval_branches(lambda context, arg: arg(context, input, environment), arg_fns,
+                                                       blocking)
+
+            # Error if proc is null
+            if proc is None:
+                raise jexception.JException("T1006", position, proc_name)
+
+            try:
+                if isinstance(proc, parser.Parser.Symbol):
+                    proc.token = proc_name
+                    proc.position = position
+                return jsonata.apply(proc, evaluated_args, input, environment)
+            except jexception.JException as jex:
+                if jex.location < 0:
+                    # add the position field to the error
+                    jex.location = position
+                if jex.current is None:
+                    # and the Object identifier
+                    jex.current = expr.token
+                raise jex
+
+        return function
+
+    @staticmethod
+    def _compile_path(expr: nodes.Node) -> CompiledNode:
+        steps = []
+        is_tuple_stream = False
+        last = len(expr.steps) - 1
+        for ii, step in enumerate(expr.steps):
+            if step.tuple is not None:
+                is_tuple_stream = True
+            if ii == 0 and step.consarray:
+                # an explicit array constructor is evaluated as a whole
+                kind = "cons"
+                run = Compiler.compile(step)
+            elif is_tuple_stream:
+                kind = "tuple"
+                run = step
+            elif step.type == "sort":
+                kind = "sort"
+                run = step
+            else:
+                kind = "step"
+                run = Compiler._compile_step(step, ii == last)
+            steps.append((kind, run, step, is_tuple_stream, step.focus is None))
+
+        relative = expr.steps[0].type != "variable"
+        keep_singleton_array = expr.keep_singleton_array
+        keeps_tuples = expr.tuple is not None
+        group = expr.group
+
+        def path(jsonata, input, environment):
+            if isinstance(input, list) and relative:
+                input_sequence = input
+            else:
+                # if input is not an array, make it so
+                input_sequence = utils.Utils.create_sequence(input)
+
+            result_sequence = None
+            tuple_bindings = None
+
+            for kind, run, step, tuples, advance in steps:
+                if kind == "step":
+                    result_sequence = run(jsonata, input_sequence, environment)
+                elif kind == "tuple":
+                    tuple_bindings = jsonata.evaluate_tuple_step(step, input_sequence, tuple_bindings, environment)
+                elif kind == "cons":
+                    result_sequence = run(jsonata, input_sequence, environment)
+                else:
+                    result_sequence = jsonata.evaluate_step(step, input_sequence, environment, False)
+
+                if not tuples and (result_sequence is None or not result_sequence):
+                    break
+
+                if advance:
+                    input_sequence = result_sequence
+
+            if is_tuple_stream:
+                if keeps_tuples:
+                    # tuple stream is carrying ancestry information - keep this
+                    result_sequence = tuple_bindings
+                else:
+                    result_sequence = utils.Utils.create_sequence_from_iter(b["@"] for b in tuple_bindings)
+
+            if keep_singleton_array:
+                if not (isinstance(result_sequence, utils.Utils.JList)):
+                    result_sequence = utils.Utils.JList(result_sequence)
+                if result_sequence.cons and not result_sequence.sequence:
+                    result_sequence = utils.Utils.create_sequence(result_sequence)
+                result_sequence.keep_singleton = True
+
+            if group is not None:
+                result_sequence = jsonata.evaluate_group_expression(group,
+                                                                    tuple_bindings if is_tuple_stream
+                                                                    else result_sequence,
+                                                                    environment)
+
+            return result_sequence
+
+        return path
+
+    @staticmethod
+    def _compile_step(expr: nodes.Node, last_step: bool) -> CompiledNode:
+        # Jsonata.evaluate_step, for a step that is not a sort
+        run = Compiler.compile(expr)
+        stages = [stage.expr for stage in expr.stages] if expr.stages is not None else None
+        JList = utils.Utils.JList
+
+        def step(jsonata, input, environment):
+            result = []
+            hoisted_scope = jsonata.hoisted_scope
+            jsonata.hoisted_scope = (expr, {})
+            try:
+                for inp in input:
+                    res = run(jsonata, inp, environment)
+                    if stages is not None:
+                        for stage in stages:
+                            res = jsonata.evaluate_filter(stage, res, environment)
+                    if res is not None:
+                        result.append(res)
+            finally:
+                jsonata.hoisted_scope = hoisted_scope
+
+            result_sequence = utils.Utils.create_sequence()
+            if last_step and len(result) == 1 and (isinstance(result[0], list)) and not utils.Utils.is_sequence(
+                    result[0]):
+                result_sequence = result[0]
+            else:
+                # flatten the sequence
+                for res in result:
+                    if not (isinstance(res, list)) or (isinstance(res, JList) and res.cons):
+                        result_sequence.append(res)
+                    else:
+                        result_sequence.extend(res)
+            return result_sequence
+
+        return step
@@ -0,0 +1,181 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import itertools
+import pickle
+import threading
+from typing import Any, Awaitable, Callable, Iterable, Iterator, Mapping, Optional, Sequence
+
+from jsonata import jexception
+
+
+#
+# Applies fn to each item concurrently and returns the results in order.
+#
+# The items are submitted to the executor, except the first one, and those
+# that are not worth it (see parallel), which run in the calling thread. A
+# branch that has not started by the time its result is needed is taken
+# back and runs in the calling thread, so that the threads of the executor
+# are only ever waiting for branches in progress: branches nested in
+# branches cannot exhaust the executor and deadlock.
+#
+# If branches raise, the exception of the first one (in order) is raised,
+# after the branches in progress have finished.
+#
+def map_ordered(executor: concurrent.futures.Executor, fn: Callable[[Any], Any], items: Sequence,
+                parallel: Optional[Sequence[bool]] = None) -> list:
+    positions = [i for i in range(len(items)) if parallel is None or parallel[i]]
+    futures = {i: executor.submit(contextvars.copy_context().run, fn, items[i]) for i in positions[1:]}
+    results = []
+    error = None
+    for i, item in enumerate(items):
+        future = futures.get(i)
+        if future is None or future.cancel():
+            if error is None:
+                try:
+                    results.append(fn(item))
+                except BaseException as err:
+                    error = err
+        elif error is None:
+            try:
+                results.append(future.result())
+            except BaseException as err:
+                error = err
+        else:
+            concurrent.futures.wait((future,))
+    if error is not None:
+        raise error
+    return results
+
+
+#
+# Applies fn to chunks of chunksize items on the executor, and yields the
+# items of their results in order. The items are read as the results are
+# consumed, with at most `pending` chunks submitted ahead.
+#
+def map_chunks(executor: concurrent.futures.Executor, fn: Callable[..., list], items: Iterable, chunksize: int,
+               pending: int, *args) -> Iterator:
+    iterator = iter(items)
+    futures = collections.deque()
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if chunk:
+            futures.append(executor.submit(fn, chunk, *args))
+        if not futures:
+            return
+        if not chunk or len(futures) >= pending:
+            yield from futures.popleft().result()
+
+
+#
+# Expression evaluated by this worker process of Jsonata.evaluate_parallel
+#
+worker_expression = None
+
+
+def init_worker(expression: bytes) -> None:
+    global worker_expression
+    worker_expression = pickle.loads(expression)
+
+
+def evaluate_chunk(inputs: list, bindings: Optional[Mapping[str, Any]]) -> list:
+    return list(worker_expression.evaluate_many(inputs, bindings))
+
+
+#
+# State of an evaluation started by Jsonata.evaluate_async, which runs in
+# a thread of the executor while the event loop awaits its result.
+#
+# The awaitables returned by registered functions are awaited on the event
+# loop (see run), with the worker thread blocked until they complete. The
+# independent subexpressions of the evaluation run concurrently on the
+# executor (see Jsonata.eval_branches), so their awaitables are awaited
+# concurrently.
+#
+class AsyncEvaluation:
+    #
+    # Evaluation in progress in this thread, if started by evaluate_async
+    #
+    CURRENT: contextvars.ContextVar[Optional['AsyncEvaluation']] = \
+        contextvars.ContextVar("jsonata_async_evaluation", default=None)
+
+    loop: asyncio.AbstractEventLoop
+    executor: concurrent.futures.Executor
+    pending: set
+    cancelled: bool
+    lock: threading.Lock
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, executor: concurrent.futures.Executor):
+        self.loop = loop
+        self.executor = executor
+        self.pending = set()
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    #
+    # Awaits an awaitable on the event loop of the evaluation, from one of
+    # its worker threads, and returns its result
+    #
+    def run(self, awaitable: Awaitable) -> Any:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # blocking the event loop on itself would never return
+            AsyncEvaluation.discard(awaitable)
+            raise jexception.JException("T1011", -1)
+        future = asyncio.run_coroutine_threadsafe(AsyncEvaluation._await(awaitable), self.loop)
+        with self.lock:
+            if self.cancelled:
+                future.cancel()
+            self.pending.add(future)
+        try:
+            return future.result()
+        finally:
+            with self.lock:
+                self.pending.discard(future)
+
+    #
+    # Cancels the awaitables in progress, when the task awaiting the
+    # evaluation is cancelled
+    #
+    def cancel(self) -> None:
+        with self.lock:
+            self.cancelled = True
+            for future in self.pending:
+                future.cancel()
+
+    @staticmethod
+    async def _await(awaitable: Awaitable) -> Any:
+        # the task runs in a copy of the context of the worker thread: the
+        # evaluations it starts must not block the event loop on it either
+        AsyncEvaluation.CURRENT.set(None)
+        return await awaitable
+
+    #
+    # Closes an awaitable that will not be awaited, so that it does not
+    # warn that it was never awaited
+    #
+    @staticmethod
+    def discard(awaitable: Awaitable) -> None:
+        close = getattr(awaitable, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,163 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+from jsonata import nodes
+
+
+@dataclass
+class CacheStats:
+    """
+    Snapshot of the counters of an ExpressionCache.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+class ExpressionCache:
+    """
+    Thread-safe, size-bounded LRU cache of parsed expressions.
+
+    Entries are bounded both by count (max_entries) and by an estimate of
+    the memory they retain (max_bytes). Either limit may be None to leave
+    it unbounded; max_entries=0 disables caching. Parsed ASTs are never
+    mutated during evaluation (their annotations, such as the branch masks
+    of Hoister.mark_branches, are computed before they are cached), so a
+    cached tree can be shared by any number of Jsonata instances and
+    threads.
+    """
+
+    DEFAULT_MAX_ENTRIES = 1024
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the value cached for key, calling loader() to produce (and
+        cache) it on a miss. Exceptions raised by loader are not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # parse outside the lock, so a slow parse does not block other threads
+        value = loader()
+        size = ExpressionCache.estimate_size(value)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # another thread loaded the same expression in the meantime
+                return entry[0]
+            if self._fits(size):
+                self._entries[key] = (value, size)
+                self._size += size
+                self._evict()
+        return value
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._size)
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def resize(self, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+               max_bytes: Optional[int] = DEFAULT_MAX_BYTES) -> None:
+        """
+        Changes the limits of the cache, evicting entries as required.
+        """
+        with self._lock:
+            self._max_entries = max_entries
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def _fits(self, size: int) -> bool:
+        if self._max_entries is not None and self._max_entries <= 0:
+            return False
+        return self._max_bytes is None or size <= self._max_bytes
+
+    def _evict(self) -> None:
+        while self._entries and (self._over_entries() or self._over_bytes()):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
+
+    def _over_entries(self) -> bool:
+        return self._max_entries is not None and len(self._entries) > self._max_entries
+
+    def _over_bytes(self) -> bool:
+        return self._max_bytes is not None and self._size > self._max_bytes
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """
+        Estimates the memory retained by a cached value, walking the
+        AST nodes it references.
+        """
+        size = 0
+        seen = set()
+        stack = [value]
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            size += sys.getsizeof(obj)
+            if isinstance(obj, nodes.Node):
+                attrs = getattr(obj, "__dict__", None)
+                if attrs is not None:
+                    size += sys.getsizeof(attrs)
+                for name, attr in obj.items():
+                    if name != "_outer_instance" and name != "compiled":
+                        stack.append(attr)
+            elif isinstance(obj, (list, tuple)):
+                stack.extend(obj)
+            elif isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+        return size
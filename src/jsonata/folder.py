@@ -0,0 +1,225 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from typing import Any, Optional
+
+from jsonata import hoister, nodes, parser, timebox, utils
+
+
+#
+# Folds the constant subexpressions of an expression tree.
+#
+# A subexpression is constant when it only combines literals with
+# operators (except the range operator ..), array and object constructors,
+# conditions, blocks and calls of pure builtin functions (see
+# hoister.Hoister) that do not take an argument from the context, e.g.
+# 60 * 60 * 24, "Hello" & " " & "World", {"a": [1, 2]} or
+# $uppercase("abc"). The folder evaluates the largest such subexpressions
+# once, at parse time, and replaces them by their value:
+#  - a literal node, when no builtin is called,
+#  - a nodes.FoldedNode otherwise, which keeps the original subexpression
+#    for the evaluations in which a registered function shadows one of the
+#    builtins (see Jsonata.evaluate_folded).
+#
+# Folding does not change errors: a subexpression whose evaluation raises
+# is left as it is (its constant parts are folded), so it raises the same
+# error, at the same time, as before. Nor does it escape the guardrails:
+# subexpressions are folded within a budget of their own (see BUDGET), and
+# the evaluations of an expression with runtime bounds are charged the cost
+# of the builtin calls folded into them (see nodes.FoldedNode.cost). Folded arrays and objects are
+# utils.Utils.FrozenList and FrozenDict instances, which are shared by all
+# evaluations and cannot be modified; Jsonata.evaluate returns copies.
+#
+class Folder:
+
+    # node types that are computed from their operands alone
+    FOLDABLE = frozenset(("unary", "binary", "condition", "block", "function", "apply"))
+
+    LITERALS = frozenset(("string", "number", "value", "regex"))
+
+    # max evaluator steps plus items of the evaluation of a constant
+    # subexpression (see timebox.Timebox): costlier ones are left as they
+    # are, and evaluated under the bounds of each evaluation
+    BUDGET = 10000
+
+    # step annotations that make a node more than the value it computes
+    ANNOTATIONS = ("predicate", "group", "stages", "tuple", "focus", "index", "ancestor")
+
+    #
+    # Fold the constant subexpressions of an expression tree
+    # @param {Object} expr - lowered AST, with its builtin references resolved
+    # @param {Object} evaluator - Jsonata instance evaluating the subexpressions
+    # @returns {Object} the tree, or its folded value if it is constant
+    #
+    @staticmethod
+    def fold(expr: Optional[nodes.Node], evaluator: Any) -> Optional[nodes.Node]:
+        if not isinstance(expr, nodes.Node) or isinstance(expr, parser.Parser.Symbol):
+            return expr
+        return Folder(evaluator)._fold_value(expr, True)
+
+    def __init__(self, evaluator: Any):
+        self.evaluator = evaluator
+        self.constant = {}
+
+    def _fold_value(self, value: Any, replace: bool) -> Any:
+        if isinstance(value, list):
+            items = [self._fold_value(item, replace) for item in value]
+            return items if any(new is not old for new, old in zip(items, value)) else value
+        if not isinstance(value, nodes.Node):
+            return value
+        if replace and value.type not in Folder.LITERALS and self._is_constant(value):
+            folded = self._evaluate(value)
+            if folded is not None:
+                return folded
+        self._fold_children(value)
+        return value
+
+    def _fold_children(self, node: nodes.Node) -> None:
+        type = node.type
+        for name, child in node.items():
+            if name in hoister.Hoister.NON_CHILD_ATTRS:
+                continue
+            # steps, procedures and filters are evaluated in their own way,
+            # and the body of a lambda is checked for tail calls (see
+            # Jsonata.apply), so only their operands are folded
+            replace = not (name in ("steps", "procedure") or (type == "lambda" and name in ("arguments", "body")) or
+                           (type == "bind" and name == "lhs") or (type == "apply" and name == "rhs") or
+                           (type == "filter" and name == "expr"))
+            if type == "unary" and node.value == "[" and name == "expressions":
+                # a nested array constructor is not flattened into its parent
+                replaced = [self._fold_value(item, replace and item.value != "[") for item in child]
+                if any(new is not old for new, old in zip(replaced, child)):
+                    node.expressions = replaced
+                continue
+            replaced = self._fold_value(child, replace)
+            if replaced is not child:
+                setattr(node, name, replaced)
+
+    def _is_constant(self, node: nodes.Node) -> bool:
+        constant = self.constant.get(id(node))
+        if constant is None:
+            constant = self._check_constant(node)
+            self.constant[id(node)] = constant
+        return constant
+
+    def _check_constant(self, node: nodes.Node) -> bool:
+        type = node.type
+        if node.keep_array or any(getattr(node, name) for name in Folder.ANNOTATIONS):
+            return False
+        if type in Folder.LITERALS:
+            return True
+        if type not in Folder.FOLDABLE:
+            return False
+        if type == "unary":
+            if node.value == "-":
+                return self._is_constant(node.expression)
+            if node.value == "[":
+                return not node.consarray and all(self._is_constant(item) for item in node.expressions)
+            return all(self._is_constant(key) and self._is_constant(value) for key, value in node.lhs_object)
+        if type == "binary":
+            return node.value != ".." and self._is_constant(node.lhs) and self._is_constant(node.rhs)
+        if type == "condition":
+            return all(self._is_constant(operand) for operand in (node.condition, node.then, node._else)
+                       if operand is not None)
+        if type == "block":
+            return all(self._is_constant(item) for item in node.expressions)
+        if type == "function":
+            procedure, arguments = node.procedure, node.arguments
+        elif node.rhs.type == "function":
+            procedure, arguments = node.rhs.procedure, [node.lhs] + list(node.rhs.arguments)
+        elif node.rhs.type == "variable":
+            procedure, arguments = node.rhs, [node.lhs]
+        else:
+            return False
+        pure, context_arg = hoister.Hoister._pure_call(procedure, arguments)
+        if not pure or not all(self._is_constant(arg) for arg in arguments):
+            return False
+        if context_arg:
+            # the context is only taken for an argument missing from the
+            # values of the (constant) arguments
+            try:
+                values = [self.evaluator.evaluate_constant(arg, Folder._bounds()) for arg in arguments]
+            except Exception:
+                return False
+            return not procedure.builtin.signature.uses_context(values)
+        return True
+
+    #
+    # Returns the node replacing a constant subexpression, or None if it is
+    # to be evaluated each time
+    #
+    def _evaluate(self, node: nodes.Node) -> Optional[nodes.Node]:
+        bounds = Folder._bounds()
+        try:
+            value = self.evaluator.evaluate_constant(node, bounds)
+        except Exception:
+            # raised again when evaluated
+            return None
+        if value is None or not Folder._is_json(value) or (isinstance(value, (list, dict)) and not value):
+            return None
+
+        builtins = []
+        hoister.Hoister._collect(node, builtins, set())
+        builtins = tuple((str(variable.value), variable.builtin) for variable in builtins
+                         if isinstance(variable, nodes.VariableNode) and variable.builtin is not None)
+        if builtins:
+            folded = nodes.FoldedNode.__new__(nodes.FoldedNode)
+            for name in nodes.FoldedNode.field_names():
+                setattr(folded, name, None)
+            folded.type = "folded"
+            folded.value = utils.Utils.freeze(value)
+            folded.expression = node
+            folded.builtins = builtins
+            # the folded node itself costs a step, and the items of its value
+            folded.cost = timebox.Usage(bounds.steps - 1,
+                                        bounds.items - (len(value) if isinstance(value, list) else 0))
+        else:
+            folded = nodes.Node.__new__(nodes.Node)
+            for name in nodes.Node.field_names():
+                setattr(folded, name, None)
+            if isinstance(value, str):
+                folded.type = "string"
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                folded.type = "number"
+            else:
+                folded.type = "value"
+            # the value of a null literal is None (see Jsonata.evaluate_literal)
+            folded.value = utils.Utils.freeze(value) if value is not utils.Utils.NULL_VALUE else None
+        folded.position = node.position
+        folded.keep_array = False
+        folded.consarray = False
+        return folded
+
+    @staticmethod
+    def _bounds() -> timebox.Timebox:
+        return timebox.Timebox(None, budget=Folder.BUDGET).begin()
+
+    #
+    # Checks whether a value is plain JSON, without the sequence flags of
+    # utils.Utils.JList
+    #
+    @staticmethod
+    def _is_json(value: Any) -> bool:
+        if value is utils.Utils.NULL_VALUE or isinstance(value, (str, bool)):
+            return True
+        if isinstance(value, (int, float)):
+            return True
+        if isinstance(value, dict):
+            return all(isinstance(key, str) and Folder._is_json(item) for key, item in value.items())
+        if type(value) in (list, utils.Utils.FrozenList) or (type(value) is utils.Utils.JList and not (
+                value.sequence or value.outer_wrapper or value.tuple_stream or value.keep_singleton or value.cons)):
+            return all(item is not None and Folder._is_json(item) for item in value)
+        return False
@@ -28,6 +28,7 @@ import datetime
 import decimal
 import functools
 import inspect
+import itertools
 import json
 import math
 import random
@@ -36,7 +37,7 @@ import sys
 import unicodedata
 import urllib.parse
 from dataclasses import dataclass
-from typing import Any, AnyStr, Mapping, NoReturn, Optional, Sequence, Callable, Type, Union
+from typing import Any, AnyStr, Iterator, Mapping, NoReturn, Optional, Sequence, Callable, Type, Union
 
 from jsonata import datetimeutils, jexception, parser, utils
 from jsonata.regex_engine import CompiledPattern
@@ -138,10 +139,16 @@ class Functions:
         if isinstance(arg, (jsonata.Jsonata.JFunction, parser.Parser.Symbol)):
             return ""
 
-        if prettify:
-            return json.dumps(arg, cls=Functions.Encoder, indent="  ")
-        else:
-            return json.dumps(arg, cls=Functions.Encoder, separators=(',', ':'))
+        try:
+            if prettify:
+                return json.dumps(arg, cls=Functions.Encoder, indent="  ")
+            else:
+                return json.dumps(arg, cls=Functions.Encoder, separators=(',', ':'))
+        except TypeError:
+            if Functions.validating_lazily():
+                # raise the error of the input validation, if that is the cause
+                Functions.validate_input(arg)
+            raise
 
     class Encoder(json.JSONEncoder):
         def encode(self, arg):
@@ -181,7 +188,69 @@ class Functions:
     # @return
     #     
     @staticmethod
-    def validate_input(arg: Optional[Any]) -> None:
+    def validate_input(arg: Optional[Any], max_depth: Optional[int] = None) -> None:
+        # walks nested arrays and objects with a stack of iterators over their
+        # keys and values, so that deep data does not exhaust the interpreter
+        # stack
+        if max_depth is None:
+            max_depth = utils.Utils.MAX_DATA_DEPTH
+        stack = [iter((arg,))]
+        while stack:
+            for value in stack[-1]:
+                if isinstance(value, (dict, list)):
+                    if len(stack) > max_depth:
+                        raise jexception.JException("D1013", -1, max_depth)
+                    stack.append(itertools.chain.from_iterable(value.items()) if isinstance(value, dict)
+                                 else iter(value))
+                    break
+                if not isinstance(value, (str, int, float)):
+                    Functions.validate_scalar(value)
+            else:
+                stack.pop()
+
+    #
+    # Validate the data types of a value that the evaluation touches, with
+    # lazy input validation (see Jsonata.set_validate_input): the value
+    # itself, and the members of an array, which are flattened into the
+    # sequence. The members of objects are validated when they are touched
+    # in turn.
+    #
+    # @param arg
+    #
+    @staticmethod
+    def validate_value(arg: Optional[Any]) -> None:
+        if isinstance(arg, list):
+            for item in arg:
+                if not isinstance(item, (str, int, float, dict, list)):
+                    Functions.validate_scalar(item)
+        elif not isinstance(arg, (str, int, float, dict)):
+            Functions.validate_scalar(arg)
+
+    #
+    # Tests whether the evaluation in progress validates its input lazily, for
+    # the builtins that touch values of their own (e.g. $keys)
+    #
+    @staticmethod
+    def validating_lazily() -> bool:
+        from jsonata import jsonata
+
+        context = jsonata.Jsonata.CONTEXT.get()
+        return context is not None and context.validate_lazily
+
+    #
+    # Validate the keys of an object whose members the evaluation enumerates,
+    # with lazy input validation
+    #
+    # @param arg
+    #
+    @staticmethod
+    def validate_keys(arg: Mapping) -> None:
+        for key in arg:
+            if not isinstance(key, (str, int, float)):
+                Functions.validate_scalar(key)
+
+    @staticmethod
+    def validate_scalar(arg: Optional[Any]) -> None:
         from jsonata import jsonata
 
         if arg is None or arg is utils.Utils.NULL_VALUE:
@@ -199,17 +268,6 @@ class Functions:
         if isinstance(arg, str):
             return
 
-        if isinstance(arg, dict):
-            for k, v in arg.items():
-                Functions.validate_input(k)
-                Functions.validate_input(v)
-            return
-
-        if isinstance(arg, list):
-            for v in arg:
-                Functions.validate_input(v)
-            return
-
         # Throw error for unknown types
         raise ValueError(
             "Only JSON types (values, Map, List) are allowed as input. Unsupported type: " + str(type(arg)))
@@ -1609,10 +1667,15 @@ class Functions:
     def func_apply(func: Any, func_args: Optional[Sequence]) -> Optional[Any]:
         from jsonata import jsonata
         res = None
+        context = jsonata.Jsonata.current()
         if Functions.is_lambda(func):
-            res = jsonata.Jsonata.CURRENT.jsonata.apply(func, func_args, None,
-                                                        jsonata.Jsonata.CURRENT.jsonata.environment)
+            res = context.apply(func, func_args, None, context.environment)
         else:
+            # higher order functions apply their function once per item:
+            # native functions do not reach the checks of the evaluator
+            bounds = context.bounds
+            if bounds is not None:
+                bounds.tick()
             res = func.call(None, func_args)
         return res
 
@@ -1744,6 +1807,8 @@ class Functions:
             keys = {k: '' for el in arg for k in Functions.keys(el)}
             result = utils.Utils.create_sequence_from_iter(keys.keys())
         elif isinstance(arg, dict):
+            if Functions.validating_lazily():
+                Functions.validate_keys(arg)
             result = utils.Utils.create_sequence_from_iter(arg.keys())
         else:
             result = utils.Utils.create_sequence()
@@ -1773,7 +1838,7 @@ class Functions:
         if isinstance(arg, list):
             # spread all of the items in the array
             for item in arg:
-                result = Functions.append(result, Functions.spread(item))
+                utils.Utils.append_to_sequence(result, Functions.spread(item))
         elif isinstance(arg, dict):
             for k, v in arg.items():
                 obj = {k: v}
@@ -1962,9 +2027,21 @@ class Functions:
 
         results = utils.Utils.create_sequence() if (isinstance(arr, utils.Utils.JList)) else []
 
+        # values seen so far, by their deep_equal_key; values that cannot be
+        # hashed are compared one by one
+        seen = set()
+        unhashable = []
         for el in arr:
-            if el not in results:
-                results.append(el)
+            try:
+                key = utils.Utils.deep_equal_key(el)
+                if key in seen:
+                    continue
+                seen.add(key)
+            except TypeError:
+                if any(utils.Utils.is_deep_equal(el, other) for other in unhashable):
+                    continue
+                unhashable.append(el)
+            results.append(el)
 
         return results
 
@@ -2044,13 +2121,18 @@ class Functions:
     # @returns {*} Value of key in object
     #     
     @staticmethod
-    def lookup(input: Union[Mapping, Optional[Sequence]], key: Optional[str]) -> Optional[Any]:
-        # lookup the 'name' item in the input
+    def lookup(input: Union[Mapping, Optional[Sequence]], key: Optional[str],
+               validate: Optional[bool] = False) -> Optional[Any]:
+        # lookup the 'name' item in the input, validating the values it
+        # touches if validate is set (see validate_value)
+        if validate is None:
+            # the builtin $lookup, as the evaluation in progress
+            validate = Functions.validating_lazily()
         result = None
         if isinstance(input, list):
             result = utils.Utils.create_sequence()
             for inp in input:
-                res = Functions.lookup(inp, key)
+                res = Functions.lookup(inp, key, validate)
                 if res is not None:
                     if isinstance(res, list):
                         result.extend(res)
@@ -2063,6 +2145,10 @@ class Functions:
                 result = utils.Utils.NULL_VALUE
             elif result is utils.Utils.NONE:
                 result = None
+            elif validate:
+                Functions.validate_value(result)
+        elif validate and not isinstance(input, (str, int, float)):
+            Functions.validate_scalar(input)
         return result
 
     @staticmethod
@@ -2195,8 +2281,97 @@ class Functions:
         if arg is None:
             return None
 
-        res = json.loads(Functions.string(arg, False))
-        return res
+        if isinstance(arg, utils.Utils.JList) and arg.outer_wrapper:
+            arg = arg[0]
+        try:
+            return json.loads(Functions.string(arg, False))
+        except RecursionError:
+            # nested too deeply for the json module
+            if not isinstance(arg, (dict, list, tuple)):
+                raise
+            return Functions.json_copy(arg)
+
+    #
+    # Returns json.loads(json.dumps(arg)) for an array or object, built
+    # with a stack of (copy, iterator over the entries of the original)
+    # rather than recursively, for any depth up to utils.Utils.MAX_DATA_DEPTH
+    #
+    @staticmethod
+    def json_copy(arg: Union[Mapping, Sequence]) -> Any:
+        root = {} if isinstance(arg, dict) else []
+        stack = [(root, Functions._json_entries(arg), id(arg))]
+        # ids of the containers being copied, like the circular reference
+        # check of json.dumps
+        path = {id(arg)}
+        while stack:
+            copy, entries, _ = stack[-1]
+            for key, value in entries:
+                if isinstance(value, (dict, list, tuple)):
+                    if id(value) in path:
+                        raise ValueError("Circular reference detected")
+                    if len(stack) >= utils.Utils.MAX_DATA_DEPTH:
+                        raise jexception.JException("D1013", -1, utils.Utils.MAX_DATA_DEPTH)
+                    item = {} if isinstance(value, dict) else []
+                    Functions._json_store(copy, key, item)
+                    stack.append((item, Functions._json_entries(value), id(value)))
+                    path.add(id(value))
+                    break
+                Functions._json_store(copy, key, Functions._json_scalar(value))
+            else:
+                path.discard(stack.pop()[2])
+        return root
+
+    @staticmethod
+    def _json_entries(container: Any) -> Iterator:
+        if isinstance(container, dict):
+            return ((Functions._json_key(key), value) for key, value in container.items())
+        return ((None, value) for value in container)
+
+    @staticmethod
+    def _json_store(copy: Any, key: Optional[str], value: Any) -> None:
+        if isinstance(copy, dict):
+            copy[key] = value
+        else:
+            copy.append(value)
+
+    # the keys of json.dumps
+    @staticmethod
+    def _json_key(key: Any) -> str:
+        if isinstance(key, str):
+            return str.__str__(key)
+        if key is True:
+            return "true"
+        if key is False:
+            return "false"
+        if key is None:
+            return "null"
+        if isinstance(key, int):
+            return int.__repr__(key)
+        if isinstance(key, float):
+            return json.dumps(float(key))
+        raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+    # the scalars of json.loads(json.dumps(value, cls=Encoder))
+    @staticmethod
+    def _json_scalar(value: Any) -> Any:
+        from jsonata import jsonata
+
+        if value is None or value is True or value is False:
+            return value
+        if isinstance(value, str):
+            return str.__str__(value)
+        if isinstance(value, int):
+            return int(value)
+        if isinstance(value, float):
+            return float(value)
+        if value is utils.Utils.NULL_VALUE:
+            return None
+        if isinstance(value, (jsonata.Jsonata.JFunction, parser.Parser.Symbol)):
+            return ""
+        raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+    # errors of the guardrails (see timebox.Timebox), which $eval does not wrap
+    GUARDRAIL_ERRORS = frozenset(("D1011", "D1012", "D1013", "D1014"))
 
     #
     # parses and evaluates the supplied expression
@@ -2210,13 +2385,9 @@ class Functions:
         if expr is None:
             return None
 
-        # Capture the enclosing instance *before* constructing the nested
-        # ast below: Jsonata.__init__ unconditionally overwrites
-        # Jsonata.CURRENT.jsonata as a side effect, so re-reading
-        # CURRENT.jsonata afterwards would silently return the inner
-        # expression instead of the enclosing one, losing access to its
-        # environment (e.g. outer variable bindings).
-        enclosing = jsonata.Jsonata.CURRENT.jsonata
+        # The enclosing instance provides the input, the environment (e.g.
+        # outer variable bindings) and the regex engine for the evaluation.
+        enclosing = jsonata.Jsonata.current()
         input = enclosing.input  # =  this.input;
         if focus is not None:
             input = focus
@@ -2227,47 +2398,45 @@ class Functions:
 
         ast = None
         try:
-            try:
-                # Only used to parse expr into an AST (ast.ast below); the
-                # actual evaluation reuses the enclosing instance directly
-                # (see below), so regex_engine here just needs to be valid
-                # for parsing -- it does not need to be evaluated against.
-                ast = jsonata.Jsonata(expr, enclosing.regex_engine)
-            except Exception as err:
-                # error parsing the expression passed to $eval
-                # populateMessage(err)
-                raise jexception.JException("D3120", -1)
-
-            # Constructing `ast` overwrote Jsonata.CURRENT.jsonata as a side
-            # effect (see Jsonata.__init__); restore it to the enclosing
-            # instance before evaluating, so enclosing.eval()'s own
-            # get_per_thread_instance() lookup resolves correctly.
-            jsonata.Jsonata.CURRENT.jsonata = enclosing
+            # Only parse expr into an AST (shared through the expression
+            # cache); the actual evaluation reuses the enclosing instance
+            # directly (see below).
+            ast, _ = jsonata.Jsonata.parse_expression(expr, enclosing.regex_engine, enclosing.compiled)
+        except Exception as err:
+            # error parsing the expression passed to $eval
+            # populateMessage(err)
+            raise jexception.JException("D3120", -1)
 
-            result = None
-            try:
-                # Evaluate ast.ast (the parsed tree) using the *enclosing*
-                # instance's low-level eval(), reusing enclosing.environment
-                # directly rather than calling ast.evaluate(input, environment)
-                # (which copies environment's bindings one level deep into a
-                # fresh child frame rooted at ast's own static frame). This
-                # mirrors jsonata-java's Functions.functionEval, which calls
-                # Jsonata.current.get().evaluate(ast.ast, input, env) rather
-                # than constructing a second, disconnected evaluation
-                # context. Reusing the environment directly means $eval sees
-                # bindings at every level of the enclosing scope chain (not
-                # just the immediate frame) and correctly inherits any
-                # stack/timeout guardrails registered on an ancestor frame,
-                # since Frame.lookup walks the parent chain.
-                result = enclosing.eval(ast.ast, input, enclosing.environment)
-            except Exception as err:
-                # error evaluating the expression passed to $eval
-                # populateMessage(err)
-                raise jexception.JException("D3121", -1)
-        finally:
-            # Restore the enclosing instance as current now that $eval's
-            # parsing/evaluation is done.
-            jsonata.Jsonata.CURRENT.jsonata = enclosing
+        result = None
+        try:
+            # Evaluate ast (the parsed tree) using the *enclosing*
+            # instance's low-level eval(), reusing enclosing.environment
+            # directly rather than calling ast.evaluate(input, environment)
+            # (which copies environment's bindings one level deep into a
+            # fresh child frame rooted at ast's own static frame). This
+            # mirrors jsonata-java's Functions.functionEval, which calls
+            # Jsonata.current.get().evaluate(ast.ast, input, env) rather
+            # than constructing a second, disconnected evaluation
+            # context. Reusing the environment directly means $eval sees
+            # bindings at every level of the enclosing scope chain (not
+            # just the immediate frame) and correctly inherits any
+            # stack/timeout guardrails of the enclosing evaluation.
+            result = enclosing.eval(ast, input, enclosing.environment)
+        except jexception.EvaluationCancelled:
+            # the enclosing evaluation is stopped
+            raise
+        except jexception.JException as err:
+            if err.error in Functions.GUARDRAIL_ERRORS:
+                # raised by the guardrails of the enclosing evaluation
+                raise
+            raise jexception.JException("D3121", -1)
+        except RecursionError:
+            # reported as D1011 by the enclosing evaluation
+            raise
+        except Exception as err:
+            # error evaluating the expression passed to $eval
+            # populateMessage(err)
+            raise jexception.JException("D3121", -1)
 
         return result
 
@@ -2277,7 +2446,7 @@ class Functions:
     @staticmethod
     def now(picture: Optional[str], timezone: Optional[str]) -> Optional[str]:
         from jsonata import jsonata
-        t = jsonata.Jsonata.CURRENT.jsonata.timestamp
+        t = jsonata.Jsonata.current().timestamp
         return Functions.datetime_from_millis(t, picture, timezone)
 
     #  environment.bind("millis", defineFunction(function() {
@@ -2286,5 +2455,5 @@ class Functions:
     @staticmethod
     def millis() -> int:
         from jsonata import jsonata
-        t = jsonata.Jsonata.CURRENT.jsonata.timestamp
+        t = jsonata.Jsonata.current().timestamp
         return t
@@ -0,0 +1,365 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from typing import Any, Optional
+
+from jsonata import nodes, parser
+
+
+#
+# Hoists the loop-invariant subexpressions of predicates and path steps.
+#
+# A predicate (items[...]) is evaluated once per item of its input, and so
+# is each step of a path. A subexpression of such a loop body that does not
+# depend on the item, e.g. $average($$.items.price) in
+# items[price > $average($$.items.price)], evaluates to the same value on
+# every iteration. The hoister wraps the largest such subexpressions in a
+# nodes.HoistedNode, which the evaluator computes on the first iteration of
+# each evaluation of the loop and reuses for the others
+# (Jsonata.evaluate_hoisted).
+#
+# A subexpression is loop-invariant when it
+#  - does not use its context ($, field names, wildcards, parent operators,
+#    builtins that default an argument to the context, ...),
+#  - does not reference a variable bound within the loop body (by :=, a
+#    lambda parameter) or by a tuple stream (focus and index variables),
+#  - only calls builtin functions (see resolver.Resolver) that are pure,
+#    i.e. not $random, $now, $millis, $shuffle or $eval; functions bound
+#    by the expression, user-registered functions and builtins shadowed by
+#    them are not known to be pure.
+#
+# Hoisting is lazy: a hoisted subexpression is only evaluated when it is
+# first reached, so it raises the same errors as before, and none when the
+# loop has no iteration.
+#
+class Hoister:
+
+    IMPURE = frozenset(("random", "now", "millis", "shuffle", "eval"))
+
+    # node types whose evaluation is worth hoisting (the others are leaves
+    # or cannot be hoisted)
+    HOISTABLE = frozenset(("path", "binary", "unary", "function", "condition", "block", "apply"))
+
+    # node types that are never loop-invariant
+    OPAQUE = frozenset(("bind", "transform", "partial", "parent", "sort"))
+
+    # node types that use their context
+    CONTEXTUAL = frozenset(("name", "wildcard", "descendant", "parent", "sort"))
+
+    # attributes that refer back up the tree rather than to child expressions
+    NON_CHILD_ATTRS = frozenset(("ancestor", "slot", "builtin", "builtins", "owner", "compiled", "errors", "blocking"))
+
+    #
+    # Hoist the loop-invariant subexpressions of an expression tree
+    # @param {Object} expr - lowered AST, with its builtin references resolved
+    # @returns {Integer} the number of hoisted subexpressions
+    #
+    @staticmethod
+    def hoist(expr: Optional[nodes.Node]) -> int:
+        if not isinstance(expr, nodes.Node) or isinstance(expr, parser.Parser.Symbol):
+            return 0
+        all_nodes = []
+        Hoister._collect(expr, all_nodes, set())
+        tuple_names = set()
+        for node in all_nodes:
+            if isinstance(node, nodes.VariableNode) and node.value == "eval":
+                # the evaluated expression can bind any variable
+                return 0
+            if node.focus is not None:
+                tuple_names.add(str(node.focus))
+            if isinstance(node.index, str):
+                tuple_names.add(node.index)
+
+        hoister = Hoister(tuple_names)
+        for node in all_nodes:
+            if node.type == "path":
+                for step in node.steps:
+                    if step.type != "sort":
+                        hoister._hoist_owner(step)
+            for filter in list(node.predicate or ()) + list(node.stages or ()):
+                if filter.type == "filter" and filter.expr.type != "number":
+                    hoister._hoist_owner(filter.expr)
+        return hoister.hoisted
+
+    def __init__(self, tuple_names: set):
+        self.tuple_names = tuple_names
+        self.hoisted = 0
+
+    @staticmethod
+    def _collect(value: Any, all_nodes: list, seen: set) -> None:
+        stack = [value]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, list):
+                stack.extend(value)
+                continue
+            if not isinstance(value, nodes.Node) or id(value) in seen:
+                continue
+            seen.add(id(value))
+            all_nodes.append(value)
+            for name, child in value.items():
+                if name not in Hoister.NON_CHILD_ATTRS:
+                    stack.append(child)
+
+    #
+    # Wrap the largest loop-invariant subexpressions of a loop body
+    #
+    def _hoist_owner(self, owner: nodes.Node) -> None:
+        self.owner = owner
+        self.banned = Hoister._bound_names(owner) | self.tuple_names
+        self.info = {}
+        self._hoist_children(owner)
+
+    def _hoist_children(self, node: nodes.Node) -> None:
+        type = node.type
+        if type in ("transform", "partial", "sort"):
+            return
+        for name, child in node.items():
+            if (name in Hoister.NON_CHILD_ATTRS or name in ("predicate", "stages", "steps", "procedure") or
+                    (type == "lambda" and name == "arguments") or (type == "apply" and name == "rhs") or
+                    (type == "bind" and name == "lhs")):
+                continue
+            # the body of a lambda is checked for tail calls (see Jsonata.apply)
+            replaced = self._hoist_value(child, type != "lambda" or name != "body")
+            if replaced is not child:
+                setattr(node, name, replaced)
+
+    def _hoist_value(self, value: Any, wrap: bool) -> Any:
+        if isinstance(value, list):
+            items = [self._hoist_value(item, wrap) for item in value]
+            return items if any(new is not old for new, old in zip(items, value)) else value
+        if not isinstance(value, nodes.Node) or isinstance(value, nodes.HoistedNode):
+            return value
+        if wrap and self._hoistable(value):
+            return self._wrap(value)
+        self._hoist_children(value)
+        return value
+
+    def _hoistable(self, node: nodes.Node) -> bool:
+        if node.type not in Hoister.HOISTABLE:
+            return False
+        uses_context, pure, free, worth = self._analyse(node)
+        return not uses_context and pure and worth and not (free & self.banned)
+
+    def _wrap(self, node: nodes.Node) -> nodes.HoistedNode:
+        hoisted = nodes.HoistedNode.__new__(nodes.HoistedNode)
+        for name in nodes.HoistedNode.field_names():
+            setattr(hoisted, name, None)
+        hoisted.type = "hoisted"
+        hoisted.position = node.position
+        hoisted.keep_array = False
+        hoisted.consarray = False
+        hoisted.expression = node
+        hoisted.owner = self.owner
+        builtins = []
+        Hoister._collect(node, builtins, set())
+        hoisted.builtins = tuple((str(variable.value), variable.builtin) for variable in builtins
+                                 if isinstance(variable, nodes.VariableNode) and variable.builtin is not None)
+        self.hoisted += 1
+        return hoisted
+
+    #
+    # Returns (uses_context, pure, free_variables, worth_hoisting) for a node
+    #
+    def _analyse(self, node: nodes.Node) -> tuple[bool, bool, frozenset, bool]:
+        info = self.info.get(id(node))
+        if info is not None:
+            return info
+        type = node.type
+        uses_context = type in Hoister.CONTEXTUAL
+        pure = type not in Hoister.OPAQUE
+        free = set()
+        worth = type in ("path", "function", "variable")
+
+        if isinstance(node, nodes.VariableNode):
+            if node.value == "":
+                uses_context = True
+            else:
+                free.add(str(node.value))
+        elif type == "function":
+            pure, context_arg = Hoister._pure_call(node.procedure, node.arguments)
+            uses_context = uses_context or context_arg
+        elif type == "apply":
+            rhs = node.rhs
+            if rhs.type == "function":
+                pure, context_arg = Hoister._pure_call(rhs.procedure, [node.lhs] + list(rhs.arguments))
+            else:
+                pure, context_arg = Hoister._pure_call(rhs, [node.lhs])
+            uses_context = uses_context or context_arg
+
+        # the context of a path is the context of its first step; that of the
+        # other steps, predicates and group-by is a value computed from it
+        internal = ("predicate", "stages", "group", "steps")
+        if type == "path":
+            shared = [node.steps[0]]
+        else:
+            shared = []
+        for name, child in node.items():
+            if name in Hoister.NON_CHILD_ATTRS or (type == "lambda" and name == "arguments"):
+                continue
+            for item in Hoister._nodes(child):
+                c_context, c_pure, c_free, c_worth = self._analyse(item)
+                if name not in internal or any(item is step for step in shared):
+                    uses_context = uses_context or c_context
+                pure = pure and c_pure
+                free |= c_free
+                worth = worth or c_worth
+
+        if type == "lambda":
+            free -= {str(arg.value) for arg in node.arguments}
+        info = (uses_context, pure, frozenset(free), worth)
+        self.info[id(node)] = info
+        return info
+
+    #
+    # Returns (pure, uses_context) for a call of the procedure with the arguments
+    #
+    @staticmethod
+    def _pure_call(procedure: Optional[nodes.Node], arguments: list) -> tuple[bool, bool]:
+        builtin = getattr(procedure, "builtin", None)
+        if builtin is None or procedure.value in Hoister.IMPURE:
+            return False, False
+        signature = getattr(builtin, "signature", None)
+        if signature is None:
+            return False, False
+        if signature.takes_function():
+            # the function arguments are called; those of unknown purity are
+            # held by variables
+            for arg in arguments:
+                if isinstance(arg, nodes.VariableNode) and arg.builtin is None:
+                    return False, False
+        # a missing argument is taken from the context
+        return True, signature.takes_context() and len(arguments) < signature.get_number_of_args()
+
+    @staticmethod
+    def _nodes(value: Any):
+        if isinstance(value, list):
+            for item in value:
+                yield from Hoister._nodes(item)
+        elif isinstance(value, nodes.Node):
+            yield value
+
+    #
+    # Checks whether the evaluation of a subexpression may block: whether it
+    # calls a function that is not a builtin (a registered function, which
+    # may do I/O or return an awaitable, or a function of the expression), or
+    # a builtin that may call one ($eval, or a higher order builtin passed a
+    # variable). Only such subexpressions are worth evaluating concurrently
+    # (see Jsonata.eval_branches). A builtin shadowed by a registered
+    # function is not seen, and its call is evaluated sequentially.
+    #
+    @staticmethod
+    def may_block(expr: Any) -> bool:
+        all_nodes = []
+        Hoister._collect(expr, all_nodes, set())
+        for node in all_nodes:
+            type = node.type
+            if type == "function" or type == "partial":
+                procedure, arguments = node.procedure, node.arguments
+            elif type == "apply":
+                rhs = node.rhs
+                if rhs.type == "function":
+                    procedure, arguments = rhs.procedure, [node.lhs] + list(rhs.arguments)
+                else:
+                    procedure, arguments = rhs, [node.lhs]
+            else:
+                continue
+            pure, _ = Hoister._pure_call(procedure, arguments)
+            if pure:
+                continue
+            # $random() and the like do not block, but $eval() may
+            impure = getattr(procedure, "builtin", None) is not None and procedure.value in Hoister.IMPURE
+            if not impure or procedure.value == "eval":
+                return True
+        return False
+
+    #
+    # Returns which of the independent subexpressions of a node (the entries
+    # of an array constructor, the values of an object constructor or the
+    # arguments of a function call) may block, cached on the node. They share
+    # the frame they are evaluated in, so if one of them assigns a variable,
+    # none may block: the siblings after it (or a function they call) may
+    # read it, and they must run after it, in order.
+    #
+    @staticmethod
+    def branch_mask(node: Any, children: Any) -> tuple:
+        mask = getattr(node, "blocking", None)
+        if mask is None:
+            # not marked when parsed (see mark_branches)
+            mask = tuple(Hoister.may_block(child) for child in children)
+            if sum(mask) > 1 and any(Hoister.binds(child) for child in children):
+                mask = (False,) * len(mask)
+        return mask
+
+    #
+    # Caches the branch masks (see branch_mask) on the nodes of a parsed
+    # expression, before it is cached and shared by the evaluations, which
+    # then only read them
+    #
+    @staticmethod
+    def mark_branches(ast: Any) -> None:
+        all_nodes = []
+        Hoister._collect(ast, all_nodes, set())
+        for node in all_nodes:
+            if node.type == "function":
+                children = node.arguments or []
+            elif getattr(node, "lhs_object", None) is not None:
+                children = [pair[1] for pair in node.lhs_object]
+            elif node.type == "unary" and node.value == "[":
+                children = node.expressions
+            else:
+                continue
+            node.blocking = Hoister.branch_mask(node, children)
+
+    #
+    # Checks whether a subexpression assigns a variable in the frame it is
+    # evaluated in, rather than in the frame of a block or a lambda
+    #
+    @staticmethod
+    def binds(expr: Any) -> bool:
+        stack = [expr]
+        seen = set()
+        while stack:
+            value = stack.pop()
+            if isinstance(value, list):
+                stack.extend(value)
+                continue
+            if not isinstance(value, nodes.Node) or id(value) in seen:
+                continue
+            seen.add(id(value))
+            if value.type == "bind":
+                return True
+            if value.type in ("block", "lambda"):
+                continue
+            for name, child in value.items():
+                if name not in Hoister.NON_CHILD_ATTRS:
+                    stack.append(child)
+        return False
+
+    #
+    # Returns the names of the variables bound within a loop body
+    #
+    @staticmethod
+    def _bound_names(owner: nodes.Node) -> set:
+        bound = set()
+        body = []
+        Hoister._collect(owner, body, set())
+        for node in body:
+            if node.type == "bind":
+                bound.add(str(node.lhs.value))
+            elif node.type == "lambda":
+                bound.update(str(arg.value) for arg in node.arguments)
+        return bound
@@ -45,6 +45,20 @@ class JException(RuntimeError):
         self.type = None
         self.remaining = None
 
+    #
+    # Pickles the exception with its message and fields, rather than by
+    # calling __init__ with its message (e.g. for Jsonata.evaluate_parallel)
+    #
+    def __reduce__(self):
+        return JException.restore, (type(self), self.args, self.__dict__)
+
+    @staticmethod
+    def restore(cls, args, state) -> 'JException':
+        err = cls.__new__(cls)
+        err.args = args
+        err.__dict__.update(state)
+        return err
+
     #
     # Returns the error code, i.e. S0201
     # @return
@@ -177,6 +191,11 @@ class JException(RuntimeError):
         "D1009": "Multiple key definitions evaluate to same key: {{value}}",
         "D1011": "Stack overflow. Check for non-terminating recursive function.  Consider rewriting as tail-recursive",
         "D1012": "Evaluation timeout after {{value}} milliseconds. Check for infinite loop",
+        "D1013": "Data nested deeper than {{value}} levels",
+        "D1014": "Evaluation budget of {{value}} exceeded. Check for infinite loop or excessive data",
+        "D1015": "Evaluation cancelled",
+        "D1016": "Arrays and objects that are constant in the expression cannot be modified. Copy them first",
+        "T1011": "A registered function returned an awaitable, which only evaluate_async can await outside of the event loop",
         "T1010": "The matcher Object argument passed to Object {{token}} does not return the correct object structure",
         "T2001": "The left side of the {{token}} operator must evaluate to a number",
         "T2002": "The right side of the {{token}} operator must evaluate to a number",
@@ -235,3 +254,24 @@ class JException(RuntimeError):
         "D3140": "Malformed URL passed to ${{{function_name}}}(): {{value}}",
         "D3141": "{{{message}}}"
     }
+
+
+#
+# Raised when an evaluation is stopped by its cancellation token
+# (see timebox.CancellationToken)
+#
+class EvaluationCancelled(JException):
+
+    def __init__(self, location=0):
+        super().__init__("D1015", location)
+
+
+#
+# Raised when a constant array or object of an expression, which its
+# evaluations share, is modified (see utils.Utils.FrozenList). It is also a
+# TypeError, like the errors of the other read-only containers.
+#
+class ConstantModified(JException, TypeError):
+
+    def __init__(self, location=-1):
+        super().__init__("D1016", location)
@@ -24,15 +24,24 @@
 #   This project is licensed under the MIT License, see LICENSE
 #
 
+import asyncio
+import concurrent.futures
+import contextvars
 import copy
+import functools
 import inspect
+import itertools
 import math
+import os
+import pickle
 import sys
 import threading
+import warnings
 from dataclasses import dataclass
-from typing import Any, Callable, Mapping, MutableSequence, Optional, Sequence, Type, MutableMapping, Union
+from typing import Any, Callable, Iterable, Iterator, Mapping, MutableSequence, Optional, Sequence, Type, MutableMapping, Union
 
-from jsonata import functions, jexception, parser, signature as sig, timebox, utils
+from jsonata import compiler, concurrency, folder, functions, hoister, jexception, nodes, parser, resolver, signature as sig, timebox, utils
+from jsonata.expression_cache import ExpressionCache
 from jsonata.regex_engine import RegexEngine, default_regex_engine
 
 
@@ -45,35 +54,78 @@ class Jsonata:
         bindings: MutableMapping[str, Any]
         parent: 'Jsonata.Optional[Frame]'
         is_parallel_call: bool
+        scope: 'Jsonata.Frame'
+        hooked: bool
+        listeners: 'Optional[list[Jsonata.EvaluateListener]]'
+        bounds: Optional[timebox.Timebox]
 
-        def __init__(self, parent):
+        HOOKS = frozenset(("__evaluate_entry", "__evaluate_exit"))
+
+        def __init__(self, parent, lexical: bool = False):
             self.bindings = {}
             self.parent = parent
             self.is_parallel_call = False
+            # Whether this frame or one of its ancestors has an entry/exit
+            # callback or an evaluate listener. Inherited when the frame is
+            # created, so that the evaluator only looks for hooks if there
+            # are any (hooks registered on a frame do not reach the frames
+            # already created below it).
+            self.hooked = parent.hooked if parent is not None else False
+            self.listeners = None
+            # Runtime bounds checked by the evaluator (see set_runtime_bounds),
+            # inherited the same way
+            self.bounds = parent.bounds if parent is not None else None
+            # Nearest frame of the chain (this one included) that may hold
+            # bindings made outside of the expression. Frames created by the
+            # evaluator for blocks, lambdas and tuples are lexical: the
+            # resolver can see every name bound in them.
+            self.scope = parent.scope if lexical and parent is not None else self
 
         def bind(self, name: str, val: Optional[Any]) -> None:
             self.bindings[name] = val
+            if name in Jsonata.Frame.HOOKS:
+                self.hooked = True
             if getattr(val, "signature", None) is not None:
                 val.signature.set_function_name(name)
 
         def lookup(self, name: str) -> Optional[Any]:
-            # Important: if we have a null value,
-            # return it
-            val = self.bindings.get(name, utils.Utils.NONE)
-            if val is not utils.Utils.NONE:
-                return val
-            if self.parent is not None:
-                return self.parent.lookup(name)
+            frame = self
+            while frame is not None:
+                # Important: if we have a null value,
+                # return it
+                val = frame.bindings.get(name, utils.Utils.NONE)
+                if val is not utils.Utils.NONE:
+                    return val
+                frame = frame.parent
             return None
 
+        #
+        # Looks up a builtin function that the expression does not bind
+        # itself (see resolver.Resolver): only the frames holding external
+        # bindings can shadow it
+        #
+        # @param name Name of the builtin
+        # @param builtin The builtin function
+        #
+        def lookup_builtin(self, name: str, builtin: Any) -> Optional[Any]:
+            frame = self.scope
+            while frame.parent is not None:
+                val = frame.bindings.get(name, utils.Utils.NONE)
+                if val is not utils.Utils.NONE:
+                    return val
+                frame = frame.parent.scope
+            return frame.bindings.get(name, builtin)
+
         #
         # Sets the runtime bounds for this environment
         # 
         # @param timeout Timeout in millis
         # @param maxRecursionDepth Max recursion depth
+        # @param budget Max evaluator steps plus sequence items
         #         
-        def set_runtime_bounds(self, timeout: Optional[int], max_recursion_depth: Optional[int]) -> None:
-            timebox.Timebox(self, timeout, max_recursion_depth)
+        def set_runtime_bounds(self, timeout: Optional[int], max_recursion_depth: Optional[int],
+                               budget: Optional[int] = None) -> None:
+            timebox.Timebox(self, timeout, max_recursion_depth, budget=budget)
 
         def set_evaluate_entry_callback(self, cb: Callable) -> None:
             self.bind("__evaluate_entry", cb)
@@ -81,8 +133,62 @@ class Jsonata:
         def set_evaluate_exit_callback(self, cb: Callable) -> None:
             self.bind("__evaluate_exit", cb)
 
+        def add_evaluate_listener(self, listener: 'Jsonata.EvaluateListener') -> None:
+            if self.listeners is None:
+                self.listeners = []
+            self.listeners.append(listener)
+            self.hooked = True
+
+        def remove_evaluate_listener(self, listener: 'Jsonata.EvaluateListener') -> None:
+            if self.listeners is not None and listener in self.listeners:
+                self.listeners.remove(listener)
+
+        #
+        # Runs the entry callback and the listeners of this frame and its
+        # ancestors before an expression is evaluated; only called for
+        # hooked frames
+        #
+        def evaluate_entry(self, expr: Any, input: Optional[Any]) -> None:
+            entry_callback = self.lookup("__evaluate_entry")
+            if entry_callback is not None:
+                entry_callback(expr, input, self)
+            frame = self
+            while frame is not None:
+                if frame.listeners:
+                    for listener in tuple(frame.listeners):
+                        listener.evaluate_entry(expr, input, self)
+                frame = frame.parent
+
+        #
+        # Runs the exit callback and the listeners of this frame and its
+        # ancestors after an expression is evaluated; only called for
+        # hooked frames
+        #
+        def evaluate_exit(self, expr: Any, input: Optional[Any], result: Optional[Any]) -> None:
+            exit_callback = self.lookup("__evaluate_exit")
+            if exit_callback is not None:
+                exit_callback(expr, input, self, result)
+            frame = self
+            while frame is not None:
+                if frame.listeners:
+                    for listener in tuple(frame.listeners):
+                        listener.evaluate_exit(expr, input, self, result)
+                frame = frame.parent
+
     static_frame = None  # = createFrame(null);
 
+    #
+    # Instrumentation interface, notified before and after every
+    # subexpression is evaluated (see Jsonata.add_evaluate_listener)
+    #
+    class EvaluateListener:
+        def evaluate_entry(self, expr: Any, input: Optional[Any], environment: 'Jsonata.Frame') -> None:
+            pass
+
+        def evaluate_exit(self, expr: Any, input: Optional[Any], environment: 'Jsonata.Frame',
+                          result: Optional[Any]) -> None:
+            pass
+
     #
     # JFunction callable Lambda interface
     #
@@ -102,9 +208,14 @@ class Jsonata:
 
         def call(self, input: Optional[Any], args: Optional[Sequence]) -> Optional[Any]:
             if isinstance(args, list):
-                return self.function(*args)
+                # the function may modify its arguments
+                result = self.function(*[utils.Utils.unfreeze(arg) for arg in args])
             else:
-                return self.function()
+                result = self.function()
+            if inspect.isawaitable(result):
+                # e.g. a coroutine function (see evaluate_async)
+                result = Jsonata.await_result(result)
+            return result
 
         def validate(self, args: Optional[Any], context: Optional[Any]) -> Optional[Any]:
             return args
@@ -128,6 +239,10 @@ class Jsonata:
             self.function_name = None
 
         def call(self, input: Optional[Any], args: Optional[Sequence]) -> Optional[Any]:
+            # the function may modify its arguments (unlike the builtins, see
+            # JNativeFunction)
+            if isinstance(args, list):
+                args = [utils.Utils.unfreeze(arg) for arg in args]
             return self.function.call(input, args)
 
         def validate(self, args: Optional[Any], context: Optional[Any]) -> Optional[Any]:
@@ -230,22 +345,27 @@ class Jsonata:
     #     
     def eval(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
         # Thread safety:
-        # Make sure each evaluate is executed on an instance per thread
-        _this = self.get_per_thread_instance()
-        # Save and restore the evaluation context so that nested
+        # self is the evaluation context of one evaluation (see
+        # create_context), which no other evaluation uses.
+        # Save and restore the current input and environment so that nested
         # evaluations (e.g. $eval()) see the correct context: without this,
         # evaluating a sibling argument (e.g. $eval's own second argument)
-        # would leave _this.environment pointing at whatever inner scope it
+        # would leave self.environment pointing at whatever inner scope it
         # last touched, rather than the environment in effect at this call.
-        _input = _this.input
-        _environment = _this.environment
+        _input = self.input
+        _environment = self.environment
         try:
-            return _this._eval(expr, input, environment)
+            return self._eval(expr, input, environment)
         finally:
-            _this.input = _input
-            _this.environment = _environment
+            self.input = _input
+            self.environment = _environment
 
     def _eval(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
+        # Nodes of a compiled expression carry their own evaluator
+        compiled = getattr(expr, "compiled", None)
+        if compiled is not None:
+            return compiled(self, input, environment)
+
         result = None
 
         # Store the current input and environment
@@ -256,9 +376,12 @@ class Jsonata:
         if self.parser.dbg:
             print("eval expr=" + str(expr) + " type=" + expr.type)  # +" input="+input);
 
-        entry_callback = environment.lookup("__evaluate_entry")
-        if entry_callback is not None:
-            entry_callback(expr, input, environment)
+        bounds = self.bounds
+        if bounds is not None:
+            bounds.enter(environment)
+
+        if environment.hooked:
+            environment.evaluate_entry(expr, input)
 
         if getattr(expr, "type", None) is not None:
             if expr.type == "path":
@@ -299,6 +422,10 @@ class Jsonata:
                 result = self.evaluate_apply_expression(expr, input, environment)
             elif expr.type == "transform":
                 result = self.evaluate_transform_expression(expr, input, environment)
+            elif expr.type == "hoisted":
+                result = self.evaluate_hoisted(expr, input, environment)
+            elif expr.type == "folded":
+                result = self.evaluate_folded(expr, input, environment)
 
         if getattr(expr, "predicate", None) is not None:
             for item in expr.predicate:
@@ -307,9 +434,11 @@ class Jsonata:
         if getattr(expr, "type", None) is not None and expr.type != "path" and getattr(expr, "group", None) is not None:
             result = self.evaluate_group_expression(expr.group, result, environment)
 
-        exit_callback = environment.lookup("__evaluate_exit")
-        if exit_callback is not None:
-            exit_callback(expr, input, environment, result)
+        if environment.hooked:
+            environment.evaluate_exit(expr, input, result)
+
+        if bounds is not None:
+            bounds.exit(environment, result)
 
         # mangle result (list of 1 element -> 1 element, empty list -> null)
         if result is not None and utils.Utils.is_sequence(result) and not result.tuple_stream:
@@ -391,6 +520,207 @@ class Jsonata:
 
         return result_sequence
 
+    #
+    # Lazy evaluation of paths
+    #
+    # A path that only has plain steps (no tuple stream, focus or index
+    # variable, sort, group or [] operator) can produce the items of its
+    # result one at a time: each step pulls the items of the previous one as
+    # they are needed. Positional predicates ((a.b)[0]), $exists, $single
+    # and $filter(...)[n] stop evaluating such a path once their result is
+    # known, instead of materializing the whole fan-out.
+    #
+    @staticmethod
+    def is_streamable_path(expr: Optional[parser.Parser.Symbol]) -> bool:
+        if (expr.type != "path" or expr.keep_singleton_array or expr.group is not None or
+                expr.tuple is not None):
+            return False
+        for ii, step in enumerate(expr.steps):
+            if (step.tuple is not None or step.focus is not None or step.index is not None or
+                    step.type == "sort" or (ii == 0 and step.consarray)):
+                return False
+        return True
+
+    #
+    # Returns the number of leading items of the value of expr that its
+    # first predicate selects from, if that predicate is a positional one
+    # ([n] with n >= 0), else None
+    #
+    @staticmethod
+    def positional_limit(expr: Optional[parser.Parser.Symbol]) -> Optional[int]:
+        if expr.predicate is None:
+            return None
+        predicate = expr.predicate[0].expr
+        if predicate.type != "number":
+            return None
+        index = int(predicate.value)  # as evaluate_filter
+        return index + 1 if index >= 0 else None
+
+    #
+    # Evaluate a streamable path lazily
+    # @param {Object} expr - JSONata expression
+    # @param {Object} input - Input data to evaluate against
+    # @param {Object} environment - Environment
+    # @returns (raw, items) - raw is the result of the path when its last step
+    #     yields a single array (see evaluate_step), None otherwise; items
+    #     lazily yields the items of the result sequence
+    #
+    def stream_path(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any],
+                    environment: Optional[Frame]) -> tuple[Optional[list], Iterator]:
+        if isinstance(input, list) and expr.steps[0].type != "variable":
+            items = input
+        else:
+            # if input is not an array, make it so
+            items = utils.Utils.create_sequence(input)
+
+        for step in expr.steps[:-1]:
+            items = Jsonata.flatten_results(self.step_results(step, items, environment))
+
+        results = self.step_results(expr.steps[-1], items, environment)
+        first = next(results, utils.Utils.NONE)
+        if first is utils.Utils.NONE:
+            return None, iter(())
+        pending = [first]
+        if isinstance(first, list) and not utils.Utils.is_sequence(first):
+            second = next(results, utils.Utils.NONE)
+            if second is utils.Utils.NONE:
+                return first, iter(())
+            pending.append(second)
+        return None, Jsonata.flatten_results(itertools.chain(pending, results))
+
+    #
+    # Lazily yields the (defined) results of a step for each input item, as evaluate_step
+    #
+    def step_results(self, step: parser.Parser.Symbol, inputs: Any, environment: Optional[Frame]) -> Iterator:
+        for inp in inputs:
+            res = self.eval(step, inp, environment)
+            if step.stages is not None:
+                for stage in step.stages:
+                    res = self.evaluate_filter(stage.expr, res, environment)
+            if res is not None:
+                yield res
+
+    @staticmethod
+    def flatten_results(results: Iterator) -> Iterator:
+        for res in results:
+            if not (isinstance(res, list)) or (isinstance(res, utils.Utils.JList) and res.cons):
+                # it's not an array - just push into the result sequence
+                yield res
+            else:
+                # res is a sequence - flatten it into the parent sequence
+                yield from res
+
+    #
+    # Evaluate a streamable path (without predicates) as eval() does, except
+    # that the result sequence holds at most its first `limit` items
+    #
+    def eval_path_prefix(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any],
+                         environment: Optional[Frame], limit: int) -> Optional[Any]:
+        _input = self.input
+        _environment = self.environment
+        try:
+            self.input = input
+            self.environment = environment
+            bounds = self.bounds
+            if bounds is not None:
+                bounds.enter(environment)
+            if environment.hooked:
+                environment.evaluate_entry(expr, input)
+            raw, items = self.stream_path(expr, input, environment)
+            result = raw if raw is not None else utils.Utils.create_sequence_from_iter(itertools.islice(items, limit))
+            if environment.hooked:
+                environment.evaluate_exit(expr, input, result)
+            if bounds is not None:
+                bounds.exit(environment, result)
+
+            # mangle result (list of 1 element -> 1 element, empty list -> null)
+            if utils.Utils.is_sequence(result):
+                if expr.keep_array:
+                    result.keep_singleton = True
+                if not result:
+                    result = None
+                elif len(result) == 1:
+                    result = result if result.keep_singleton else result[0]
+            return result
+        finally:
+            self.input = _input
+            self.environment = _environment
+
+    #
+    # Lazily yields the items of the array that a streamable path (without
+    # predicates) evaluates to, as seen by a function taking an array: a
+    # single item that is an array stands for that array
+    #
+    def stream_values(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any],
+                      environment: Optional[Frame]) -> Iterator:
+        raw, items = self.stream_path(expr, input, environment)
+        if raw is not None:
+            yield from raw
+            return
+        head = list(itertools.islice(items, 2))
+        if len(head) == 1 and isinstance(head[0], list) and not expr.keep_array:
+            yield from head[0]
+            return
+        yield from head
+        yield from items
+
+    #
+    # Evaluate a call of $exists, $single or $filter(...)[n] on a streamable
+    # path, stopping the evaluation of the path as soon as the result is known
+    # @param {Object} expr - JSONata expression
+    # @param {Object} proc - the evaluated procedure
+    # @param {Object} input - Input data to evaluate against
+    # @param {Object} environment - Environment
+    # @returns {*} Result, or Utils.NONE if the call is not streamed
+    #
+    def evaluate_streamed_call(self, expr: Optional[parser.Parser.Symbol], proc: Optional[Any], input: Optional[Any],
+                               environment: Optional[Frame]) -> Optional[Any]:
+        args = expr.arguments
+        if not args or args[0].predicate is not None or not Jsonata.is_streamable_path(args[0]):
+            return utils.Utils.NONE
+        builtins = Jsonata.static_frame.bindings
+        if len(args) == 1 and proc is builtins.get("exists"):
+            # only whether there is an item matters
+            limit = 1
+        elif len(args) == 1 and proc is builtins.get("single"):
+            # a second item is an error
+            limit = 2
+        elif len(args) == 2 and proc is builtins.get("filter") and Jsonata.positional_limit(expr) is not None:
+            return self.evaluate_streamed_filter(expr, proc, input, environment)
+        else:
+            return utils.Utils.NONE
+        arg = self.eval_path_prefix(args[0], input, environment, limit)
+        return self.apply_function(expr, proc, [arg], input, environment)
+
+    def evaluate_streamed_filter(self, expr: Optional[parser.Parser.Symbol], proc: Optional[Any], input: Optional[Any],
+                                 environment: Optional[Frame]) -> Optional[Any]:
+        func = self.eval(expr.arguments[1], input, environment)
+        if (not (utils.Utils.is_function(func) or functions.Functions.is_lambda(func)) or
+                functions.Functions.get_function_arity(func) >= 3):
+            # the predicate needs the whole array (or is not a function at all)
+            arr = self.eval(expr.arguments[0], input, environment)
+            return self.apply_function(expr, proc, [arr, func], input, environment)
+
+        # the predicate [n] of the call only looks at the first n + 1 matches
+        limit = Jsonata.positional_limit(expr)
+        matches = []
+        try:
+            for i, item in enumerate(self.stream_values(expr.arguments[0], input, environment)):
+                res = functions.Functions.func_apply(func, functions.Functions.hof_func_args(func, item, i, None))
+                if functions.Functions.to_boolean(res):
+                    matches.append(item)
+                    if len(matches) >= limit:
+                        break
+        except jexception.JException as jex:
+            if jex.location < 0:
+                # add the position field to the error
+                jex.location = expr.position
+            if jex.current is None:
+                # and the Object identifier
+                jex.current = expr.token
+            raise jex
+        return utils.Utils.create_sequence_from_iter(matches)
+
     def create_frame_from_tuple(self, environment: Optional[Frame], tuple: Optional[Mapping[str, Any]]) -> Frame:
         frame = self.create_frame(environment)
         if tuple is not None:
@@ -417,13 +747,19 @@ class Jsonata:
 
         result = utils.Utils.create_sequence()
 
-        for inp in input:
-            res = self.eval(expr, inp, environment)
-            if expr.stages is not None:
-                for stage in expr.stages:
-                    res = self.evaluate_filter(stage.expr, res, environment)
-            if res is not None:
-                result.append(res)
+        # values of the loop-invariant subexpressions of the step
+        hoisted_scope = self.hoisted_scope
+        self.hoisted_scope = (expr, {})
+        try:
+            for inp in input:
+                res = self.eval(expr, inp, environment)
+                if expr.stages is not None:
+                    for stage in expr.stages:
+                        res = self.evaluate_filter(stage.expr, res, environment)
+                if res is not None:
+                    result.append(res)
+        finally:
+            self.hoisted_scope = hoisted_scope
 
         result_sequence = utils.Utils.create_sequence()
         if last_step and len(result) == 1 and (isinstance(result[0], list)) and not utils.Utils.is_sequence(
@@ -478,12 +814,19 @@ class Jsonata:
                 result = self.evaluate_stages(expr.stages, result, environment)
             return result
 
-        result = utils.Utils.create_sequence()
-        result.tuple_stream = True
-        step_env = environment
         if tuple_bindings is None:
             tuple_bindings = [{"@": item} for item in input]
 
+        join = Jsonata.equi_join(expr)
+        if join is not None:
+            result = self.evaluate_hash_join(expr, join[0], join[1], tuple_bindings, environment)
+            if len(expr.stages) > 1:
+                result = self.evaluate_stages(expr.stages[1:], result, environment)
+            return result
+
+        result = utils.Utils.create_sequence()
+        result.tuple_stream = True
+        step_env = environment
         for tuple_binding in tuple_bindings:
             step_env = self.create_frame_from_tuple(environment, tuple_binding)
             res = self.eval(expr, tuple_binding["@"], step_env)
@@ -513,6 +856,118 @@ class Jsonata:
 
         return result
 
+    #
+    # Returns the (build, probe) keys of a step whose first stage is an
+    # equality between its focus variable and the earlier tuple bindings or
+    # the context, as in library.loans@$l.books@$b[$l.isbn=$b.isbn], or None
+    #
+    @staticmethod
+    def equi_join(expr: parser.Parser.Symbol) -> Optional[tuple[nodes.Node, nodes.Node]]:
+        if expr.focus is None or not expr.stages or expr.type != "name" or expr.predicate is not None or \
+                expr.group is not None:
+            return None
+        stage = expr.stages[0]
+        if stage.type != "filter" or stage.expr.type != "binary" or stage.expr.value != "=" or \
+                stage.expr.predicate is not None or stage.expr.group is not None:
+            return None
+        lhs, rhs = stage.expr.lhs, stage.expr.rhs
+        focus = str(expr.focus)
+        if Jsonata.join_key_source(lhs) != focus:
+            lhs, rhs = rhs, lhs
+        if Jsonata.join_key_source(lhs) != focus:
+            return None
+        source = Jsonata.join_key_source(rhs)
+        if source is None or source == focus or source == expr.index:
+            return None
+        return lhs, rhs
+
+    #
+    # Returns the variable that a join key reads ("" for the context) when it
+    # is a variable or field name followed by field names, e.g. $b.isbn, or None
+    #
+    @staticmethod
+    def join_key_source(expr: nodes.Node) -> Optional[str]:
+        if expr.type == "path":
+            if expr.group is not None or expr.predicate is not None:
+                return None
+            steps = expr.steps
+        else:
+            steps = [expr]
+        for i, step in enumerate(steps):
+            if (step.predicate is not None or step.group is not None or step.stages is not None or
+                    step.focus is not None or step.index is not None or step.tuple or step.ancestor is not None):
+                return None
+            if step.type != "name" and (i > 0 or step.type != "variable" or step.value == ""):
+                return None
+        return str(steps[0].value) if steps[0].type == "variable" else ""
+
+    #
+    # Evaluate a step whose first stage is an equality join (see equi_join):
+    # the items of the step are indexed by their build key, once for each
+    # context, and each input tuple is only combined with the items whose
+    # key equals its probe key, in the order of the nested loops
+    # @param {Object} expr - JSONata expression
+    # @param {Object} build - key computed from the focus variable
+    # @param {Object} probe - key computed from the input tuples
+    # @param {Object} tuple_bindings - The tuple stream
+    # @param {Object} environment - Environment
+    # @returns {*} Joined tuple stream
+    #
+    def evaluate_hash_join(self, expr: parser.Parser.Symbol, build: nodes.Node, probe: nodes.Node,
+                           tuple_bindings: Sequence[Mapping[str, Any]],
+                           environment: Optional[Frame]) -> Any:
+        result = utils.Utils.create_sequence()
+        result.tuple_stream = True
+        focus = str(expr.focus)
+        # id(context) -> (context, items, build keys, index of the keys or None)
+        indexes = {}
+        for tuple_binding in tuple_bindings:
+            context = tuple_binding["@"]
+            step_env = self.create_frame_from_tuple(environment, tuple_binding)
+            entry = indexes.get(id(context))
+            if entry is None:
+                res = self.eval(expr, context, step_env)
+                if res is None:
+                    res = []
+                elif not (isinstance(res, list)):
+                    res = [res]
+                key_env = self.create_frame(environment)
+                keys = []
+                for item in res:
+                    key_env.bind(focus, item)
+                    keys.append(self.eval(build, None, key_env))
+                index = {}
+                try:
+                    for bb, key in enumerate(keys):
+                        if key is not None:
+                            index.setdefault(utils.Utils.deep_equal_key(key), []).append(bb)
+                except TypeError:
+                    index = None
+                entry = (context, res, keys, index)
+                indexes[id(context)] = entry
+            _, res, keys, index = entry
+
+            value = self.eval(probe, context, step_env)
+            if value is None:
+                continue
+            matches = None
+            if index is not None:
+                try:
+                    matches = index.get(utils.Utils.deep_equal_key(value), ())
+                except TypeError:
+                    pass
+            if matches is None:
+                matches = [bb for bb, key in enumerate(keys) if self.evaluate_equality_expression(value, key, "=")]
+            for bb in matches:
+                tuple = dict(tuple_binding)
+                tuple[focus] = res[bb]
+                if expr.index is not None:
+                    tuple[expr.index] = bb
+                if expr.ancestor is not None:
+                    tuple[expr.ancestor.label] = context
+                result.append(tuple)
+        return result
+
     #
     # Apply filter predicate to input data
     # @param {Object} predicate - filter expression
@@ -531,6 +986,9 @@ class Jsonata:
         elif not (isinstance(input, list)):
             input = utils.Utils.create_sequence(input)
         if predicate.type == "number":
+            if self.validate_lazily:
+                # the index selects from the whole sequence
+                functions.Functions.validate_input(input)
             index = int(predicate.value)  # round it down - was Math.floor
             if index < 0:
                 # count in from end of array
@@ -545,26 +1003,37 @@ class Jsonata:
                 else:
                     results.append(item)
         else:
-            for index, item in enumerate(input):
-                context = item
-                env = environment
-                if isinstance(input, utils.Utils.JList) and input.tuple_stream:
-                    context = item["@"]
-                    env = self.create_frame_from_tuple(environment, item)
-                res = self.eval(predicate, context, env)
-                if utils.Utils.is_numeric(res):
-                    res = utils.Utils.create_sequence(res)
-                if utils.Utils.is_array_of_numbers(res):
-                    for ires in res:
-                        # round it down
-                        ii = int(ires)  # Math.floor(ires);
-                        if ii < 0:
-                            # count in from end of array
-                            ii = len(input) + ii
-                        if ii == index:
-                            results.append(item)
-                elif Jsonata.boolize(res):
-                    results.append(item)
+            # membership indexes of the loop-invariant `in` operands and values
+            # of the loop-invariant subexpressions of the predicate, shared by
+            # its iterations
+            includes_indexes = self.includes_indexes
+            hoisted_scope = self.hoisted_scope
+            self.includes_indexes = {}
+            self.hoisted_scope = (predicate, {})
+            try:
+                for index, item in enumerate(input):
+                    context = item
+                    env = environment
+                    if isinstance(input, utils.Utils.JList) and input.tuple_stream:
+                        context = item["@"]
+                        env = self.create_frame_from_tuple(environment, item)
+                    res = self.eval(predicate, context, env)
+                    if utils.Utils.is_numeric(res):
+                        res = utils.Utils.create_sequence(res)
+                    if utils.Utils.is_array_of_numbers(res):
+                        for ires in res:
+                            # round it down
+                            ii = int(ires)  # Math.floor(ires);
+                            if ii < 0:
+                                # count in from end of array
+                                ii = len(input) + ii
+                            if ii == index:
+                                results.append(item)
+                    elif Jsonata.boolize(res):
+                        results.append(item)
+            finally:
+                self.includes_indexes = includes_indexes
+                self.hoisted_scope = hoisted_scope
         return results
 
     #
@@ -593,6 +1062,9 @@ class Jsonata:
                 # err.token = op
                 raise err
 
+        if op == "in" and self.includes_indexes is not None:
+            return self.evaluate_indexed_includes(expr, lhs, lambda: self.eval(expr.rhs, input, environment))
+
         rhs = self.eval(expr.rhs, input, environment)  # evalrhs();
         try:
             if op == "+" or op == "-" or op == "*" or op == "/" or op == "%":
@@ -639,15 +1111,24 @@ class Jsonata:
         elif value == "[":
             # array constructor - evaluate each item
             result = utils.Utils.JList()  # [];
+            values = None
+            if self.executor is not None:
+                # independent entries, evaluated concurrently
+                values = self.eval_branches(lambda context, item: context.eval(item, input, environment),
+                                            expr.expressions,
+                                            hoister.Hoister.branch_mask(expr, expr.expressions))
             idx = 0
             for item in expr.expressions:
-                environment.is_parallel_call = idx > 0
-                value = self.eval(item, input, environment)
+                if values is None:
+                    environment.is_parallel_call = idx > 0
+                    value = self.eval(item, input, environment)
+                else:
+                    value = values[idx]
                 if value is not None:
                     if str(item.value) == "[":
                         result.append(value)
                     else:
-                        result = functions.Functions.append(result, value)
+                        utils.Utils.append_to_sequence(result, value)
                 idx += 1
             if expr.consarray:
                 if not (isinstance(result, utils.Utils.JList)):
@@ -670,7 +1151,7 @@ class Jsonata:
     def evaluate_name(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any],
                       environment: Optional[Frame]) -> Optional[Any]:
         # lookup the "name" item in the input
-        return functions.Functions.lookup(input, str(expr.value))
+        return functions.Functions.lookup(input, str(expr.value), self.validate_lazily)
 
     #
     # Evaluate literal against input data
@@ -694,7 +1175,7 @@ class Jsonata:
             for value in input.values():
                 if isinstance(value, list):
                     value = self.flatten(value, None)
-                    results = functions.Functions.append(results, value)
+                    utils.Utils.append_to_sequence(results, value)
                 else:
                     results.append(value)
         elif isinstance(input, list):
@@ -702,9 +1183,13 @@ class Jsonata:
             for value in input:
                 if isinstance(value, list):
                     value = self.flatten(value, None)
-                    results = functions.Functions.append(results, value)
+                    utils.Utils.append_to_sequence(results, value)
                 else:
                     results.append(value)
+        if self.validate_lazily:
+            if isinstance(input, dict):
+                functions.Functions.validate_keys(input)
+            functions.Functions.validate_value(results)
 
         # result = normalizeSequence(results)
         return results
@@ -737,6 +1222,11 @@ class Jsonata:
         if input is not None:
             # traverse all descendants of this object/array
             self.recurse_descendants(input, result_sequence)
+            if self.validate_lazily:
+                functions.Functions.validate_value(result_sequence)
+                for value in result_sequence:
+                    if isinstance(value, dict):
+                        functions.Functions.validate_keys(value)
             if len(result_sequence) == 1:
                 result = result_sequence[0]
             else:
@@ -750,14 +1240,24 @@ class Jsonata:
     #    
     def recurse_descendants(self, input: Optional[Any], results: MutableSequence) -> None:
         # this is the equivalent of //* in XPath
-        if not (isinstance(input, list)):
-            results.append(input)
-        if isinstance(input, list):
-            for member in input:
-                self.recurse_descendants(member, results)
-        elif input is not None and isinstance(input, dict):
-            for value in input.values():
-                self.recurse_descendants(value, results)
+        # depth first, with a stack of iterators over the members of the
+        # arrays and values of the objects being visited
+        stack = [iter((input,))]
+        while stack:
+            for value in stack[-1]:
+                if isinstance(value, list):
+                    members = iter(value)
+                else:
+                    results.append(value)
+                    if not isinstance(value, dict):
+                        continue
+                    members = iter(value.values())
+                if len(stack) > utils.Utils.MAX_DATA_DEPTH:
+                    raise jexception.JException("D1013", -1, utils.Utils.MAX_DATA_DEPTH)
+                stack.append(members)
+                break
+            else:
+                stack.pop()
 
     #
     # Evaluate numeric expression against input data
@@ -887,12 +1387,150 @@ class Jsonata:
             rhs = [rhs]
 
         for item in rhs:
-            if item == lhs:
+            if utils.Utils.is_deep_equal(item, lhs):
                 result = True
                 break
 
         return result
 
+    # smallest rhs array worth indexing
+    INCLUDES_INDEX_MIN = 8
+
+    # includes_indexes (or hoisted_scope) entry of an operand (or expression)
+    # that is not loop-invariant after all
+    VARYING = object()
+
+    #
+    # Evaluate the `in` operator within a filter predicate (see evaluate_filter),
+    # looking up lhs in a hashed index of the rhs array when the rhs is
+    # loop-invariant: a variable or an array of literals. The index is built
+    # on the first iteration and reused by the following ones.
+    # @param {Object} expr - AST of the operator
+    # @param {Object} lhs - LHS value
+    # @param {functions.Function} evalrhs - Object to evaluate RHS value
+    # @returns {*} Result
+    #
+    def evaluate_indexed_includes(self, expr: Optional[parser.Parser.Symbol], lhs: Optional[Any],
+                                  evalrhs: Callable[[], Optional[Any]]) -> Any:
+        indexes = self.includes_indexes
+        entry = indexes.get(id(expr))
+        if entry is not None and entry is not Jsonata.VARYING and entry[0] is None:
+            # array of literals, nothing to evaluate
+            return Jsonata.index_includes(lhs, entry[1])
+
+        rhs = evalrhs()
+        if entry is None:
+            constant = Jsonata.is_literal_array(expr.rhs)
+            if (constant or Jsonata.is_invariant_variable(expr.rhs) or expr.rhs.type in ("hoisted", "folded")) \
+                    and isinstance(rhs, list) \
+                    and len(rhs) >= Jsonata.INCLUDES_INDEX_MIN:
+                index = Jsonata.includes_index(rhs)
+                if index is not None:
+                    indexes[id(expr)] = (None if constant else rhs, index)
+                    return Jsonata.index_includes(lhs, index)
+            indexes[id(expr)] = Jsonata.VARYING
+        elif entry is not Jsonata.VARYING:
+            if entry[0] is rhs:
+                return Jsonata.index_includes(lhs, entry[1])
+            # e.g. a variable bound by each tuple of the stream
+            indexes[id(expr)] = Jsonata.VARYING
+        return self.evaluate_includes_expression(lhs, rhs)
+
+    #
+    # Evaluate a loop-invariant subexpression (see hoister.Hoister), once per
+    # evaluation of the predicate or step that owns it
+    # @param {Object} expr - JSONata expression
+    # @param {Object} input - Input data to evaluate against
+    # @param {Object} environment - Environment
+    # @returns {*} Evaluated input data
+    #
+    def evaluate_hoisted(self, expr: nodes.HoistedNode, input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
+        scope = self.hoisted_scope
+        if scope is None or scope[0] is not expr.owner:
+            # e.g. in a lambda called outside of the predicate defining it
+            return self.eval(expr.expression, input, environment)
+        values = scope[1]
+        value = values.get(id(expr), utils.Utils.NONE)
+        if value is utils.Utils.NONE:
+            if all(environment.lookup_builtin(name, builtin) is builtin for name, builtin in expr.builtins):
+                value = self.eval(expr.expression, input, environment)
+            else:
+                # a builtin shadowed by a registered function, which may not be pure
+                value = Jsonata.VARYING
+            values[id(expr)] = value
+        if value is Jsonata.VARYING:
+            return self.eval(expr.expression, input, environment)
+        return value
+
+    #
+    # Evaluate a constant subexpression folded at parse time (see
+    # folder.Folder)
+    # @param {Object} expr - JSONata expression
+    # @param {Object} input - Input data to evaluate against
+    # @param {Object} environment - Environment
+    # @returns {*} Evaluated input data
+    #
+    def evaluate_folded(self, expr: nodes.FoldedNode, input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
+        for name, builtin in expr.builtins:
+            if environment.lookup_builtin(name, builtin) is not builtin:
+                # a builtin shadowed by a registered function
+                return self.eval(expr.expression, input, environment)
+        bounds = self.bounds
+        if bounds is not None:
+            # as if it was evaluated now
+            bounds.charge(expr.cost)
+        return expr.value
+
+    #
+    # Evaluate a constant subexpression at parse time (see folder.Folder)
+    # @param {Object} expr - JSONata expression
+    # @param {Object} bounds - running bounds of the evaluation
+    # @returns {*} Evaluated expression
+    #
+    def evaluate_constant(self, expr: nodes.Node, bounds: timebox.Timebox) -> Optional[Any]:
+        context = self.create_context(self.create_frame(Jsonata.static_frame, False), bounds)
+        token = Jsonata.CONTEXT.set(context)
+        try:
+            return context.eval(expr, None, context.environment)
+        finally:
+            Jsonata.CONTEXT.reset(token)
+
+    @staticmethod
+    def is_literal_array(expr: Optional[parser.Parser.Symbol]) -> bool:
+        if expr.type == "value":
+            # folded at parse time (see folder.Folder)
+            return isinstance(expr.value, list) and expr.predicate is None and expr.group is None
+        return (expr.type == "unary" and expr.value == "[" and expr.predicate is None and expr.group is None and
+                all(item.type in ("string", "number", "value") and item.predicate is None
+                    for item in expr.expressions))
+
+    @staticmethod
+    def is_invariant_variable(expr: Optional[parser.Parser.Symbol]) -> bool:
+        # the context ($) changes on each iteration
+        return expr.type == "variable" and expr.value != "" and expr.predicate is None and expr.group is None
+
+    #
+    # Returns the set of deep_equal_keys of the items, or None if some item
+    # cannot be hashed
+    #
+    @staticmethod
+    def includes_index(rhs: Sequence) -> Optional[frozenset]:
+        try:
+            return frozenset(utils.Utils.deep_equal_key(item) for item in rhs)
+        except TypeError:
+            return None
+
+    @staticmethod
+    def index_includes(lhs: Optional[Any], index: frozenset) -> bool:
+        if lhs is None:
+            # if either side is undefined, the result is false
+            return False
+        try:
+            return utils.Utils.deep_equal_key(lhs) in index
+        except TypeError:
+            # not hashable, so equal to none of the (hashable) items
+            return False
+
     #
     # Evaluate boolean expression against input data
     # @param {Object} lhs - LHS value
@@ -939,6 +1577,31 @@ class Jsonata:
     class GroupEntry:
         data: Optional[Any]
         exprIndex: int
+        # whether data is a list of this entry's own, that items are added to
+        accumulated: bool = False
+
+        def append(self, item: Optional[Any]) -> None:
+            self.data, self.accumulated = Jsonata.accumulate(self.data, item, self.accumulated)
+
+    #
+    # Appends item to the data accumulated so far, with the same result as
+    # functions.Functions.append(data, item) but without copying data on
+    # every call: data is only copied into a list of its own the first time
+    # @param {Object} data - Accumulated data
+    # @param {Object} item - Item to append
+    # @param {Boolean} owned - whether data is a list that may be extended in place
+    # @returns (data, owned)
+    #
+    @staticmethod
+    def accumulate(data: Optional[Any], item: Optional[Any], owned: bool) -> tuple[Optional[Any], bool]:
+        # disregard undefined args
+        if item is None:
+            return data, owned
+        if data is None:
+            return item, False
+        if not owned:
+            data = utils.Utils.JList(data) if isinstance(data, list) else utils.Utils.JList([data])
+        return utils.Utils.append_to_sequence(data, item), True
 
     #
     # Evaluate group expression against input data
@@ -959,7 +1622,7 @@ class Jsonata:
 
         # if the array is empty, add an undefined entry to enable literal JSON object to be generated
         if not input:
-            input.append(None)
+            input = utils.Utils.create_sequence(None)
 
         for itemIndex, item in enumerate(input):
             env = self.create_frame_from_tuple(environment, item) if reduce else environment
@@ -979,13 +1642,14 @@ class Jsonata:
                             raise jexception.JException("D1009", expr.position, key)
 
                         # append it as an array
-                        groups[key].data = functions.Functions.append(groups[key].data, item)
+                        groups[key].append(item)
                     else:
                         groups[key] = entry
 
         # iterate over the groups to evaluate the "value" expression
         # let generators = /* await */ Promise.all(Object.keys(groups).map(/* async */ (key, idx) => {
         idx = 0
+        branches = [] if self.executor is not None else None
         for k, v in groups.items():
             entry = v
             context = entry.data
@@ -995,6 +1659,9 @@ class Jsonata:
                 context = tuple["@"]
                 tuple.pop("@", None)
                 env = self.create_frame_from_tuple(environment, tuple)
+            if branches is not None:
+                branches.append((k, expr.lhs_object[entry.exprIndex][1], context, env, entry.exprIndex))
+                continue
             env.is_parallel_call = idx > 0
             # return [key, /* await */ eval(expr.lhs[entry.exprIndex][1], context, env)]
             res = self.eval(expr.lhs_object[entry.exprIndex][1], context, env)
@@ -1003,6 +1670,15 @@ class Jsonata:
 
             idx += 1
 
+        if branches:
+            # independent values, evaluated concurrently
+            mask = hoister.Hoister.branch_mask(expr, [pair[1] for pair in expr.lhs_object])
+            values = self.eval_branches(lambda ctx, branch: ctx.eval(branch[1], branch[2], branch[3]), branches,
+                                        [mask[branch[4]] for branch in branches])
+            for branch, res in zip(branches, values):
+                if res is not None:
+                    result[branch[0]] = res
+
         #  for (let generator of generators) {
         #      var [key, value] = /* await */ generator
         #      if(typeof value !== "undefined") {
@@ -1017,12 +1693,16 @@ class Jsonata:
             return tuple_stream
 
         result = dict(tuple_stream[0])
+        # keys whose value is a list accumulated by this function
+        owned = set()
 
         # Object.assign(result, tuple_stream[0])
         for ii in range(1, len(tuple_stream)):
             el = tuple_stream[ii]
             for k, v in el.items():
-                result[k] = functions.Functions.append(result[k], v)
+                result[k], accumulated = Jsonata.accumulate(result.get(k), v, k in owned)
+                if accumulated:
+                    owned.add(k)
         return result
 
     #
@@ -1107,6 +1787,11 @@ class Jsonata:
         # create a new frame to limit the scope of variable assignments
         # TODO, only do this if the post-parse stage has flagged this as required
         frame = self.create_frame(environment)
+        limit = Jsonata.positional_limit(expr)
+        if limit is not None and Jsonata.is_streamed_block(expr):
+            # e.g. (a.b.c)[0]: only the leading items are looked at by the
+            # predicate (at least two, so that a single array is not unwrapped)
+            return self.eval_path_prefix(expr.expressions[0], input, frame, max(limit, 2))
         # invoke each expression in turn
         # only return the result of the last one
         for ex in expr.expressions:
@@ -1114,6 +1799,11 @@ class Jsonata:
 
         return result
 
+    @staticmethod
+    def is_streamed_block(expr: Optional[parser.Parser.Symbol]) -> bool:
+        return (len(expr.expressions) == 1 and expr.expressions[0].predicate is None and
+                Jsonata.is_streamable_path(expr.expressions[0]))
+
     #
     # Prepare a regex
     # @param {Object} expr - expression containing regex
@@ -1139,6 +1829,9 @@ class Jsonata:
         if expr.value == "":
             # Empty string == "$" !
             result = input[0] if isinstance(input, utils.Utils.JList) and input.outer_wrapper else input
+        elif getattr(expr, "builtin", None) is not None:
+            # unshadowed builtin, bound by the resolver
+            result = environment.lookup_builtin(expr.value, expr.builtin)
         else:
             result = environment.lookup(str(expr.value))
             if self.parser.dbg:
@@ -1155,105 +1848,147 @@ class Jsonata:
     # async 
     def evaluate_sort_expression(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any],
                                  environment: Optional[Frame]) -> Optional[Any]:
-        result = None
+        # undefined inputs always return undefined
+        if input is None:
+            return None
+
+        if len(input) <= 1:
+            return input
 
         # evaluate the lhs, then sort the results in order according to rhs expression
-        lhs = input
         is_tuple_sort = True if (isinstance(input, utils.Utils.JList) and input.tuple_stream) else False
 
-        # sort the lhs array
-        # use comparator function
-        comparator = Jsonata.ComparatorWrapper(self, expr, environment, is_tuple_sort).compare
-
-        #  var focus = {
-        #      environment: environment,
-        #      input: input
-        #  }
-        #  // the `focus` is passed in as the `this` for the invoked function
-        #  result = /* await */ fn.sort.apply(focus, [lhs, comparator])
-
-        result = functions.Functions.sort(lhs, comparator)
-        return result
-
-    class ComparatorWrapper:
+        # Rather than comparing pairs of items, which evaluates the order-by
+        # terms twice per comparison, each term is evaluated once per item
+        # and the items are sorted on these keys. expr.terms is an array of
+        # order-by in priority order: the items are sorted on the first term,
+        # and each run of items that tie on it is then sorted on the next
+        # term. A term is therefore only evaluated (and type checked) for
+        # items that a comparison sort would have compared on it.
+        items = list(input)
+        sort = Jsonata.TermSort(self, expr, environment, is_tuple_sort, items)
+        return sort.sort(items, 0)
+
+    class TermSort:
         _outer_instance: 'Jsonata'
         _expr: Optional[parser.Parser.Symbol]
         _environment: 'Jsonata.Optional[Frame]'
         _is_tuple_sort: bool
+        _items: list
+        _frames: dict[int, 'Jsonata.Frame']
+        _keys: dict[tuple[int, int], Any]
 
-        def __init__(self, outer_instance, expr, environment, is_tuple_sort):
+        def __init__(self, outer_instance, expr, environment, is_tuple_sort, items):
             self._outer_instance = outer_instance
             self._expr = expr
             self._environment = environment
             self._is_tuple_sort = is_tuple_sort
+            self._items = items
+            # tuple frames, created once per item and shared by the terms
+            self._frames = {}
+            # values of the terms, by term index and item
+            self._keys = {}
+
+        #
+        # Stable sort of items on expr.terms[index:]
+        #
+        def sort(self, items: list, index: int) -> list:
+            term = self._expr.terms[index]
+            keys = [self.key(index, item) for item in items]
+            self.check_types(keys)
+
+            # undefined should be last in sort order, whatever the direction
+            present = [i for i, key in enumerate(keys) if key is not None]
+            missing = [i for i, key in enumerate(keys) if key is None]
+            present.sort(key=keys.__getitem__, reverse=term.descending)
+
+            result = []
+            for run in self.runs(present, keys) + [missing]:
+                if len(run) > 1 and index + 1 < len(self._expr.terms):
+                    # these items tie on this term - order them by the next one
+                    result.extend(self.sort([items[i] for i in run], index + 1))
+                else:
+                    result.extend(items[i] for i in run)
+            return result
 
-        def compare(self, a, b):
+        def key(self, index: int, item) -> Optional[Any]:
+            cached = self._keys.get((index, id(item)), utils.Utils.NONE)
+            if cached is not utils.Utils.NONE:
+                return cached
+            # evaluate the sort term in the context of the item
+            context = item
+            env = self._environment
+            if self._is_tuple_sort:
+                context = item["@"]
+                env = self._frames.get(id(item))
+                if env is None:
+                    env = self._outer_instance.create_frame_from_tuple(self._environment, item)
+                    self._frames[id(item)] = env
+            key = self._outer_instance.eval(self._expr.terms[index].expression, context, env)
+            self._keys[(index, id(item))] = key
+            return key
 
-            # expr.terms is an array of order-by in priority order
+        #
+        # Type checks of the keys of a term, raising the errors a pairwise
+        # comparison of these items would raise
+        #
+        def check_types(self, keys: list) -> None:
+            values = [key for key in keys if key is not None]
+            if len(values) < 2:
+                # nothing to compare against
+                return
+            if (all(not isinstance(value, bool) and isinstance(value, (int, float)) for value in values) or
+                    all(isinstance(value, str) for value in values)):
+                return
+            # a comparison sort raises the error of the first pair it compares
+            # that are of unsupported or different types (T2008 or T2007), so
+            # compare the items as it does (see Functions.sort)
+            sorted(self._items, key=functools.cmp_to_key(self.compare))
+
+        #
+        # Compares two items on the terms, as a comparison sort does
+        #
+        def compare(self, a, b) -> int:
             comp = 0
             index = 0
             while comp == 0 and index < len(self._expr.terms):
-                term = self._expr.terms[index]
-                # evaluate the sort term in the context of a
-                context = a
-                env = self._environment
-                if self._is_tuple_sort:
-                    context = a["@"]
-                    env = self._outer_instance.create_frame_from_tuple(self._environment, a)
-                aa = self._outer_instance.eval(term.expression, context, env)
-
-                # evaluate the sort term in the context of b
-                context = b
-                env = self._environment
-                if self._is_tuple_sort:
-                    context = b["@"]
-                    env = self._outer_instance.create_frame_from_tuple(self._environment, b)
-                bb = self._outer_instance.eval(term.expression, context, env)
-
-                # type checks
-                #  var atype = typeof aa
-                #  var btype = typeof bb
+                aa = self.key(index, a)
+                bb = self.key(index, b)
+                index += 1
                 # undefined should be last in sort order
                 if aa is None:
-                    # swap them, unless btype is also undefined
-                    comp = 0 if (bb is None) else 1
-                    index += 1
+                    comp = 0 if bb is None else 1
                     continue
                 if bb is None:
                     comp = -1
-                    index += 1
                     continue
-
+                a_number = not isinstance(aa, bool) and isinstance(aa, (int, float))
+                b_number = not isinstance(bb, bool) and isinstance(bb, (int, float))
                 # if aa or bb are not string or numeric values, then throw an error
-                if (not ((not isinstance(aa, bool) and isinstance(aa, (int, float))) or isinstance(aa, str)) or
-                        not ((not isinstance(bb, bool) and isinstance(bb, (int, float))) or isinstance(bb, str))):
+                if not (a_number or isinstance(aa, str)) or not (b_number or isinstance(bb, str)):
                     raise jexception.JException("T2008", self._expr.position, aa, bb)
-
                 # if aa and bb are not of the same type
-                same_type = False
-                if (not isinstance(aa, bool) and isinstance(aa, (int, float)) and
-                        not isinstance(bb, bool) and isinstance(bb, (int, float))):
-                    same_type = True
-                elif issubclass(type(bb), type(aa)) or issubclass(type(aa), type(bb)):
-                    same_type = True
-
-                if not same_type:
+                if a_number != b_number:
                     raise jexception.JException("T2007", self._expr.position, aa, bb)
-                if aa == bb:
-                    # both the same - move on to next term
-                    index += 1
-                    continue
-                elif aa < bb:
-                    comp = -1
-                else:
-                    comp = 1
-                if term.descending:
-                    comp = -comp
-                index += 1
-            # only swap a & b if comp equals 1
-            # return comp == 1
+                if aa != bb:
+                    comp = -1 if aa < bb else 1
+                    if self._expr.terms[index - 1].descending:
+                        comp = -comp
             return comp
 
+        #
+        # Splits sorted item indexes into runs of equal keys
+        #
+        @staticmethod
+        def runs(indexes: list[int], keys: list) -> list[list[int]]:
+            runs = []
+            for i in indexes:
+                if runs and keys[runs[-1][-1]] == keys[i]:
+                    runs[-1].append(i)
+                else:
+                    runs.append([i])
+            return runs
+
     #
     # create a transformer function
     # @param {Object} expr - AST for operator
@@ -1315,24 +2050,137 @@ class Jsonata:
     def is_function_like(self, o: Optional[Any]) -> bool:
         return utils.Utils.is_function(o) or functions.Functions.is_lambda(o) or functions.Functions.is_regex(o)
 
-    CURRENT = threading.local()
+    #
+    # Evaluation context of the evaluation in progress in this thread or
+    # asyncio task (see create_context)
+    #
+    CONTEXT: contextvars.ContextVar[Optional['Jsonata']] = contextvars.ContextVar("jsonata_context", default=None)
+
+    #
+    # Deprecated, use CONTEXT or current(): CURRENT.jsonata is the evaluation
+    # context in progress (missing outside of an evaluation), and MUTEX is no
+    # longer used by the evaluation
+    #
+    class _Current:
+        @property
+        def jsonata(self) -> 'Jsonata':
+            warnings.warn("Jsonata.CURRENT is deprecated, use Jsonata.current()", DeprecationWarning, stacklevel=2)
+            context = Jsonata.CONTEXT.get()
+            if context is None:
+                raise AttributeError("jsonata")
+            return context
+
+    CURRENT = _Current()
     MUTEX = threading.Lock()
 
     #
-    # Returns a per thread instance of this parsed expression.
-    # 
+    # Deprecated, use current(): returns the evaluation context in progress,
+    # or a new one for this expression outside of an evaluation
+    #
+    def get_per_thread_instance(self) -> 'Jsonata':
+        warnings.warn("Jsonata.get_per_thread_instance is deprecated, use Jsonata.current()", DeprecationWarning,
+                      stacklevel=2)
+        context = Jsonata.CONTEXT.get()
+        return context if context is not None else self.create_context()
+
+    #
+    # Executor running the evaluations started by evaluate_async, and their
+    # independent subexpressions. Its threads mostly wait for the event loop,
+    # and their number bounds the number of awaitables awaited concurrently;
+    # it can be replaced by another executor.
+    #
+    ASYNC_EXECUTOR: concurrent.futures.Executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=32, thread_name_prefix="jsonata")
+
+    #
+    # Creates the context of an evaluation of this expression: a shallow
+    # copy of it, which holds the state of that evaluation only (the current
+    # input and environment, the timestamp of $now() and $millis(), the
+    # running bounds, the function its usage is reported to and the scopes of
+    # the loop-invariant subexpressions). Concurrent evaluations of an
+    # expression, in threads or asyncio tasks, each have their own context,
+    # so they share no mutable state.
+    #
+    # @param environment Environment of the evaluation
+    # @param bounds Running bounds of the evaluation (see timebox.Timebox.begin)
+    # @param usage Function called with the timebox.Usage of the evaluation
     # @return
-    #     
-    def get_per_thread_instance(self):
-        if hasattr(Jsonata.CURRENT, "jsonata"):
-            return Jsonata.CURRENT.jsonata
+    #
+    def create_context(self, environment: Optional[Frame] = None,
+                       bounds: Optional[timebox.Timebox] = None,
+                       usage: Optional[Callable[[timebox.Usage], None]] = None) -> 'Jsonata':
+        context = copy.copy(self)
+        context.input = None
+        context.environment = environment if environment is not None else self.environment
+        context.timestamp = timebox.Timebox.current_milli_time()
+        context.bounds = bounds
+        context.usage = usage
+        context.includes_indexes = None
+        context.hoisted_scope = None
+        evaluation = concurrency.AsyncEvaluation.CURRENT.get()
+        if evaluation is not None and context.executor is None:
+            context.executor = evaluation.executor
+        return context
+
+    #
+    # Evaluates independent subexpressions of this evaluation: the entries of
+    # an array constructor, the values of an object constructor or the
+    # arguments of a function call. With an executor (that of the expression,
+    # or of evaluate_async), those that may block (see Hoister.may_block) run
+    # concurrently (see concurrency.map_ordered), each in a copy of this
+    # context with a fork of its running bounds. Registered functions that
+    # release the GIL, or await, then overlap. The others (literals, paths,
+    # builtins) are cheaper to evaluate in this thread than to hand over.
+    #
+    # @param fn Function of a context and an item, evaluating the item
+    # @param items Items
+    # @param blocking Whether each item may block (see Hoister.branch_mask)
+    # @returns The results of fn, in the order of the items
+    #
+    def eval_branches(self, fn: Callable[['Jsonata', Any], Any], items: Sequence, blocking: Sequence[bool]) -> list:
+        if self.executor is None or sum(blocking) < 2:
+            return [fn(self, item) for item in items]
+        bounds = self.bounds
+
+        def branch(item):
+            context = copy.copy(self)
+            if bounds is not None:
+                context.bounds = bounds.fork()
+            token = Jsonata.CONTEXT.set(context)
+            try:
+                return fn(context, item), context.bounds
+            finally:
+                Jsonata.CONTEXT.reset(token)
 
-        with Jsonata.MUTEX:
-            if hasattr(Jsonata.CURRENT, "jsonata"):
-                return Jsonata.CURRENT.jsonata
-            thread_inst = copy.copy(self)
-            Jsonata.CURRENT.jsonata = thread_inst
-            return thread_inst
+        results = concurrency.map_ordered(self.executor, branch, items, blocking)
+        if bounds is not None:
+            bounds.join([running for _, running in results])
+        return [value for value, _ in results]
+
+    #
+    # Returns the result of an awaitable returned by a registered function,
+    # awaited on the event loop of the evaluate_async call in progress
+    #
+    @staticmethod
+    def await_result(awaitable: Any) -> Any:
+        evaluation = concurrency.AsyncEvaluation.CURRENT.get()
+        if evaluation is None:
+            concurrency.AsyncEvaluation.discard(awaitable)
+            raise jexception.JException("T1011", -1)
+        return evaluation.run(awaitable)
+
+    #
+    # Returns the context of the evaluation in progress in this thread or
+    # asyncio task, for the functions that need it ($eval, $now, $millis
+    # and the higher order functions). Outside of an evaluation, a new
+    # context of an empty expression.
+    #
+    @staticmethod
+    def current() -> 'Jsonata':
+        context = Jsonata.CONTEXT.get()
+        if context is None:
+            context = Jsonata("$").create_context()
+        return context
 
     #
     # Evaluate Object against input data
@@ -1344,7 +2192,7 @@ class Jsonata:
     # async 
     def evaluate_function(self, expr: Optional[parser.Parser.Symbol], input: Optional[Any], environment: Optional[Frame],
                           applyto_context: Optional[Any]) -> Optional[Any]:
-        # this.current is set by getPerThreadInstance() at this point
+        # self is the context of the evaluation at this point (see create_context)
 
         # create the procedure
         # can"t assume that expr.procedure is a lambda type directly
@@ -1357,12 +2205,22 @@ class Jsonata:
             # help the user out here if they simply forgot the leading $
             raise jexception.JException("T1005", expr.position, expr.procedure.steps[0].value)
 
+        if applyto_context is utils.Utils.NONE and proc is not None:
+            result = self.evaluate_streamed_call(expr, proc, input, environment)
+            if result is not utils.Utils.NONE:
+                return result
+
         evaluated_args = []
 
         if applyto_context is not utils.Utils.NONE:
             evaluated_args.append(applyto_context)
         # eager evaluation - evaluate the arguments
         args = expr.arguments if expr.arguments is not None else []
+        if self.executor is not None:
+            # independent arguments, evaluated concurrently
+            evaluated_args.extend(self.eval_branches(lambda context, val: context.eval(val, input, environment), args,
+                                                     hoister.Hoister.branch_mask(expr, args)))
+            args = []
         for val in args:
             arg = self.eval(val, input, environment)
             if utils.Utils.is_function(arg) or functions.Functions.is_lambda(arg):
@@ -1383,6 +2241,19 @@ class Jsonata:
                 evaluated_args.append(arg)
             else:
                 evaluated_args.append(arg)
+        return self.apply_function(expr, proc, evaluated_args, input, environment)
+
+    #
+    # Apply the procedure of a function call to its evaluated arguments
+    # @param {Object} expr - JSONata expression of the call
+    # @param {Object} proc - the evaluated procedure
+    # @param {Array} evaluated_args - the evaluated arguments
+    # @param {Object} input - Input data to evaluate against
+    # @param {Object} environment - Environment
+    # @returns {*} Evaluated input data
+    #
+    def apply_function(self, expr: Optional[parser.Parser.Symbol], proc: Optional[Any], evaluated_args: list,
+                       input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
         # apply the procedure
         proc_val = expr.procedure.value if expr.procedure is not None else None
         proc_name = expr.procedure.steps[0].value if getattr(expr.procedure, "type",
@@ -1419,11 +2290,16 @@ class Jsonata:
     #      
     # async 
     def apply(self, proc: Optional[Any], args: Optional[Any], input: Optional[Any], environment: Optional[Frame]) -> Optional[Any]:
+        bounds = self.bounds
+        if bounds is not None:
+            bounds.tick()
         result = self.apply_inner(proc, args, input, environment)
         while functions.Functions.is_lambda(result) and result.thunk:
             # trampoline loop - this gets invoked as a result of tail-call optimization
             # the Object returned a tail-call thunk
             # unpack it, evaluate its arguments, and apply the tail call
+            if bounds is not None:
+                bounds.tick()
             next = self.eval(result.body.procedure, result.input, result.environment)
             if result.body.procedure.type == "variable":
                 if isinstance(next, parser.Parser.Symbol):  # Java: not if JFunction
@@ -1619,7 +2495,7 @@ class Jsonata:
             if i >= len(args):
                 break
             env.bind(str(arg.value), args[i])
-        if isinstance(proc.body, parser.Parser.Symbol):
+        if isinstance(proc.body, nodes.Node):
             result = self.eval(proc.body, proc.input, env)
         else:
             raise RuntimeError("Cannot execute procedure: " + proc + " " + proc.body)
@@ -1644,7 +2520,7 @@ class Jsonata:
             #         proc.arguments.forEach(Object (param, index) {
             arg = args[index] if index < len(args) else None
             if (arg is None) or (
-                    isinstance(arg, parser.Parser.Symbol) and ("operator" == arg.type and "?" == arg.value)):
+                    isinstance(arg, nodes.Node) and ("operator" == arg.type and "?" == arg.value)):
                 unbound_args.append(param)
             else:
                 env.bind(str(param.value), arg)
@@ -1695,10 +2571,11 @@ class Jsonata:
         #  }).toList()
         #  var body = "function(" + String.join(", ", sig_args) + "){ _ }"
 
-        body_ast = self.parser.parse(body)
+        body_ast, _ = Jsonata.parse_expression(body)
         # body_ast.body = _native
 
-        partial = self.partial_apply_procedure(body_ast, args)
+        # the parsed tree is shared, so make a closure of it to apply
+        partial = self.partial_apply_procedure(self.evaluate_lambda(body_ast, None, self.environment), args)
         return partial
 
     #
@@ -1761,8 +2638,8 @@ class Jsonata:
     # @param {Object} enclosingEnvironment - Enclosing environment
     # @returns {{bind: bind, lookup: lookup}} Created frame
     #      
-    def create_frame(self, enclosing_environment: Optional[Frame] = None) -> Frame:
-        return Jsonata.Frame(enclosing_environment)
+    def create_frame(self, enclosing_environment: Optional[Frame] = None, lexical: bool = True) -> Frame:
+        return Jsonata.Frame(enclosing_environment, lexical)
 
         # The following logic is in class Frame:
         #  var bindings = {}
@@ -1893,8 +2770,19 @@ class Jsonata:
         Jsonata.static_frame = Jsonata.Frame(None)
         Jsonata.register_functions()
 
-        # set system recursion limit to 10K (similar to JavaScript)
-        sys.setrecursionlimit(10000)
+    #
+    # Interpreter recursion limit that the evaluation of nested expressions
+    # and recursive functions needs (similar to the JavaScript stack). It is
+    # raised to this value when the first expression is created, unless it is
+    # higher already; None leaves it as it is.
+    #
+    RECURSION_LIMIT: Optional[int] = 10000
+
+    @staticmethod
+    def ensure_recursion_limit() -> None:
+        limit = Jsonata.RECURSION_LIMIT
+        if limit is not None and sys.getrecursionlimit() < limit:
+            sys.setrecursionlimit(limit)
 
     #
     # JSONata
@@ -1908,13 +2796,22 @@ class Jsonata:
     #     for no limit. Raises D1012 if exceeded.
     # @param {Integer} stack - max eval-apply recursion depth, or None for
     #     no limit. Raises D1011 if exceeded.
+    # @param {Boolean} compile - compile the expression into closures
+    #     (see jsonata.compiler.Compiler) instead of interpreting the AST.
+    # @param {Integer} budget - max evaluator steps plus items of the
+    #     sequences they return, or None for no limit. Raises D1014 if
+    #     exceeded; see the usage callback of evaluate.
+    # @param {Object} executor - concurrent.futures.Executor evaluating the
+    #     entries of array and object constructors and the arguments of
+    #     function calls concurrently (see eval_branches), or None
     # @returns Evaluated expression
     # @throws jexception.JException An exception if an error occured.
     #
     @staticmethod
     def jsonata(expression: Optional[str], regex_engine: RegexEngine = default_regex_engine,
-               timeout: Optional[int] = None, stack: Optional[int] = None) -> 'Jsonata':
-        return Jsonata(expression, regex_engine, timeout, stack)
+               timeout: Optional[int] = None, stack: Optional[int] = None, compile: bool = False,
+               budget: Optional[int] = None, executor: Optional[concurrent.futures.Executor] = None) -> 'Jsonata':
+        return Jsonata(expression, regex_engine, timeout, stack, compile, budget, executor)
 
     #
     # Internal constructor
@@ -1922,6 +2819,7 @@ class Jsonata:
     #
 
     parser: parser.Parser
+    expression: Optional[str]
     errors: Optional[Sequence[Exception]]
     environment: Frame
     ast: Optional[parser.Parser.Symbol]
@@ -1930,30 +2828,52 @@ class Jsonata:
     regex_engine: RegexEngine
     timeout: Optional[int]
     stack: Optional[int]
+    budget: Optional[int]
+    compiled: bool
+    includes_indexes: Optional[dict[int, Any]]
+    hoisted_scope: Optional[tuple[nodes.Node, dict[int, Any]]]
+    bounds: Optional[timebox.Timebox]
+    usage: Optional[Callable[[timebox.Usage], None]]
+    executor: Optional[concurrent.futures.Executor]
 
     def __init__(self, expr: Optional[str], regex_engine: RegexEngine = default_regex_engine,
-                timeout: Optional[int] = None, stack: Optional[int] = None) -> None:
+                timeout: Optional[int] = None, stack: Optional[int] = None, compile: bool = False,
+                budget: Optional[int] = None, executor: Optional[concurrent.futures.Executor] = None) -> None:
+        Jsonata.ensure_recursion_limit()
+        self.expression = expr
         self.regex_engine = regex_engine
         self.timeout = timeout
         self.stack = stack
+        self.budget = budget
+        self.compiled = compile
+        self.parser = Jsonata.get_parser()
+        self.environment = self.create_frame(Jsonata.static_frame, False)
+        if timeout is not None or stack is not None or budget is not None:
+            self.environment.set_runtime_bounds(timeout, stack, budget)
+
+        self.timestamp = timebox.Timebox.current_milli_time()  # each evaluation has its own (see create_context)
+
+        self.input = None
+        self.validate_input = True
+        self.validate_lazily = False
+        self.output_convert_nulls = True
+        self.includes_indexes = None
+        self.hoisted_scope = None
+        self.bounds = None
+        self.usage = None
+        self.executor = None
+
         try:
-            self.parser = Jsonata.get_parser()
-            self.ast = self.parser.parse(expr, regex_engine)  # , optionsRecover);
-            self.errors = self.ast.errors
-            self.ast.errors = None  # delete ast.errors;
+            # the state above is set first: the constant subexpressions are
+            # evaluated while parsing (see folder.Folder)
+            self.ast, self.errors = Jsonata.parse_expression(expr, regex_engine, compile, True, self)
         except jexception.JException as err:
             # insert error message into structure
             # populateMessage(err); // possible side-effects on `err`
             raise err
-        self.environment = self.create_frame(Jsonata.static_frame)
-        if timeout is not None or stack is not None:
-            self.environment.set_runtime_bounds(timeout, stack)
 
-        self.timestamp = timebox.Timebox.current_milli_time()  # will be overridden on each call to evalute()
-
-        self.input = None
-        self.validate_input = True
-        self.output_convert_nulls = True
+        # set once parsed: the constants are folded sequentially
+        self.executor = executor
 
         # Note: now and millis are implemented in Functions
         #  environment.bind("now", defineFunction(function(picture, timezone) {
@@ -1963,8 +2883,6 @@ class Jsonata:
         #      return timestamp.getTime()
         #  }, "<:n>"))
 
-        # Set instance for this thread
-        Jsonata.CURRENT.jsonata = self
 
     #
     # Flag: validate input objects to comply with JSON types
@@ -1977,11 +2895,23 @@ class Jsonata:
         return self.validate_input
 
     #
-    # Enable or disable input validation
+    # Checks whether input validation is lazy
+    #
+    def is_validate_input_lazily(self) -> bool:
+        return self.validate_lazily
+
+    #
+    # Enable or disable input validation. Input validation walks the whole
+    # input before evaluating it by default; lazy validation instead checks
+    # the values as the evaluation touches them with paths, wildcards and
+    # descendants, and raises the same errors for them, so that the parts of
+    # the input that are not touched are not walked.
     # @param validateInput
+    # @param lazy - validate lazily
     #     
-    def set_validate_input(self, validate_input: bool) -> None:
+    def set_validate_input(self, validate_input: bool, lazy: bool = False) -> None:
         self.validate_input = validate_input
+        self.validate_lazily = validate_input and lazy
 
     #
     # Checks whether output NULL_VALUE conversion is enabled
@@ -1996,57 +2926,248 @@ class Jsonata:
     # When disabled, output values may contain Utils.NULL_VALUE indicating
     # "JSONata null" while Python None indicates "JSONata undefined".
     # Manually calling Utils.convert_nulls(result) on a raw result will yield
-    # the converted result.
+    # the converted result. Raw results may also share the read-only arrays
+    # and objects folded at parse time (Utils.FrozenList and FrozenDict),
+    # which Utils.convert_nulls copies.
     #
     def set_output_convert_nulls(self, output_convert_nulls: bool) -> None:
         self.output_convert_nulls = output_convert_nulls
 
-    def evaluate(self, input: Optional[Any], bindings: Optional[Union[Frame, Mapping[str, Any]]] = None) -> Optional[Any]:
+    #
+    # Evaluate the expression against the input
+    # @param {Object} input - input document
+    # @param {Object} bindings - Frame or mapping of variable bindings
+    # @param {Object} cancel - timebox.CancellationToken stopping the
+    #     evaluation with jexception.EvaluationCancelled (D1015), or None
+    # @param {Object} usage - function called with the timebox.Usage of the
+    #     evaluation if it succeeds with runtime bounds, or None
+    # @returns {*} result of the evaluation
+    #
+    def evaluate(self, input: Optional[Any], bindings: Optional[Union[Frame, Mapping[str, Any]]] = None,
+                 cancel: Optional[timebox.CancellationToken] = None,
+                 usage: Optional[Callable[[timebox.Usage], None]] = None) -> Optional[Any]:
         # throw if the expression compiled with syntax errors
         if self.errors is not None:
             raise jexception.JException("S0500", 0)
 
-        exec_env = None
-        if bindings is not None:
-            # var exec_env
-            # the variable bindings have been passed in - create a frame to hold these
-            exec_env = self.create_frame(self.environment)
-            # accept either a Frame or a plain mapping (e.g. dict) of variable bindings
-            items = bindings.bindings if isinstance(bindings, Jsonata.Frame) else bindings
-            for k, v in items.items():
-                exec_env.bind(k, v)
-        else:
-            exec_env = self.environment
+        # the root object is bound in a frame of this evaluation, rather than
+        # in the environment of the expression, which concurrent evaluations
+        # share
+        exec_env = self.create_environment(bindings) if bindings is not None else \
+            self.create_frame(self.environment, False)
+        # the context also captures the timestamp: the $now() and
+        # $millis() functions will return this value - whenever it is called
+        return self.evaluate_in_context(self.create_context(exec_env, usage=usage), input,
+                                        self.bounds_spec(exec_env, cancel))
+
+    #
+    # Evaluate the expression against each input of an iterable, in one
+    # environment and evaluation context: the bindings are set up once, and
+    # the inputs share the timestamp of $now() and $millis(). Each input is
+    # evaluated in a frame of its own below the bindings, so the variables
+    # that an evaluation assigns do not reach the next ones. The runtime
+    # bounds apply to each input.
+    #
+    # An input whose evaluation fails does not stop the others: its
+    # exception is yielded in place of its result. A cancelled evaluation
+    # (see cancel) stops them all, by raising jexception.EvaluationCancelled.
+    #
+    # @param {Object} inputs - iterable of input documents
+    # @param {Object} bindings - Frame or mapping of variable bindings
+    # @param {Object} cancel - timebox.CancellationToken, or None
+    # @param {Object} usage - function called with the timebox.Usage of each
+    #     successful evaluation with runtime bounds, or None
+    # @returns generator of the results (or exceptions), in the order of the inputs
+    #
+    def evaluate_many(self, inputs: Iterable[Any], bindings: Optional[Union[Frame, Mapping[str, Any]]] = None,
+                      cancel: Optional[timebox.CancellationToken] = None,
+                      usage: Optional[Callable[[timebox.Usage], None]] = None) -> Iterator[Any]:
+        if self.errors is not None:
+            raise jexception.JException("S0500", 0)
+
+        # a frame of its own, as the expression may be evaluated between
+        # two results
+        exec_env = self.create_environment(bindings if bindings is not None else {})
+        context = self.create_context(exec_env, usage=usage)
+        spec = self.bounds_spec(exec_env, cancel)
+
+        def results():
+            for input in inputs:
+                context.environment = self.create_frame(exec_env, False)
+                try:
+                    result = self.evaluate_in_context(context, input, spec)
+                except jexception.EvaluationCancelled:
+                    raise
+                except Exception as err:
+                    result = err
+                yield result
+
+        return results()
+
+    #
+    # Evaluate the expression against each input of an iterable, in worker
+    # processes: CPU-bound evaluations are not limited by the GIL. The
+    # expression is pickled (see __reduce__) and unpickled once in each
+    # worker, which evaluates chunks of inputs with evaluate_many. The
+    # inputs, bindings and results are pickled too.
+    #
+    # As with evaluate_many, the results (or exceptions) are yielded in the
+    # order of the inputs, which are read as the results are consumed.
+    #
+    # @param {Object} inputs - iterable of input documents
+    # @param {Integer} processes - number of worker processes, or None for
+    #     the number of CPUs
+    # @param {Integer} chunksize - number of inputs sent to a worker at once
+    # @param {Object} bindings - mapping of variable bindings
+    # @returns generator of the results (or exceptions), in the order of the inputs
+    #
+    def evaluate_parallel(self, inputs: Iterable[Any], processes: Optional[int] = None, chunksize: int = 256,
+                          bindings: Optional[Mapping[str, Any]] = None) -> Iterator[Any]:
+        if self.errors is not None:
+            raise jexception.JException("S0500", 0)
+
+        expression = pickle.dumps(self)
+
+        def results():
+            executor = concurrent.futures.ProcessPoolExecutor(processes, initializer=concurrency.init_worker,
+                                                              initargs=(expression,))
+            try:
+                yield from concurrency.map_chunks(executor, concurrency.evaluate_chunk, inputs, chunksize,
+                                                  2 * (processes or os.cpu_count() or 1), bindings)
+            finally:
+                # the chunks not started are dropped if the results are not
+                # all consumed
+                executor.shutdown(cancel_futures=True)
+
+        return results()
+
+    #
+    # Creates the environment of an evaluation with the given bindings
+    # @param {Object} bindings - Frame or mapping of variable bindings
+    #
+    def create_environment(self, bindings: Union[Frame, Mapping[str, Any]]) -> Frame:
+        # var exec_env
+        # the variable bindings have been passed in - create a frame to hold these
+        exec_env = self.create_frame(self.environment, False)
+        # accept either a Frame or a plain mapping (e.g. dict) of variable bindings
+        items = bindings.bindings if isinstance(bindings, Jsonata.Frame) else bindings
+        for k, v in items.items():
+            exec_env.bind(k, v)
+        if isinstance(bindings, Jsonata.Frame) and bindings.listeners:
+            for listener in bindings.listeners:
+                exec_env.add_evaluate_listener(listener)
+        if isinstance(bindings, Jsonata.Frame) and bindings.bounds is not None:
+            exec_env.bounds = bindings.bounds
+        return exec_env
+
+    #
+    # Returns the bounds of the evaluations in an environment (see
+    # Frame.bounds), with the cancellation token if any
+    #
+    @staticmethod
+    def bounds_spec(exec_env: Frame, cancel: Optional[timebox.CancellationToken]) -> Optional[timebox.Timebox]:
+        spec = exec_env.bounds
+        if cancel is not None:
+            spec = timebox.Timebox(None, spec.timeout, spec.max_depth, spec.interval, spec.budget, cancel) \
+                if spec is not None else timebox.Timebox(None, cancel=cancel)
+        return spec
+
+    #
+    # Evaluate the expression against the input, in an evaluation context
+    # (see create_context)
+    # @param {Object} context - evaluation context
+    # @param {Object} input - input document
+    # @param {Object} spec - bounds of the evaluation (see bounds_spec), or None
+    # @returns {*} result of the evaluation
+    #
+    def evaluate_in_context(self, context: 'Jsonata', input: Optional[Any],
+                            spec: Optional[timebox.Timebox]) -> Optional[Any]:
+        exec_env = context.environment
         # put the input document into the environment as the root object
         exec_env.bind("$", input)
 
-        # capture the timestamp and put it in the execution environment
-        # the $now() and $millis() functions will return this value - whenever it is called
-        self.timestamp = timebox.Timebox.current_milli_time()
-        # exec_env.timestamp = timestamp
+        if self.validate_lazily:
+            # the root is the first value touched
+            functions.Functions.validate_value(input)
 
         # if the input is a JSON array, then wrap it in a singleton sequence so it gets treated as a single input
         if (isinstance(input, list)) and not utils.Utils.is_sequence(input):
             input = utils.Utils.create_sequence(input)
             input.outer_wrapper = True
 
-        if self.validate_input:
+        if self.validate_input and not self.validate_lazily:
             functions.Functions.validate_input(input)
 
         it = None
         try:
-            it = self.eval(self.ast, input, exec_env)
+            # the runtime bounds are measured from here; an evaluation nested
+            # in another one with the same bounds shares its running bounds
+            bounds = None
+            start = None
+            if spec is not None:
+                outer = Jsonata.CONTEXT.get()
+                if outer is not None and outer.bounds is not None and outer.bounds.spec is spec:
+                    bounds = outer.bounds
+                    # only the cost of this evaluation is reported
+                    start = bounds.usage()
+                else:
+                    bounds = spec.begin()
+            context.bounds = bounds
+            token = Jsonata.CONTEXT.set(context)
+            try:
+                it = context.eval(self.ast, input, exec_env)
+            finally:
+                Jsonata.CONTEXT.reset(token)
             #  if (typeof callback === "function") {
             #      callback(null, it)
             #  }
             if self.output_convert_nulls:
                 it = utils.Utils.convert_nulls(it)
+            if bounds is not None and context.usage is not None:
+                consumed = bounds.usage()
+                if start is not None:
+                    consumed = timebox.Usage(consumed.steps - start.steps, consumed.items - start.items)
+                context.usage(consumed)
             return it
+        except RecursionError:
+            # too deeply nested for the interpreter stack, see RECURSION_LIMIT
+            # and the stack guardrail
+            raise self.populate_message(jexception.JException("D1011", -1)) from None
         except Exception as err:
             # insert error message into structure
             self.populate_message(err)  # possible side-effects on `err`
             raise err
 
+    #
+    # Evaluate the expression against the input, without blocking the event
+    # loop: the evaluation runs on Jsonata.ASYNC_EXECUTOR, and the awaitables
+    # returned by registered functions (e.g. coroutine functions registered
+    # with register_lambda) are awaited on the running event loop. The
+    # entries of array and object constructors and the arguments of function
+    # calls are evaluated concurrently, so their awaitables are awaited
+    # concurrently. Cancelling the awaiting task cancels the evaluation.
+    # @param {Object} input - input document
+    # @param {Object} bindings - Frame or mapping of variable bindings
+    # @param {Object} cancel - timebox.CancellationToken, or None
+    # @param {Object} usage - function called with the timebox.Usage of the
+    #     evaluation (from a thread of the executor), or None
+    # @returns {*} result of the evaluation
+    #
+    async def evaluate_async(self, input: Optional[Any], bindings: Optional[Union[Frame, Mapping[str, Any]]] = None,
+                             cancel: Optional[timebox.CancellationToken] = None,
+                             usage: Optional[Callable[[timebox.Usage], None]] = None) -> Optional[Any]:
+        evaluation = concurrency.AsyncEvaluation(asyncio.get_running_loop(), Jsonata.ASYNC_EXECUTOR)
+        token = cancel.child() if cancel is not None else timebox.CancellationToken()
+        context = contextvars.copy_context()
+        context.run(concurrency.AsyncEvaluation.CURRENT.set, evaluation)
+        try:
+            return await evaluation.loop.run_in_executor(evaluation.executor, context.run, self.evaluate, input,
+                                                         bindings, token, usage)
+        except asyncio.CancelledError:
+            token.cancel()
+            evaluation.cancel()
+            raise
+
     def assign(self, name: str, value: Optional[Any]) -> None:
         self.environment.bind(name, value)
 
@@ -2056,19 +3177,116 @@ class Jsonata:
     def register_function(self, name: str, function: Any) -> None:
         self.environment.bind(name, function)
 
+    #
+    # Registers a listener notified before and after every subexpression
+    # evaluated in this expression's environment. Evaluations without any
+    # listener or entry/exit callback do not look for hooks at all.
+    #
+    # @param listener Jsonata.EvaluateListener
+    #
+    def add_evaluate_listener(self, listener: EvaluateListener) -> None:
+        self.environment.add_evaluate_listener(listener)
+
+    def remove_evaluate_listener(self, listener: EvaluateListener) -> None:
+        self.environment.remove_evaluate_listener(listener)
+
     def get_errors(self) -> Optional[list[Exception]]:
         return self.errors
 
+    #
+    # Pickles the expression as its text and settings, with the bindings,
+    # registered functions and listeners of its environment: it is parsed
+    # again when unpickled (e.g. once in each worker process of
+    # evaluate_parallel), and the functions are pickled by reference, so
+    # they must be defined at the top level of a module. The executor is
+    # not pickled.
+    #
+    def __reduce__(self):
+        bounds = self.environment.bounds
+        return Jsonata.restore, (
+            self.expression, self.regex_engine, self.timeout, self.stack, self.compiled, self.budget,
+            self.validate_input, self.validate_lazily, self.output_convert_nulls,
+            {k: v for k, v in self.environment.bindings.items() if k != "$"}, self.environment.listeners,
+            (bounds.timeout, bounds.max_depth, bounds.interval, bounds.budget) if bounds is not None else None)
+
+    @staticmethod
+    def restore(expression: Optional[str], regex_engine: RegexEngine, timeout: Optional[int], stack: Optional[int],
+                compile: bool, budget: Optional[int], validate_input: bool, validate_lazily: bool,
+                output_convert_nulls: bool,
+                bindings: Mapping[str, Any], listeners: Optional[list[EvaluateListener]],
+                bounds: Optional[tuple]) -> 'Jsonata':
+        expr = Jsonata(expression, regex_engine, timeout, stack, compile, budget)
+        expr.validate_input = validate_input
+        expr.validate_lazily = validate_lazily
+        expr.output_convert_nulls = output_convert_nulls
+        for k, v in bindings.items():
+            expr.environment.bind(k, v)
+        for listener in listeners or ():
+            expr.environment.add_evaluate_listener(listener)
+        if bounds is not None:
+            timeout, max_depth, interval, budget = bounds
+            timebox.Timebox(expr.environment, timeout, max_depth, interval, budget)
+        return expr
+
+    #
+    # Copies the expression into an evaluation context (see create_context),
+    # rather than pickling it
+    #
+    def __copy__(self) -> 'Jsonata':
+        context = Jsonata.__new__(Jsonata)
+        context.__dict__.update(self.__dict__)
+        return context
+
+    #
+    # Process-wide cache of parsed expressions, shared by the constructor,
+    # $eval() and partial application of native functions
+    #
+    expression_cache = ExpressionCache()
+
+    #
+    # Parse an expression, or return the tree cached for it
+    # @param {String} expr - JSONata expression
+    # @param {Object} regex_engine - regex engine used for regex literals
+    # @param {Boolean} compile - compile the tree (see jsonata.compiler.Compiler)
+    # @param {Boolean} resolve - bind unshadowed builtins (see jsonata.resolver.Resolver);
+    #     only for top-level expressions, whose frames are all created by the evaluator
+    # @param {Object} evaluator - Jsonata instance folding the constant subexpressions
+    #     of resolved trees (see jsonata.folder.Folder), if any
+    # @returns (ast, errors) - the tree, and the errors recovered while parsing
+    # @throws jexception.JException if the expression cannot be parsed
+    #
+    @staticmethod
+    def parse_expression(expr: Optional[str], regex_engine: RegexEngine = default_regex_engine,
+                         compile: bool = False,
+                         resolve: bool = False,
+                         evaluator: Optional['Jsonata'] = None) -> tuple[parser.Parser.Symbol, Optional[Sequence[Exception]]]:
+        def load():
+            ast = Jsonata.get_parser().parse(expr, regex_engine)  # , optionsRecover);
+            errors = ast.errors
+            ast.errors = None  # delete ast.errors;
+            if resolve:
+                resolver.Resolver.resolve(ast, Jsonata.static_frame.bindings)
+                if evaluator is not None and errors is None:
+                    ast = folder.Folder.fold(ast, evaluator)
+                hoister.Hoister.hoist(ast)
+            hoister.Hoister.mark_branches(ast)
+            if compile and errors is None:
+                compiler.Compiler.compile(ast)
+            return ast, errors
+
+        # compiled and resolved trees are annotated, so they are cached apart
+        return Jsonata.expression_cache.get((expr, regex_engine, compile, resolve), load)
+
     PARSER = threading.local()
 
     @staticmethod
     def get_parser() -> parser.Parser:
-        with Jsonata.MUTEX:
-            if hasattr(Jsonata.PARSER, "parser"):
-                return Jsonata.PARSER.parser
+        # one per thread, so no lock is needed
+        p = getattr(Jsonata.PARSER, "parser", None)
+        if p is None:
             p = parser.Parser()
             Jsonata.PARSER.parser = p
-            return p
+        return p
 
 
 Jsonata._static_initializer()
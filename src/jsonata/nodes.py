@@ -0,0 +1,162 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from typing import Any, Iterator, Optional, Sequence
+
+#
+# Compact AST node classes.
+#
+# Parser.Parser.parse lowers the Symbol tree built by the parser into these
+# classes (see Parser.lower): every node type only carries the fields the
+# evaluator reads for it, in __slots__, and holds no reference back to the
+# parser. Parser.Parser.Symbol also derives from Node, so code that accepts
+# either form tests for Node.
+#
+
+
+class Node:
+    # Fields shared by every node: any expression can be a step of a path,
+    # so the step annotations of Parser.process_ast live here too
+    __slots__ = ("type", "value", "position", "keep_array", "predicate", "group", "stages", "tuple", "focus",
+                 "index", "ancestor", "consarray", "errors", "compiled")
+
+    type: Optional[str]
+    value: Optional[Any]
+    position: int
+    keep_array: bool
+    predicate: 'Optional[Sequence[Node]]'
+    group: 'Optional[Node]'
+    stages: 'Optional[Sequence[Node]]'
+    tuple: Optional[Any]
+    focus: Optional[Any]
+    index: Optional[Any]
+    ancestor: 'Optional[Node]'
+    consarray: bool
+    errors: Optional[Sequence[Exception]]
+    compiled: Optional[Any]
+
+    @classmethod
+    def field_names(cls) -> tuple[str, ...]:
+        """
+        Returns the names of the slots of this node class.
+        """
+        names = _FIELD_NAMES.get(cls)
+        if names is None:
+            names = tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ()))
+            _FIELD_NAMES[cls] = names
+        return names
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        """
+        Yields the (name, value) pairs of the fields of this node.
+        """
+        for name in self.field_names():
+            yield name, getattr(self, name, None)
+        attrs = getattr(self, "__dict__", None)
+        if attrs:
+            yield from attrs.items()
+
+    def __repr__(self):
+        return type(self).__name__ + " " + str(self.type) + " value=" + str(self.value)
+
+
+_FIELD_NAMES: dict[type, tuple[str, ...]] = {}
+
+
+# variable reference; builtin is set by resolver.Resolver
+class VariableNode(Node):
+    __slots__ = ("builtin",)
+
+    builtin: Optional[Any]
+
+
+class PathNode(Node):
+    __slots__ = ("steps", "keep_singleton_array")
+
+
+# binary operators, variable binding (:=) and function application (~>)
+class BinaryNode(Node):
+    __slots__ = ("lhs", "rhs")
+
+
+# unary minus, array and object constructors; blocking is set by
+# Hoister.mark_branches
+class UnaryNode(Node):
+    __slots__ = ("expression", "expressions", "lhs_object", "blocking")
+
+
+# function calls and partial applications; blocking is set by
+# Hoister.mark_branches
+class FunctionNode(Node):
+    __slots__ = ("procedure", "arguments", "token", "blocking")
+
+
+class LambdaNode(Node):
+    __slots__ = ("arguments", "signature", "body", "thunk")
+
+
+class ConditionNode(Node):
+    __slots__ = ("condition", "then", "_else")
+
+
+class BlockNode(Node):
+    __slots__ = ("expressions",)
+
+
+class TransformNode(Node):
+    __slots__ = ("pattern", "update", "delete")
+
+
+class SortNode(Node):
+    __slots__ = ("terms",)
+
+
+class ParentNode(Node):
+    __slots__ = ("slot",)
+
+
+# predicate and stage filters
+class FilterNode(Node):
+    __slots__ = ("expr",)
+
+
+# group-by clause attached to a step; blocking is set by Hoister.mark_branches
+class GroupNode(Node):
+    __slots__ = ("lhs_object", "blocking")
+
+
+class SortTermNode(Node):
+    __slots__ = ("expression", "descending")
+
+
+# ancestor binding shared by parent operators and the steps they refer to
+class SlotNode(Node):
+    __slots__ = ("label", "level")
+
+
+# loop-invariant subexpression of a predicate or path step (see
+# hoister.Hoister); owner is that predicate or step, builtins the
+# (name, function) pairs of the builtin functions it references
+class HoistedNode(Node):
+    __slots__ = ("expression", "owner", "builtins")
+
+
+# constant subexpression calling builtin functions, evaluated at parse time
+# (see folder.Folder); value is its value, expression the original
+# subexpression, builtins the (name, function) pairs of the builtins it calls,
+# cost the timebox.Usage of its evaluation beyond that of the folded node
+class FoldedNode(Node):
+    __slots__ = ("expression", "builtins", "cost")
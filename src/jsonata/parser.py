@@ -27,7 +27,7 @@
 import copy
 from typing import Any, MutableSequence, Optional, Sequence
 
-from jsonata import jexception, tokenizer, signature, utils
+from jsonata import jexception, nodes, tokenizer, signature, utils
 from jsonata.regex_engine import RegexEngine, default_regex_engine
 
 
@@ -51,7 +51,7 @@ class Parser:
             nxt = self.lexer.next(False)
         return remaining
 
-    class Symbol:
+    class Symbol(nodes.Node):
         # Symbol s
 
         # Procedure:
@@ -154,6 +154,7 @@ class Parser:
         index: Optional[Any]
         _jsonata_lambda: bool
         ancestor: 'Optional[Parser.Symbol]'
+        builtin: Optional[Any]
 
         def __init__(self, outer_instance, id=None, bp=0):
             self._outer_instance = outer_instance
@@ -225,6 +226,8 @@ class Parser:
             self.index = None
             self._jsonata_lambda = False
             self.ancestor = None
+            self.compiled = None
+            self.builtin = None
 
         def create(self):
             # We want a shallow clone (do not duplicate outer class!)
@@ -420,6 +423,7 @@ class Parser:
     dbg: bool
     source: Optional[str]
     recover: bool
+    lower_ast: bool
     node: Optional[Symbol]
     lexer: Optional[tokenizer.Tokenizer]
     symbol_table: dict[str, Symbol]
@@ -432,6 +436,7 @@ class Parser:
         self.dbg = False
         self.source = None
         self.recover = False
+        self.lower_ast = True
         self.node = None
         self.lexer = None
         self.symbol_table = {}
@@ -1432,7 +1437,79 @@ class Parser:
             # error - trying to derive ancestor at top level
             raise jexception.JException("S0217", expr.position, expr.type)
 
+        if self.lower_ast:
+            expr = Parser.lower(expr)
+
         if self.errors:
             expr.errors = self.errors
 
         return expr
+
+    # Node class for each type of processed Symbol; symbols without a type
+    # are the group, sort term and ancestor slot records of process_ast
+    _LOWERED_TYPES = {
+        "path": nodes.PathNode,
+        "binary": nodes.BinaryNode,
+        "bind": nodes.BinaryNode,
+        "apply": nodes.BinaryNode,
+        "unary": nodes.UnaryNode,
+        "function": nodes.FunctionNode,
+        "partial": nodes.FunctionNode,
+        "lambda": nodes.LambdaNode,
+        "condition": nodes.ConditionNode,
+        "block": nodes.BlockNode,
+        "transform": nodes.TransformNode,
+        "sort": nodes.SortNode,
+        "parent": nodes.ParentNode,
+        "filter": nodes.FilterNode,
+        "index": nodes.Node,
+        "name": nodes.Node,
+        "string": nodes.Node,
+        "number": nodes.Node,
+        "value": nodes.Node,
+        "wildcard": nodes.Node,
+        "descendant": nodes.Node,
+        "variable": nodes.VariableNode,
+        "regex": nodes.Node,
+        "operator": nodes.Node,
+    }
+
+    #
+    # Lower a processed AST into the compact node classes of jsonata.nodes
+    # @param {Object} expr - processed AST (see process_ast)
+    # @returns {Object} the equivalent tree of nodes.Node objects
+    #
+    @staticmethod
+    def lower(expr: Optional[Symbol]) -> Optional[nodes.Node]:
+        return Parser._lower(expr, {})
+
+    @staticmethod
+    def _lower(value: Any, lowered: dict[int, Any]) -> Any:
+        if isinstance(value, list):
+            return [Parser._lower(item, lowered) for item in value]
+        if not isinstance(value, Parser.Symbol):
+            return value
+        # nodes can be shared (e.g. ancestor slots), so keep their identity
+        node = lowered.get(id(value))
+        if node is not None:
+            return node
+
+        if value.type is not None:
+            cls = Parser._LOWERED_TYPES.get(value.type)
+        elif value.lhs_object is not None:
+            cls = nodes.GroupNode
+        elif value.expression is not None:
+            cls = nodes.SortTermNode
+        elif value.label is not None:
+            cls = nodes.SlotNode
+        else:
+            cls = None
+        if cls is None:
+            # not produced by process_ast (e.g. an error in recover mode)
+            return value
+
+        node = cls.__new__(cls)
+        lowered[id(value)] = node
+        for name in cls.field_names():
+            setattr(node, name, Parser._lower(getattr(value, name, None), lowered))
+        return node
@@ -0,0 +1,88 @@
+#
+# Copyright Robert Yokota
+#
+# Licensed under the Apache License, Version 2.0 (the "License")
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from typing import Any, Mapping, Optional
+
+from jsonata import nodes
+
+
+#
+# Resolves variable references of a lowered AST against the builtin
+# functions.
+#
+# A reference to a builtin (e.g. $sum) whose name is not bound anywhere
+# by the expression itself (by :=, a lambda parameter, or a focus or index
+# variable) can only be shadowed by bindings made outside the expression:
+# the frame created by Jsonata.evaluate, the expression's own environment
+# (assign, register_function, ...) or a binding frame passed in. The
+# resolver stores the builtin on such references (Node.builtin), and the
+# evaluator then only searches those external frames (Frame.lookup_builtin)
+# instead of every frame of the chain.
+#
+# Expressions that reference $eval are left unresolved, as the evaluated
+# text can bind names in the enclosing frames.
+#
+class Resolver:
+
+    #
+    # Resolve the builtin references of an expression tree
+    # @param {Object} expr - lowered AST
+    # @param {Object} builtins - name -> function of the builtin functions
+    # @returns {Integer} the number of resolved references
+    #
+    @staticmethod
+    def resolve(expr: Optional[nodes.Node], builtins: Mapping[str, Any]) -> int:
+        variables = []
+        bound = set()
+        Resolver._collect(expr, variables, bound, set())
+        if "eval" in bound or any(variable.value == "eval" for variable in variables):
+            return 0
+        resolved = 0
+        for variable in variables:
+            name = variable.value
+            if name not in bound and name in builtins:
+                variable.builtin = builtins[name]
+                resolved += 1
+        return resolved
+
+    @staticmethod
+    def _collect(value: Any, variables: list, bound: set, seen: set) -> None:
+        if isinstance(value, list):
+            for item in value:
+                Resolver._collect(item, variables, bound, seen)
+            return
+        if not isinstance(value, nodes.Node) or id(value) in seen:
+            return
+        seen.add(id(value))
+
+        type = value.type
+        if isinstance(value, nodes.VariableNode):
+            variables.append(value)
+        elif type == "bind":
+            bound.add(str(value.lhs.value))
+        elif type == "lambda":
+            bound.update(str(arg.value) for arg in value.arguments)
+        elif type == "index":
+            bound.add(str(value.value))
+        # focus (@$v) and index (#$i) variables of a step
+        if value.focus is not None:
+            bound.add(str(value.focus))
+        if isinstance(value.index, str):
+            bound.add(value.index)
+
+        for name, child in value.items():
+            if name != "ancestor" and name != "builtin" and name != "compiled":
+                Resolver._collect(child, variables, bound, seen)
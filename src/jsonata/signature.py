@@ -315,6 +315,29 @@ class Signature:
     def get_number_of_args(self) -> int:
         return len(self._params)
 
+    #
+    # Returns true if a missing argument is taken from the context
+    #
+    def takes_context(self) -> bool:
+        return any(p.context for p in self._params)
+
+    #
+    # Returns true if validate substitutes the context for a missing argument
+    # of args
+    #
+    def uses_context(self, args: Sequence[Any]) -> bool:
+        is_valid = self._regex.fullmatch("".join(self.get_symbol(arg) for arg in args))
+        if is_valid is None:
+            return False
+        return any(param.context and param.regex is not None and is_valid.group(index + 1) == ""
+                   for index, param in enumerate(self._params))
+
+    #
+    # Returns true if an argument can be a function
+    #
+    def takes_function(self) -> bool:
+        return any("f" in p.type for p in self._params)
+
     #
     # Returns the minimum # of arguments.
     # I.e. the # of all non-optional arguments.
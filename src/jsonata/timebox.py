@@ -20,14 +20,73 @@
 #   Licensed under the Apache License, Version 2.0 (the "License")
 #
 
+import copy
+import threading
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Optional
 
 from jsonata import jexception
 
 
+@dataclass
+class Usage:
+    """
+    Cost of an evaluation: the evaluator steps it took and the items of the
+    sequences and arrays its steps returned. Their sum is checked against
+    the budget of a Timebox.
+    """
+
+    steps: int = 0
+    items: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.steps + self.items
+
+
+#
+# Token cancelling the evaluations it is passed to (see Jsonata.evaluate),
+# from another thread: when cancel() is called on it, when the event it
+# wraps is set, or once its deadline (a time.monotonic() value) has passed.
+# Evaluations check it at the same time as their clock (see Timebox), and
+# raise jexception.EvaluationCancelled.
 #
-# Configure max runtime / max recursion depth.
+class CancellationToken:
+    event: threading.Event
+    deadline: Optional[float]
+    parent: 'Optional[CancellationToken]'
+
+    def __init__(self, event: Optional[threading.Event] = None, deadline: Optional[float] = None):
+        self.event = event if event is not None else threading.Event()
+        self.deadline = deadline
+        self.parent = None
+
+    #
+    # Returns a token cancelled after the given number of seconds
+    #
+    @staticmethod
+    def after(seconds: float) -> 'CancellationToken':
+        return CancellationToken(deadline=time.monotonic() + seconds)
+
+    #
+    # Returns a token cancelled when this one is, or by its own cancel()
+    #
+    def child(self) -> 'CancellationToken':
+        token = CancellationToken(deadline=self.deadline)
+        token.parent = self
+        return token
+
+    def cancel(self) -> None:
+        self.event.set()
+
+    def is_cancelled(self) -> bool:
+        return (self.event.is_set() or (self.deadline is not None and time.monotonic() > self.deadline) or
+                (self.parent is not None and self.parent.is_cancelled()))
+
+
+#
+# Configure max runtime / max recursion depth / evaluation budget.
 # See Frame.set_runtime_bounds - usually not used directly
 #
 class Timebox:
@@ -35,46 +94,146 @@ class Timebox:
     # Protect the process from a runaway expression
     # i.e. Infinite loop (tail recursion), or excessive stack growth
     #
-    # @param {Object} expr - expression to protect
+    # A timebox bound to a frame (see Jsonata.Frame.bounds) holds the bounds
+    # of the evaluations in that frame. Each evaluation runs its own copy
+    # (see begin), which the evaluator keeps in its evaluation context: it
+    # counts the depth of the expressions being evaluated, and ticks once
+    # per evaluated expression, applied function and iteration of a higher
+    # order function. The clock is only read every `interval` ticks,
+    # from a monotonic source, so a timeout may be detected up to `interval`
+    # steps late.
+    #
+    # The budget is deterministic: each tick costs one step, and each
+    # sequence or array returned by an evaluated expression costs its number
+    # of items (see Usage). Unlike the timeout, it does not depend on the
+    # load of the host.
+    #
+    # @param {Object} expr - environment (Jsonata.Frame) to protect, or None
     # @param {Number} timeout - max time in ms, or None for no time limit
     # @param {Number} max_depth - max stack depth, or None for no depth limit
+    # @param {Number} interval - number of ticks between two clock readings
+    # @param {Number} budget - max steps plus items, or None for no budget
+    # @param {Object} cancel - CancellationToken, or None
     #
 
+    INTERVAL = 64
+
     timeout: Optional[int]
     max_depth: Optional[int]
+    budget: Optional[int]
+    cancel: Optional[CancellationToken]
+    interval: int
     time: int
+    deadline: Optional[float]
     depth: int
+    steps: int
+    items: int
+    countdown: int
+    spec: 'Timebox'
 
-    def __init__(self, expr, timeout: Optional[int] = None, max_depth: Optional[int] = None):
+    def __init__(self, expr, timeout: Optional[int] = None, max_depth: Optional[int] = None,
+                 interval: Optional[int] = None, budget: Optional[int] = None,
+                 cancel: Optional[CancellationToken] = None):
         self.timeout = timeout
         self.max_depth = max_depth
+        self.budget = budget
+        self.cancel = cancel
+        self.interval = interval if interval is not None else Timebox.INTERVAL
+        self.spec = self
+        self.reset()
+        if expr is not None:
+            expr.bounds = self
+
+    def reset(self) -> None:
         self.time = Timebox.current_milli_time()
+        self.deadline = time.monotonic() + self.timeout / 1000 if self.timeout is not None else None
         self.depth = 0
+        self.steps = 0
+        self.items = 0
+        self.countdown = self.interval
 
-        # register callbacks
-        def entry_callback(exp, input, env):
-            if env.is_parallel_call:
-                return
-            self.depth += 1
-            self.check_runaway()
+    #
+    # Returns a copy of these bounds for an evaluation, with its clock
+    # started
+    #
+    def begin(self) -> 'Timebox':
+        if self.cancel is not None and self.cancel.is_cancelled():
+            raise jexception.EvaluationCancelled(-1)
+        running = copy.copy(self)
+        running.reset()
+        return running
+
+    #
+    # Returns a copy of these running bounds for a branch of the evaluation
+    # that runs concurrently with others (see Jsonata.eval_branches)
+    #
+    def fork(self) -> 'Timebox':
+        return copy.copy(self)
+
+    #
+    # Adds the steps and items of the branches forked from these bounds,
+    # once they have all finished
+    #
+    def join(self, branches: list['Timebox']) -> None:
+        steps, items = self.steps, self.items
+        for branch in branches:
+            self.steps += branch.steps - steps
+            self.items += branch.items - items
+        if self.budget is not None and self.steps + self.items > self.budget:
+            raise jexception.JException("D1014", -1, self.budget)
 
-        expr.set_evaluate_entry_callback(entry_callback)
+    #
+    # Adds the cost of work done ahead of the evaluation, e.g. of the
+    # constant subexpressions folded at parse time (see Jsonata.evaluate_folded)
+    #
+    def charge(self, usage: Usage) -> None:
+        self.steps += usage.steps
+        self.items += usage.items
+        if self.budget is not None and self.steps + self.items > self.budget:
+            raise jexception.JException("D1014", -1, self.budget)
+
+    def usage(self) -> Usage:
+        return Usage(self.steps, self.items)
+
+    def enter(self, environment) -> None:
+        if not environment.is_parallel_call:
+            self.depth += 1
+            if self.max_depth is not None and self.depth > self.max_depth:
+                # stack too deep
+                raise jexception.JException("D1011", -1)
+        self.tick()
 
-        def exit_callback(exp, input, env, res):
-            if env.is_parallel_call:
-                return
+    def exit(self, environment, result: Optional[Any]) -> None:
+        if not environment.is_parallel_call:
             self.depth -= 1
-            self.check_runaway()
+        if isinstance(result, list):
+            self.items += len(result)
+            if self.budget is not None and self.steps + self.items > self.budget:
+                raise jexception.JException("D1014", -1, self.budget)
 
-        expr.set_evaluate_exit_callback(exit_callback)
+    def tick(self) -> None:
+        self.steps += 1
+        if self.budget is not None and self.steps + self.items > self.budget:
+            raise jexception.JException("D1014", -1, self.budget)
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.check_time()
+
+    def check_time(self) -> None:
+        self.countdown = self.interval
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            # expression has run for too long
+            raise jexception.JException("D1012", -1, self.timeout)
+        if self.cancel is not None and self.cancel.is_cancelled():
+            raise jexception.EvaluationCancelled(-1)
 
     def check_runaway(self) -> None:
         if self.max_depth is not None and self.depth > self.max_depth:
             # stack too deep
             raise jexception.JException("D1011", -1)
-        if self.timeout is not None and Timebox.current_milli_time() - self.time > self.timeout:
-            # expression has run for too long
-            raise jexception.JException("D1012", -1, self.timeout)
+        if self.budget is not None and self.steps + self.items > self.budget:
+            raise jexception.JException("D1014", -1, self.budget)
+        self.check_time()
 
     @staticmethod
     def current_milli_time() -> int:
@@ -21,12 +21,17 @@
 #
 
 import math
-from typing import Any, MutableMapping, MutableSequence, Optional, Iterable
+from typing import Any, Iterator, MutableMapping, MutableSequence, Optional, Iterable
 
 from jsonata import jexception
 
 
 class Utils:
+    # Maximum nesting depth of the arrays and objects walked by the
+    # evaluator (input validation, descendants, $clone, null conversion);
+    # deeper data raises D1013
+    MAX_DATA_DEPTH = 10000
+
     class NullValue:
         def __repr__(self):
             return "null"
@@ -108,6 +113,60 @@ class Utils:
             return True
         return False
 
+    #
+    # Returns a hashable key for a value, such that two values have equal
+    # keys if and only if they are is_deep_equal: numbers compare by value
+    # (1 and 1.0 are equal), booleans never equal numbers, lists compare
+    # element-wise and dicts regardless of key order.
+    #
+    # @throws TypeError for values that cannot be hashed
+    #
+    @staticmethod
+    def deep_equal_key(value: Optional[Any]) -> Any:
+        if isinstance(value, bool):
+            return Utils._BOOL_KEYS[value]
+        if isinstance(value, (int, str)):
+            return value
+        if isinstance(value, float):
+            # nan never equals anything, itself included
+            return value if not math.isnan(value) else object()
+        if isinstance(value, list):
+            return Utils._LIST_KEY, tuple(Utils.deep_equal_key(item) for item in value)
+        if isinstance(value, dict):
+            return Utils._DICT_KEY, frozenset((key, Utils.deep_equal_key(item)) for key, item in value.items())
+        return Utils._OTHER_KEY, value
+
+    _BOOL_KEYS = {False: ("bool", False), True: ("bool", True)}
+    _LIST_KEY = "list"
+    _DICT_KEY = "dict"
+    _OTHER_KEY = "other"
+
+    #
+    # Appends value to sequence in place, with the same result as
+    # sequence = Functions.append(sequence, value) (which copies sequence
+    # into a new JList on every call): a list value is spliced in, and a
+    # non-undefined value clears the flags of the sequence, as the copy
+    # would have.
+    # @param {JList} sequence - JList owned by the caller
+    # @param {Object} value - value to append
+    # @returns {JList} sequence
+    #
+    @staticmethod
+    def append_to_sequence(sequence: 'Utils.JList', value: Optional[Any]) -> 'Utils.JList':
+        # disregard undefined args
+        if value is None:
+            return sequence
+        sequence.sequence = False
+        sequence.outer_wrapper = False
+        sequence.tuple_stream = False
+        sequence.keep_singleton = False
+        sequence.cons = False
+        if isinstance(value, list):
+            sequence.extend(value)
+        else:
+            sequence.append(value)
+        return sequence
+
     class JList(list):
         sequence: bool
         outer_wrapper: bool
@@ -124,6 +183,86 @@ class Utils:
             self.keep_singleton = False
             self.cons = False
 
+    #
+    # Read-only containers holding the constants folded at parse time (see
+    # folder.Folder). One instance is shared by every evaluation of the
+    # expression, so the mutating methods raise
+    # jexception.ConstantModified; Utils.thaw (and convert_nulls, on the
+    # results of Jsonata.evaluate) returns mutable copies, and Utils.unfreeze
+    # deep ones, for the arguments of registered functions.
+    #
+    class FrozenList(JList):
+        def _readonly(self, *args, **kwargs):
+            raise jexception.ConstantModified()
+
+        append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+        __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+
+        def __reduce__(self):
+            return Utils.FrozenList, (list(self),)
+
+    class FrozenDict(dict):
+        def _readonly(self, *args, **kwargs):
+            raise jexception.ConstantModified()
+
+        pop = popitem = clear = update = setdefault = _readonly
+        __setitem__ = __delitem__ = __ior__ = _readonly
+
+        def __reduce__(self):
+            return Utils.FrozenDict, (dict(self),)
+
+    @staticmethod
+    def freeze(val: Optional[Any]) -> Optional[Any]:
+        if isinstance(val, dict):
+            return Utils.FrozenDict({k: Utils.freeze(v) for k, v in val.items()})
+        if isinstance(val, list):
+            return Utils.FrozenList([Utils.freeze(v) for v in val])
+        return val
+
+    @staticmethod
+    def thaw(val: Optional[Any]) -> Optional[Any]:
+        # shallow: the items of the copy may still be frozen
+        if isinstance(val, Utils.FrozenList):
+            return Utils.JList(val)
+        if isinstance(val, Utils.FrozenDict):
+            return dict(val)
+        return val
+
+    @staticmethod
+    def unfreeze(val: Optional[Any]) -> Optional[Any]:
+        # deep: the items of frozen containers are frozen too (see freeze),
+        # and the arrays and objects built by the evaluation may hold frozen
+        # ones, which are replaced in place by copies
+        if isinstance(val, (Utils.FrozenList, Utils.FrozenDict)):
+            return Utils._unfreeze_constant(val)
+        stack = [val]
+        seen = set()
+        while stack:
+            container = stack.pop()
+            if isinstance(container, list):
+                items = list(enumerate(container))
+            elif isinstance(container, dict):
+                items = list(container.items())
+            else:
+                continue
+            if id(container) in seen:
+                continue
+            seen.add(id(container))
+            for k, v in items:
+                if isinstance(v, (Utils.FrozenList, Utils.FrozenDict)):
+                    container[k] = Utils._unfreeze_constant(v)
+                elif isinstance(v, (list, dict)):
+                    stack.append(v)
+        return val
+
+    @staticmethod
+    def _unfreeze_constant(val: Optional[Any]) -> Optional[Any]:
+        if isinstance(val, Utils.FrozenList):
+            return Utils.JList(Utils._unfreeze_constant(v) for v in val)
+        if isinstance(val, Utils.FrozenDict):
+            return {k: Utils._unfreeze_constant(v) for k, v in val.items()}
+        return val
+
     class RangeList(list):
         a: int
         b: int
@@ -169,28 +308,50 @@ class Utils:
 
     @staticmethod
     def convert_dict_nulls(res: MutableMapping[str, Any]) -> None:
-        for key, val in res.items():
-            v = Utils.convert_value(val)
-            if v is not val:
-                res[key] = v
-            Utils.recurse(val)
+        Utils.recurse(res)
 
     @staticmethod
     def convert_list_nulls(res: MutableSequence[Any]) -> None:
-        for i, val in enumerate(res):
-            v = Utils.convert_value(val)
-            if v is not val:
-                res[i] = v
-            Utils.recurse(val)
+        Utils.recurse(res)
 
+    #
+    # Converts the nulls nested in a dict or list in place, and replaces the
+    # nested frozen containers by copies. The walk keeps its own stack of
+    # (container, iterator over its entries), so deeply nested data does not
+    # exhaust the interpreter stack; it is limited to MAX_DATA_DEPTH levels.
+    #
     @staticmethod
-    def recurse(val: Optional[Any]) -> None:
-        if isinstance(val, dict):
-            Utils.convert_dict_nulls(val)
-        if isinstance(val, list):
-            Utils.convert_list_nulls(val)
+    def recurse(val: Optional[Any], max_depth: Optional[int] = None) -> None:
+        if not isinstance(val, (dict, list)):
+            return
+        max_depth = Utils.MAX_DATA_DEPTH if max_depth is None else max_depth
+        null, frozen = Utils.NULL_VALUE, (Utils.FrozenList, Utils.FrozenDict)
+        stack = [(val, Utils.entries(val))]
+        while stack:
+            container, entries = stack[-1]
+            for key, item in entries:
+                if item is null:
+                    container[key] = None
+                elif isinstance(item, (dict, list)):
+                    if isinstance(item, frozen):
+                        item = container[key] = Utils.thaw(item)
+                    if len(stack) >= max_depth:
+                        raise jexception.JException("D1013", -1, max_depth)
+                    stack.append((item, Utils.entries(item)))
+                    break
+            else:
+                stack.pop()
 
+    #
+    # Returns an iterator over the (key, value) pairs of a dict or the
+    # (index, item) pairs of a list
+    #
     @staticmethod
-    def convert_nulls(res: Optional[Any]) -> Optional[Any]:
-        Utils.recurse(res)
+    def entries(container: Any) -> Iterator[tuple[Any, Any]]:
+        return iter(container.items()) if isinstance(container, dict) else enumerate(container)
+
+    @staticmethod
+    def convert_nulls(res: Optional[Any], max_depth: Optional[int] = None) -> Optional[Any]:
+        res = Utils.thaw(res)
+        Utils.recurse(res, max_depth)
         return Utils.convert_value(res)
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import jsonata
+
+
+class InFlight:
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.count = 0
+        self.all = None
+
+    # completes once `expected` calls are awaited at the same time
+    async def call(self, value):
+        if self.all is None:
+            self.all = asyncio.Event()
+        self.count += 1
+        if self.count == self.expected:
+            self.all.set()
+        await asyncio.wait_for(self.all.wait(), 5)
+        return value * 2
+
+
+class TestAsync:
+
+    @pytest.mark.parametrize("text,calls,expected", [
+        ("[$f(1), $f(2), $f(3)]", 3, [2, 4, 6]),
+        ("{'a': $f(1), 'b': [$f(2), $f(3)]}", 3, {"a": 2, "b": [4, 6]}),
+        ("$sum([$f(1), $f(2)]) + $max([$f(3), $f(4)])", 2, 14),
+        ("$join([$string($f(1)), $string($f(2))], $string($f(3)))", 3, "264"),
+        ("items{name: $f(price)}", 2, {"a": 2, "b": 4}),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_concurrent(self, text, calls, expected, compile):
+        expr = jsonata.Jsonata(text, compile=compile)
+        expr.register_lambda("f", InFlight(calls).call)
+        data = {"items": [{"name": "a", "price": 1}, {"name": "b", "price": 2}]}
+        assert asyncio.run(expr.evaluate_async(data)) == expected
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_same_result(self, compile):
+        text = "Account.Order.{'id': OrderID, 'total': $sum(Product.(Price * Quantity)), 'items': [Product.SKU]}"
+        data = {"Account": {"Order": [
+            {"OrderID": "o1", "Product": [{"SKU": "a", "Price": 2, "Quantity": 3}, {"SKU": "b", "Price": 1, "Quantity": 1}]},
+            {"OrderID": "o2", "Product": [{"SKU": "c", "Price": 5, "Quantity": 2}]},
+        ]}}
+        expr = jsonata.Jsonata(text, compile=compile)
+        consumed = []
+        expected = expr.evaluate(data, cancel=jsonata.CancellationToken(), usage=consumed.append)
+        assert asyncio.run(expr.evaluate_async(data, usage=consumed.append)) == expected
+        # the branches add up to the same cost
+        assert len(consumed) == 2 and consumed[0] == consumed[1]
+
+    def test_first_error(self):
+        async def fail(code):
+            await asyncio.sleep(0.01 if code == "first" else 0)
+            raise jsonata.JException(code, 0)
+
+        expr = jsonata.Jsonata("[$f(1), $fail('first'), $fail('second')]")
+        expr.register_lambda("f", lambda v: v)
+        expr.register_lambda("fail", fail)
+        with pytest.raises(jsonata.JException) as err:
+            asyncio.run(expr.evaluate_async(None))
+        assert err.value.error == "first"
+
+    @pytest.mark.parametrize("text,expected", [
+        ("[$x := $f(1), $g($x)]", [1, 1]),
+        ("$h($z := $f(3), $g($z))", [3, 3]),
+        ("{'a': $x := $f(5), 'b': $g($x)}", {"a": 5, "b": 5}),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_assignment_in_sibling(self, text, expected, compile):
+        # the assignment is seen by the siblings after it, as with evaluate
+        async def f(v):
+            await asyncio.sleep(0.01)
+            return v
+
+        expr = jsonata.Jsonata(text, compile=compile)
+        expr.register_lambda("f", f)
+        expr.register_lambda("g", lambda v: v)
+        expr.register_lambda("h", lambda a, b: [a, b])
+        assert asyncio.run(expr.evaluate_async(None)) == expected
+
+    def test_awaitable_in_evaluate(self):
+        async def f():
+            return 1
+
+        expr = jsonata.Jsonata("$f()")
+        expr.register_lambda("f", f)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "T1011"
+
+    def test_event_loop_not_blocked(self):
+        expr = jsonata.Jsonata("$f() & $f()")
+        expr.register_lambda("f", lambda: time.sleep(0.1) or threading.current_thread().name)
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            ticker = asyncio.ensure_future(tick())
+            result = await expr.evaluate_async(None)
+            ticker.cancel()
+            return result
+
+        assert asyncio.run(main()).startswith("jsonata")
+        assert len(ticks) > 5
+
+    def test_nested_evaluation(self):
+        # a coroutine may evaluate expressions, synchronously or not
+        async def f(v):
+            inner = jsonata.Jsonata("$g($) + 1")
+            inner.register_lambda("g", g)
+            return jsonata.Jsonata("$ * 10").evaluate(v) + await inner.evaluate_async(v)
+
+        async def g(v):
+            return v
+
+        expr = jsonata.Jsonata("[$f(1), $f(2)]")
+        expr.register_lambda("f", f)
+        assert asyncio.run(expr.evaluate_async(None)) == [12, 23]
+
+    def test_cancel_task(self):
+        started = threading.Event()
+        cancelled = []
+
+        async def wait():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        expr = jsonata.Jsonata("$wait()")
+        expr.register_lambda("wait", wait)
+
+        async def main():
+            task = asyncio.ensure_future(expr.evaluate_async(None))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        assert cancelled == [1]
+
+    def test_cancel_token(self):
+        expr = jsonata.Jsonata("($f := function($n) { $f($n + 1) }; $f(0))")
+        token = jsonata.CancellationToken.after(0.05)
+        with pytest.raises(jsonata.EvaluationCancelled):
+            asyncio.run(expr.evaluate_async(None, {"x": 1}, token))
+
+    def test_child_token(self):
+        token = jsonata.CancellationToken()
+        child = token.child()
+        child.cancel()
+        assert child.is_cancelled() and not token.is_cancelled()
+        child = token.child()
+        token.cancel()
+        assert child.is_cancelled()
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+import jsonata
+
+RECORDS = [{"name": "r%d" % i, "items": [{"price": p, "quantity": i % 3} for p in range(i % 5)]} for i in range(20)]
+
+
+class TestBatch:
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_same_results(self, compile):
+        expr = jsonata.Jsonata("{'name': $uppercase(name), 'total': $sum(items.(price * quantity * $k))}",
+                               compile=compile)
+        expected = [expr.evaluate(record, {"k": 2}) for record in RECORDS]
+        assert list(expr.evaluate_many(RECORDS, {"k": 2})) == expected
+        assert list(expr.evaluate_many([[1, 2], None, 3], None)) == [expr.evaluate(v) for v in [[1, 2], None, 3]]
+
+    @pytest.mark.parametrize("text", ["$n := ($exists($n) ? $n : 0) + $", "[$seen, $seen := $]"])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_assignments_per_input(self, text, compile):
+        expr = jsonata.Jsonata(text, compile=compile)
+        assert list(expr.evaluate_many([1, 2, 3])) == [expr.evaluate(v) for v in [1, 2, 3]]
+        assert list(expr.evaluate_many([1, 2, 3], {"k": 1})) == [expr.evaluate(v, {"k": 1}) for v in [1, 2, 3]]
+
+    def test_errors(self):
+        expr = jsonata.Jsonata("a + 1")
+        results = list(expr.evaluate_many([{"a": 1}, {"a": "x"}, {"a": 2}, {"a": {1}}]))
+        assert results[0] == 2 and results[2] == 3
+        assert isinstance(results[1], jsonata.JException) and results[1].error == "T2001"
+        assert "left side" in str(results[1])
+        # invalid input
+        assert isinstance(results[3], ValueError)
+
+    def test_budget_per_input(self):
+        expr = jsonata.Jsonata("$count([1..n])", budget=500)
+        results = list(expr.evaluate_many([{"n": 100}, {"n": 1000}, {"n": 200}]))
+        assert results[0] == 100 and results[2] == 200
+        assert results[1].error == "D1014"
+
+    def test_cancelled(self):
+        token = jsonata.CancellationToken()
+        expr = jsonata.Jsonata("a")
+        results = expr.evaluate_many(({"a": i} for i in itertools.count()), cancel=token)
+        assert next(results) == 0
+        assert next(results) == 1
+        token.cancel()
+        with pytest.raises(jsonata.EvaluationCancelled):
+            next(results)
+
+    def test_lazy(self):
+        expr = jsonata.Jsonata("$ * 2")
+        assert list(itertools.islice(expr.evaluate_many(itertools.count()), 3)) == [0, 2, 4]
+
+    def test_context(self):
+        expr = jsonata.Jsonata("$millis()")
+        results = expr.evaluate_many(range(3))
+        first = next(results)
+        # evaluated in between
+        assert expr.evaluate(None) >= first
+        assert list(results) == [first, first]
+        assert expr.environment.lookup("$") is None
+        assert jsonata.Jsonata.CONTEXT.get() is None
@@ -0,0 +1,65 @@
+import jsonata
+import pytest
+
+
+DATA = {
+    "Account": {
+        "Order": [
+            {"OrderID": "order1", "Product": [{"Name": "Hat", "Price": 34.45, "Quantity": 2},
+                                              {"Name": "Cloak", "Price": 107.99, "Quantity": 1}]},
+            {"OrderID": "order2", "Product": [{"Name": "Hat", "Price": 34.45, "Quantity": 4},
+                                              {"Name": "Bag", "Price": 21.67, "Quantity": 1}]},
+        ]
+    }
+}
+
+EXPRESSIONS = [
+    "Account.Order.Product.Name",
+    "Account.Order[0].OrderID",
+    "Account.Order.Product[Price > 30].Name",
+    "$sum(Account.Order.Product.(Price * Quantity))",
+    "Account.Order.Product{Name: $sum(Quantity)}",
+    "Account.Order.Product^(>Price).Name",
+    "Account.Order@$o.Product@$p.{'order': $o.OrderID, 'product': $p.Name}",
+    "Account.Order#$i.Product.[Name, $i]",
+    "Account.%.OrderID",
+    "($f := function($x) { $x > 1 ? $x * $f($x - 1) : 1 }; $f(10))",
+    "[1..5].($ * 2)",
+    "Account.Order.Product.Name ~> $join(', ')",
+    "$map(Account.Order, function($o) { $count($o.Product) })",
+    "Account ~> |Order.Product|{'Total': Price * Quantity}, ['Price']|",
+    "$eval('Account.Order[1].OrderID')",
+    "($x := 'a'; $y := $x & 'b'; [$x, $y])",
+    "Account.Order[[0..1]].Product[-1].Name",
+    "**.Price",
+    "Account.*.OrderID",
+    "'Hat' in Account.Order.Product.Name and true",
+]
+
+
+class TestCompile:
+
+    @pytest.mark.parametrize("expr", EXPRESSIONS)
+    def test_matches_interpreter(self, expr):
+        expected = jsonata.Jsonata(expr).evaluate(DATA)
+        assert jsonata.Jsonata(expr, compile=True).evaluate(DATA) == expected
+
+    def test_reuse(self):
+        expr = jsonata.Jsonata.jsonata("Account.Order.Product[Quantity > $min].Name", compile=True)
+        assert expr.evaluate(DATA, {"min": 1}) == ["Hat", "Hat"]
+        assert expr.evaluate(DATA, {"min": 3}) == "Hat"
+        assert expr.evaluate(DATA, {"min": 5}) is None
+
+    def test_errors(self):
+        with pytest.raises(jsonata.JException) as e:
+            jsonata.Jsonata("1 + 'a'", compile=True).evaluate(None)
+        assert e.value.error == "T2002"
+        with pytest.raises(jsonata.JException) as e:
+            jsonata.Jsonata("$foo()", compile=True).evaluate(None)
+        assert e.value.error == "T1006"
+
+    def test_runtime_bounds(self):
+        expr = jsonata.Jsonata("($f := function($x) { $f($x + 1) + 1 }; $f(0))", stack=50, compile=True)
+        with pytest.raises(jsonata.JException) as e:
+            expr.evaluate(None)
+        assert e.value.error == "D1011"
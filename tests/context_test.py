@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import jsonata
+
+
+class TestContext:
+
+    def test_nested_evaluation(self):
+        # evaluating another expression in a registered function does not
+        # change the context of the enclosing evaluation
+        expr = jsonata.Jsonata("[$f(), $eval('a'), $map([1, 2], $g)]")
+        expr.register_lambda("f", lambda: jsonata.Jsonata("b").evaluate({"b": 1}))
+        expr.register_lambda("g", lambda v: v * 10)
+        assert expr.evaluate({"a": 2}) == [1, 2, 10, 20]
+
+    def test_context_per_evaluation(self):
+        contexts = []
+        expr = jsonata.Jsonata("$f() & $f()")
+        expr.register_lambda("f", lambda: contexts.append(jsonata.Jsonata.current()) or "x")
+        assert expr.evaluate(None) == "xx"
+        assert expr.evaluate(None) == "xx"
+        assert contexts[0] is contexts[1] and contexts[2] is contexts[3]
+        assert contexts[0] is not contexts[2] and contexts[0] is not expr
+        assert jsonata.Jsonata.CONTEXT.get() is None
+
+    def test_timestamp(self):
+        expr = jsonata.Jsonata("[$millis(), $f(), $millis()]")
+        expr.register_lambda("f", lambda: time.sleep(0.01) or jsonata.Jsonata("$millis()").evaluate(None))
+        first, inner, last = expr.evaluate(None)
+        assert first == last and inner > first
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_threads(self, compile):
+        expr = jsonata.Jsonata("$string($sum($map(items, function($v) { $v * $k }))) & $eval('name')",
+                               compile=compile)
+        errors = []
+        barrier = threading.Barrier(8)
+
+        def run(k):
+            barrier.wait()
+            for i in range(200):
+                data = {"items": [1, 2, i], "name": "-%d-%d" % (k, i)}
+                if expr.evaluate(data, {"k": k}) != "%d-%d-%d" % ((3 + i) * k, k, i):
+                    errors.append((k, i))
+
+        threads = [threading.Thread(target=run, args=(k,)) for k in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_usage_per_evaluation(self, compile):
+        # concurrent evaluations report their own usage
+        expr = jsonata.Jsonata("$sum($map(items, function($v) { $f($v) }))", compile=compile, budget=100000)
+        expr.register_lambda("f", lambda v: time.sleep(0.0001) or v)
+        expected = {}
+        for n in range(1, 5):
+            expr.evaluate({"items": list(range(n))}, usage=lambda usage: expected.setdefault(n, usage))
+        errors = []
+        barrier = threading.Barrier(4)
+
+        def run(n):
+            barrier.wait()
+            for _ in range(50):
+                reported = []
+                expr.evaluate({"items": list(range(n))}, usage=reported.append)
+                if reported != [expected[n]]:
+                    errors.append((n, reported))
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert expr.usage is None
+
+    def test_root_per_evaluation(self):
+        # evaluations without bindings do not share the root object
+        expr = jsonata.Jsonata("$$.a & $f() & $$.a")
+        expr.register_lambda("f", lambda: time.sleep(0.001) or "-")
+        errors = []
+
+        def run(k):
+            for _ in range(20):
+                if expr.evaluate({"a": str(k)}) != "%d-%d" % (k, k):
+                    errors.append(k)
+
+        threads = [threading.Thread(target=run, args=(k,)) for k in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert expr.environment.lookup("$") is None
+
+    def test_outside_evaluation(self):
+        assert jsonata.Functions.func_apply(jsonata.Jsonata("function($x) { $x + 1 }").evaluate(None), [1]) == 2
+
+    def test_deprecated(self):
+        expr = jsonata.Jsonata("$f()")
+        expr.register_lambda("f", lambda: [jsonata.Jsonata.CURRENT.jsonata, expr.get_per_thread_instance(),
+                                           jsonata.Jsonata.current()])
+        with pytest.warns(DeprecationWarning):
+            current, instance, context = expr.evaluate(None)
+        assert current is context and instance is context
+        with pytest.warns(DeprecationWarning):
+            assert not hasattr(jsonata.Jsonata.CURRENT, "jsonata")
+        with pytest.warns(DeprecationWarning):
+            instance = expr.get_per_thread_instance()
+        assert instance is not expr and instance.ast is expr.ast
+        with jsonata.Jsonata.MUTEX:
+            pass
@@ -0,0 +1,130 @@
+import json
+import sys
+
+import pytest
+
+import jsonata
+from jsonata import functions, utils
+
+
+def nested(depth, leaf=1):
+    data = leaf
+    for i in range(depth):
+        data = {"a": data} if i % 2 else [data]
+    return data
+
+
+def leaf(data, depth):
+    for _ in range(depth):
+        data = data["a"] if isinstance(data, dict) else data[0]
+    return data
+
+
+@pytest.fixture
+def max_depth():
+    saved = utils.Utils.MAX_DATA_DEPTH
+    yield
+    utils.Utils.MAX_DATA_DEPTH = saved
+
+
+class TestDepth:
+
+    # deeper than Jsonata.RECURSION_LIMIT, which the recursive walkers hit
+    DEPTH = 30000
+
+    def test_descendants(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = self.DEPTH * 2
+        expr = jsonata.Jsonata("$count(**)")
+        assert expr.evaluate(nested(self.DEPTH)) == self.DEPTH // 2 + 1
+
+    def test_descendants_order(self):
+        expr = jsonata.Jsonata("**")
+        data = {"a": {"b": [1, {"c": 2}], "d": 3}, "e": [[4]]}
+        assert expr.evaluate(data) == [data, {"b": [1, {"c": 2}], "d": 3}, 1, {"c": 2}, 2, 3, 4]
+
+    def test_validate_and_convert(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = self.DEPTH * 2
+        expr = jsonata.Jsonata("$")
+        data = nested(self.DEPTH, None)
+        result = expr.evaluate(data)
+        assert leaf(result, self.DEPTH) is None
+
+    def test_clone(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = self.DEPTH * 2
+        data = nested(self.DEPTH)
+        clone = functions.Functions.function_clone(data)
+        assert clone is not data
+        assert leaf(clone, self.DEPTH) == 1
+        assert leaf(clone, self.DEPTH - 1) is not leaf(data, self.DEPTH - 1)
+
+    @pytest.mark.parametrize("data", [
+        {"a": [1, 2.5, 1e300, float("inf"), "x", True, None], "b": {"c": {}}, "d": []},
+        {1: "int", 2.5: "float", False: "bool", None: "none", "k": (1, 2)},
+        [[[]], {"a": (1, [2])}],
+    ])
+    def test_clone_is_json_copy(self, data):
+        assert functions.Functions.function_clone(data) == json.loads(json.dumps(data))
+
+    def test_clone_special_values(self):
+        expr = jsonata.Jsonata("$clone($)")
+        expr.set_output_convert_nulls(False)
+        data = {"a": [utils.Utils.NULL_VALUE, 1]}
+        assert expr.evaluate(data) == {"a": [None, 1]}
+        assert jsonata.Jsonata("$clone({'f': $sum})").evaluate(None) == {"f": ""}
+        with pytest.raises(TypeError):
+            functions.Functions.function_clone({"a": [{1, 2}]})
+        with pytest.raises(TypeError):
+            functions.Functions.function_clone({(1, 2): 3})
+
+    def test_transform(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = self.DEPTH * 2
+        expr = jsonata.Jsonata("$ ~> |$|{'b': 1}|")
+        result = expr.evaluate({"a": nested(self.DEPTH)})
+        assert result["b"] == 1
+
+    def test_too_deep(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = 50
+        data = nested(60)
+        for text in ["$", "**", "$clone($)"]:
+            with pytest.raises(jsonata.JException) as err:
+                jsonata.Jsonata(text).evaluate(data)
+            assert err.value.error == "D1013"
+        assert jsonata.Jsonata("$count(**)").evaluate(nested(40)) == 21
+
+    def test_too_deep_results(self, max_depth):
+        utils.Utils.MAX_DATA_DEPTH = 50
+        expr = jsonata.Jsonata("$f()")
+        expr.register_lambda("f", lambda: nested(60))
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1013"
+
+    def test_circular(self):
+        data = {"a": []}
+        data["a"].append(data)
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("a").evaluate(data)
+        assert err.value.error == "D1013"
+        with pytest.raises(ValueError):
+            functions.Functions.function_clone(data)
+
+    def test_recursion_error(self):
+        # the interpreter stack is exhausted before the stack guardrail
+        expr = jsonata.Jsonata("($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(100000))")
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1011"
+
+    def test_recursion_headroom(self):
+        # by default, about as deep as the JavaScript stack allows
+        expr = jsonata.Jsonata("($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(500))")
+        assert expr.evaluate(None) == 500
+
+    def test_recursion_limit(self):
+        saved = sys.getrecursionlimit()
+        try:
+            sys.setrecursionlimit(saved + 1000)
+            jsonata.Jsonata("1")
+            assert sys.getrecursionlimit() == saved + 1000
+        finally:
+            sys.setrecursionlimit(saved)
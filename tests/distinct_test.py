@@ -0,0 +1,34 @@
+import jsonata
+from jsonata import utils
+
+
+class TestDistinct:
+
+    def test_first_seen_order(self):
+        assert jsonata.Jsonata("$distinct([3, 1, 3, 2, 1])").evaluate(None) == [3, 1, 2]
+
+    def test_booleans_and_numbers(self):
+        result = jsonata.Jsonata("$distinct([1, true, 1.0, 0, false, '1'])").evaluate(None)
+        assert result == [1, True, 0, False, "1"]
+        assert [type(v) for v in result] == [int, bool, int, bool, str]
+
+    def test_structures(self):
+        expr = jsonata.Jsonata("$distinct($)")
+        data = [{"a": 1, "b": [1, {"c": None}]}, {"b": [1.0, {"c": None}], "a": 1}, {"a": True, "b": [1, {"c": None}]},
+                [1, [2]], [1, [2.0]], [[2], 1], []]
+        assert expr.evaluate(data) == [data[0], data[2], data[3], data[5], data[6]]
+
+    def test_nulls(self):
+        expr = jsonata.Jsonata('$distinct([null, null, {"a": null}, {"a": null}])')
+        assert expr.evaluate(None) == [None, {"a": None}]
+
+    def test_unhashable(self):
+        result = jsonata.Functions.distinct([{1, 2}, {2, 1}, [{3}], [{3}], 1])
+        assert result == [{1, 2}, [{3}], 1]
+
+    def test_deep_equal_key(self):
+        values = [1, 1.0, True, False, 0, "1", None, [1, True], [1.0, True], {"a": [1]}, {"a": [True]}, {}]
+        for lhs in values:
+            for rhs in values:
+                same_key = utils.Utils.deep_equal_key(lhs) == utils.Utils.deep_equal_key(rhs)
+                assert same_key == utils.Utils.is_deep_equal(lhs, rhs), (lhs, rhs)
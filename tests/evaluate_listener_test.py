@@ -0,0 +1,77 @@
+import pytest
+
+import jsonata
+
+
+class CountingListener(jsonata.Jsonata.EvaluateListener):
+
+    def __init__(self):
+        self.entries = 0
+        self.exits = 0
+        self.types = []
+
+    def evaluate_entry(self, expr, input, environment):
+        self.entries += 1
+        self.types.append(expr.type)
+
+    def evaluate_exit(self, expr, input, environment, result):
+        self.exits += 1
+
+
+class TestEvaluateListener:
+
+    def test_no_hooks(self):
+        expr = jsonata.Jsonata("a.b")
+        assert not expr.environment.hooked
+        assert expr.evaluate({"a": {"b": 1}}) == 1
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_listener(self, compile):
+        expr = jsonata.Jsonata("$map(a, function($v) { $v * 2 })", compile=compile)
+        listener = CountingListener()
+        expr.add_evaluate_listener(listener)
+        assert expr.evaluate({"a": [1, 2, 3]}) == [2, 4, 6]
+        assert listener.entries == listener.exits
+        assert listener.types.count("binary") == 3
+
+        expr.remove_evaluate_listener(listener)
+        entries = listener.entries
+        expr.evaluate({"a": [1, 2, 3]})
+        assert listener.entries == entries
+
+    def test_listener_on_bindings_frame(self):
+        expr = jsonata.Jsonata("$x + 1")
+        frame = jsonata.Jsonata.Frame(None)
+        frame.bind("x", 1)
+        listener = CountingListener()
+        frame.add_evaluate_listener(listener)
+        assert expr.evaluate(None, frame) == 2
+        assert listener.entries == 3
+
+    def test_listener_can_abort(self):
+        class Abort(jsonata.Jsonata.EvaluateListener):
+            def evaluate_entry(self, expr, input, environment):
+                if expr.type == "function":
+                    raise jsonata.JException("D1012", -1, 0)
+
+        expr = jsonata.Jsonata("$sum(a)")
+        expr.add_evaluate_listener(Abort())
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate({"a": [1]})
+        assert err.value.error == "D1012"
+
+    def test_callbacks_on_bindings_frame(self):
+        expr = jsonata.Jsonata("($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(30))")
+        frame = jsonata.Jsonata.Frame(None)
+        frame.set_runtime_bounds(10000, 20)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None, frame)
+        assert err.value.error == "D1011"
+        assert expr.evaluate(None) == 30
+
+    def test_callbacks(self):
+        entries = []
+        expr = jsonata.Jsonata("a + 1")
+        expr.environment.set_evaluate_entry_callback(lambda exp, input, env: entries.append(exp.type))
+        assert expr.evaluate({"a": 1}) == 2
+        assert entries == ["binary", "path", "name", "number"]
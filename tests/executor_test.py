@@ -0,0 +1,127 @@
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+import jsonata
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+class TestExecutor:
+
+    @pytest.mark.parametrize("text,calls,expected", [
+        ("[$f(1), $f(2), $f(3)]", 3, [2, 4, 6]),
+        ("{'a': $f(1), 'b': $f(2)}", 2, {"a": 2, "b": 4}),
+        ("$sum([$f(1), $f(2)]) + $sum([$f(3), $f(4)])", 2, 20),
+        ("items{name: $f(price)}", 2, {"a": 2, "b": 4}),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_concurrent(self, executor, text, calls, expected, compile):
+        # each call waits for the others
+        barrier = threading.Barrier(calls, timeout=5)
+        expr = jsonata.Jsonata(text, compile=compile, executor=executor)
+        expr.register_lambda("f", lambda v: barrier.wait() is not None and v * 2)
+        data = {"items": [{"name": "a", "price": 1}, {"name": "b", "price": 2}]}
+        assert expr.evaluate(data) == expected
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_same_result(self, executor, compile):
+        text = ("Account.Order.{'id': OrderID, 'total': $sum(Product.(Price * Quantity)), "
+                "'items': [Product.SKU, [1, 2]], 'first': $substring(OrderID, 0, 1)}")
+        data = {"Account": {"Order": [
+            {"OrderID": "o1", "Product": [{"SKU": "a", "Price": 2, "Quantity": 3}, {"SKU": "b", "Price": 1, "Quantity": 1}]},
+            {"OrderID": "o2", "Product": [{"SKU": "c", "Price": 5, "Quantity": 2}]},
+        ]}}
+        expected = jsonata.Jsonata(text, compile=compile, budget=100000)
+        expr = jsonata.Jsonata(text, compile=compile, budget=100000, executor=executor)
+        consumed = []
+        assert expr.evaluate(data, usage=consumed.append) == expected.evaluate(data, usage=consumed.append)
+        assert len(consumed) == 2 and consumed[0] == consumed[1]
+
+    def test_first_error(self, executor):
+        second = threading.Event()
+
+        def fail(code):
+            if code == "first":
+                # raised after the second one
+                second.wait(5)
+            else:
+                second.set()
+            raise jsonata.JException(code, 0)
+
+        expr = jsonata.Jsonata("[1, $fail('first'), $fail('second')]", executor=executor)
+        expr.register_lambda("fail", fail)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "first"
+
+    def test_nested(self):
+        # more nested branches than threads
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            expr = jsonata.Jsonata("[[[1, 2], [3, 4]], [[5, 6], {'a': [7, 8]}]]", executor=executor)
+            assert expr.evaluate(None) == [[[1, 2], [3, 4]], [[5, 6], {"a": [7, 8]}]]
+
+    def test_bounds(self, executor):
+        text = "[1, ($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(%d))]"
+        expr = jsonata.Jsonata(text % 10, stack=50, executor=executor)
+        assert expr.evaluate(None) == [1, 10]
+        expr = jsonata.Jsonata(text % 100, stack=50, executor=executor)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1011"
+        expr = jsonata.Jsonata("[1, $count([1..1000]), $count([1..1000])]", budget=1500, executor=executor)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1014"
+
+    def test_context(self, executor):
+        expr = jsonata.Jsonata("[$f(), $f()]", executor=executor)
+        expr.register_lambda("f", lambda: jsonata.Jsonata.current().timestamp)
+        first, second = expr.evaluate(None)
+        assert first == second
+        assert jsonata.Jsonata.CONTEXT.get() is None
+
+    @pytest.mark.parametrize("text,submitted", [
+        ("[$substring($string(a), 0, 3), a.b, [1, 2], $max([a, 1]), {'a': $length('x'), 'b': a}]", 0),
+        ("[$f(1), 1, $f(2), $f(3), a]", 2),
+        ("$sum([$f(1), 1]) + $max([$f(1), $length($string(a))])", 0),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_cheap_entries_inline(self, executor, text, submitted, compile):
+        # only the entries that call registered functions are submitted, but
+        # the first one, which runs in the calling thread
+        calls = []
+
+        class Counting(concurrent.futures.Executor):
+            def submit(self, fn, *args):
+                calls.append(fn)
+                return executor.submit(fn, *args)
+
+        expr = jsonata.Jsonata(text, compile=compile)
+        expr.register_lambda("f", lambda v: v)
+        expected = expr.evaluate({"a": 1})
+        expr = jsonata.Jsonata(text, compile=compile, executor=Counting())
+        expr.register_lambda("f", lambda v: v)
+        assert expr.evaluate({"a": 1}) == expected
+        assert len(calls) == submitted
+
+    @pytest.mark.parametrize("text,expected", [
+        ("[$x := $f(1), $g($x)]", [1, 1]),
+        ("$h($z := $f(3), $g($z))", [3, 3]),
+        ("[[$f(1), $y := $f(2)], $g($y), $f(4)]", [[1, 2], 2, 4]),
+        ("{'a': $x := $f(5), 'b': $g($x)}", {"a": 5, "b": 5}),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_assignment_in_sibling(self, executor, text, expected, compile):
+        # the assignment is seen by the siblings after it, as without executor
+        expr = jsonata.Jsonata(text, compile=compile, executor=executor)
+        expr.register_lambda("f", lambda v: time.sleep(0.01) or v)
+        expr.register_lambda("g", lambda v: v)
+        expr.register_lambda("h", lambda a, b: [a, b])
+        assert expr.evaluate(None) == expected
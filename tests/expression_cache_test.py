@@ -0,0 +1,99 @@
+import threading
+
+import jsonata
+from jsonata.expression_cache import ExpressionCache
+
+
+class TestExpressionCache:
+
+    def test_constructor_reuses_ast(self):
+        jsonata.Jsonata.expression_cache.clear()
+        e1 = jsonata.Jsonata("Account.Order.Product.Name")
+        e2 = jsonata.Jsonata("Account.Order.Product.Name")
+        assert e1.ast is e2.ast
+        stats = jsonata.Jsonata.expression_cache.stats()
+        assert stats.misses == 1
+        assert stats.hits == 1
+        assert stats.entries == 1
+        assert stats.size > 0
+
+    def test_compiled_trees_are_separate(self):
+        e1 = jsonata.Jsonata("a + b")
+        e2 = jsonata.Jsonata("a + b", compile=True)
+        assert e1.ast is not e2.ast
+        assert e1.ast.compiled is None
+        assert e2.evaluate({"a": 1, "b": 2}) == 3
+
+    def test_eval_uses_cache(self):
+        jsonata.Jsonata.expression_cache.clear()
+        expr = jsonata.Jsonata("$eval('$ * 2', $)")
+        assert expr.evaluate(1) == 2
+        assert expr.evaluate(2) == 4
+        stats = jsonata.Jsonata.expression_cache.stats()
+        assert stats.misses == 2
+        assert stats.hits == 1
+
+    def test_parse_errors_are_not_cached(self):
+        cache = ExpressionCache()
+
+        def fail():
+            raise jsonata.JException("S0201", 0)
+
+        for _ in range(2):
+            try:
+                cache.get("x", fail)
+            except jsonata.JException:
+                pass
+        assert cache.stats().misses == 2
+        assert cache.stats().entries == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = ExpressionCache(max_entries=2)
+        cache.get("a", lambda: "A")
+        cache.get("b", lambda: "B")
+        cache.get("a", lambda: "A")
+        cache.get("c", lambda: "C")
+        stats = cache.stats()
+        assert stats.entries == 2
+        assert stats.evictions == 1
+        assert cache.get("a", lambda: "X") == "A"
+        assert cache.get("b", lambda: "X") == "X"
+
+    def test_memory_budget(self):
+        size = ExpressionCache.estimate_size("x" * 1000)
+        cache = ExpressionCache(max_entries=None, max_bytes=size * 2)
+        for i in range(3):
+            cache.get(i, lambda: "x" * 1000)
+        stats = cache.stats()
+        assert stats.entries == 2
+        assert stats.size <= size * 2
+        # too large for the budget on its own - returned, but not kept
+        assert cache.get("big", lambda: "x" * 10000) == "x" * 10000
+        assert cache.stats().entries == 2
+
+    def test_disabled(self):
+        cache = ExpressionCache(max_entries=0)
+        cache.get("a", lambda: "A")
+        assert cache.stats().entries == 0
+
+    def test_threads(self):
+        cache = ExpressionCache(max_entries=8)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(200):
+                    key = (n + i) % 16
+                    assert cache.get(key, lambda: key * 2) == key * 2
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors
+        stats = cache.stats()
+        assert stats.entries <= 8
+        assert stats.hits + stats.misses == 8 * 200
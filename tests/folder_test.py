@@ -0,0 +1,176 @@
+import copy
+import pickle
+
+import pytest
+
+import jsonata
+from jsonata import nodes, utils
+
+
+def unfolded(text, input=None):
+    # $eval() does not fold the expressions it evaluates
+    return jsonata.Jsonata("$eval($text, $input)").evaluate(None, {"text": text, "input": input})
+
+
+CONSTANT = [
+    "60 * 60 * 24",
+    "-(1 + 2)",
+    "\"Hello\" & \" \" & \"World\"",
+    "1 < 2 and \"a\" in [\"a\", \"b\"]",
+    "[1, [2, 3], \"a\" & \"b\", null, {\"x\": [true, false]}]",
+    "{\"a\": 1, \"b\": {\"c\": [1, 2]}, \"n\": null}",
+    "true ? [1] : 2",
+    "(1; 2; \"three\")",
+    "$uppercase(\"abc\") & $string(1.5)",
+    "$sum([1, 2, 3]) / $count([1, 2])",
+    "\"a,b,c\" ~> $split(\",\")",
+    "$match(\"abc\", /b/)",
+    "$count($keys({\"a\": 1, \"b\": 2}))",
+]
+
+
+class TestFolder:
+
+    @pytest.mark.parametrize("text", CONSTANT)
+    def test_folded(self, text):
+        expr = jsonata.Jsonata(text)
+        assert expr.ast.type in ("string", "number", "value", "folded")
+        assert expr.evaluate(None) == unfolded(text)
+
+    @pytest.mark.parametrize("text", [
+        "[[1, 2], x]",
+        "[1 + 1, [\"a\" & \"b\"], x]",
+        "x.{\"a\": 60 * 60, \"b\": [1, 2]}",
+        "x[$ = \"a\" & \"b\"]",
+        "x[[1, 2][0]]",
+        "$map([1, 2], function($v) { $v + 10 * 10 })",
+        "x in [1, 2, 3 + 4]",
+        "$string(x) & $uppercase(\"abc\")",
+    ])
+    @pytest.mark.parametrize("input", [None, 1, "ab", [1, 7], {"x": ["ab", "x"]}, {"x": 2}])
+    def test_partially_folded(self, text, input):
+        assert jsonata.Jsonata(text).evaluate(input) == unfolded(text, input)
+
+    def test_not_folded(self):
+        # the range operator, context arguments, impure functions
+        for text in ["[1..3]", "$string()", "$random() * 2", "$now() & \"\"", "$x + 1"]:
+            assert jsonata.Jsonata(text).ast.type not in ("string", "number", "value", "folded")
+
+    @pytest.mark.parametrize("text, error", [
+        ("$error(\"x\")", "D3137"),
+        ("\"a\" + 1", "T2001"),
+        ("{\"a\": 1, \"a\": 2}", "D1009"),
+        ("[1, 2, $error(\"y\")]", "D3137"),
+    ])
+    def test_errors_unchanged(self, text, error):
+        expr = jsonata.Jsonata(text)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == error
+
+    def test_python_errors_unchanged(self):
+        expr = jsonata.Jsonata("1 / 0")
+        assert expr.ast.type == "binary"
+        with pytest.raises(ZeroDivisionError):
+            expr.evaluate(None)
+
+    def test_context_argument(self):
+        assert jsonata.Jsonata("$split(\"a,b\", \",\")").ast.type == "folded"
+        # $substring(1, 2) is $substring($, 1, 2)
+        expr = jsonata.Jsonata("$substring(1, 2)")
+        assert expr.ast.type == "function"
+        assert expr.evaluate("abcd") == "bc"
+
+    def test_error_in_unevaluated_branch(self):
+        expr = jsonata.Jsonata("x ? $error(\"x\" & \"y\") : 60 * 60")
+        assert isinstance(expr.ast.then.arguments[0], nodes.Node) and expr.ast.then.arguments[0].value == "xy"
+        assert expr.evaluate({"x": False}) == 3600
+
+    def test_results_are_copies(self):
+        expr = jsonata.Jsonata("{\"a\": [1, 2], \"b\": {\"c\": 3}}")
+        result = expr.evaluate(None)
+        result["a"].append(3)
+        result["b"]["c"] = 4
+        assert type(result) is dict and type(result["b"]) is dict
+        assert expr.evaluate(None) == {"a": [1, 2], "b": {"c": 3}}
+
+    def test_constants_are_read_only(self):
+        # registered functions get copies they can modify
+        expr = jsonata.Jsonata("$f([1, [2]], {\"a\": [3]})")
+        expr.register_lambda("f", lambda arr, obj: arr.append(arr[1].pop()) or obj.update(b=obj.pop("a")) or [arr, obj])
+        assert expr.evaluate(None) == [[1, [], 2], {"b": [3]}]
+        assert expr.evaluate(None) == [[1, [], 2], {"b": [3]}]
+        # and of the constants nested in other values
+        expr = jsonata.Jsonata("$f([x, {\"a\": 1}])")
+        expr.register_lambda("f", lambda arr: arr[1].update(b=2) or arr)
+        assert expr.evaluate({"x": 0}) == [0, {"a": 1, "b": 2}]
+        assert expr.evaluate({"x": 0}) == [0, {"a": 1, "b": 2}]
+        expr = jsonata.Jsonata("$g({\"k\": [1, 2], \"v\": $})")
+        expr.register_lambda("g", lambda obj: obj["k"].append(obj["v"]) or obj)
+        assert expr.evaluate(3) == {"k": [1, 2, 3], "v": 3}
+        assert expr.evaluate(4) == {"k": [1, 2, 4], "v": 4}
+        # the constants themselves are shared
+        expr = jsonata.Jsonata("{\"a\": [1]}")
+        expr.set_output_convert_nulls(False)
+        with pytest.raises(jsonata.ConstantModified) as err:
+            expr.evaluate(None)["a"].append(2)
+        assert err.value.error == "D1016" and isinstance(err.value, TypeError)
+
+    def test_raw_results(self):
+        expr = jsonata.Jsonata("{\"a\": [1, null]}")
+        expr.set_output_convert_nulls(False)
+        result = expr.evaluate(None)
+        assert isinstance(result, utils.Utils.FrozenDict)
+        assert result["a"][1] is utils.Utils.NULL_VALUE
+        assert utils.Utils.convert_nulls(result) == {"a": [1, None]}
+
+    def test_shadowed_builtin(self):
+        expr = jsonata.Jsonata("$uppercase(\"abc\")")
+        assert expr.evaluate(None) == "ABC"
+        expr.register_lambda("uppercase", lambda s: s + "!")
+        assert expr.evaluate(None) == "abc!"
+
+    def test_indexed_includes(self):
+        expr = jsonata.Jsonata("items[$ in [1, 2, 3, 4, 5, 6, 7, 8, 9 * 1]]")
+        assert expr.evaluate({"items": [9, 10, 1]}) == [9, 1]
+
+    def test_compiled(self):
+        for text in CONSTANT:
+            assert jsonata.Jsonata(text, compile=True).evaluate(None) == unfolded(text)
+        expr = jsonata.Jsonata("$uppercase(\"abc\") & x", compile=True)
+        expr.register_lambda("uppercase", lambda s: s + "!")
+        assert expr.evaluate({"x": "d"}) == "abc!d"
+
+    def test_frozen_containers(self):
+        frozen = utils.Utils.freeze({"a": [1, {"b": 2}]})
+        with pytest.raises(TypeError):
+            frozen["c"] = 1
+        with pytest.raises(TypeError):
+            frozen["a"].append(1)
+        with pytest.raises(TypeError):
+            frozen["a"][1].update({"c": 3})
+        for clone in (copy.copy(frozen), copy.deepcopy(frozen), pickle.loads(pickle.dumps(frozen))):
+            assert clone == frozen
+            assert isinstance(clone["a"], utils.Utils.FrozenList)
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_bounded(self, compile):
+        # too costly to fold: evaluated under the budget of the evaluation
+        text = "$count($split($pad(\"\", 200000, \"a\"), \"\"))"
+        expr = jsonata.Jsonata(text, compile=compile, budget=1000)
+        assert expr.ast.type == "function"
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1014"
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_cost_charged(self, compile):
+        expr = jsonata.Jsonata("$count($split($pad(\"\", 300, \"a\"), \"\"))", compile=compile, budget=1000)
+        variable = jsonata.Jsonata("$count($split($pad(\"\", $n, \"a\"), \"\"))", compile=compile, budget=1000)
+        assert expr.ast.type == "folded"
+        consumed = []
+        assert expr.evaluate(None, usage=consumed.append) == variable.evaluate(None, {"n": 300}, usage=consumed.append) == 300
+        assert len(consumed) == 2 and consumed[0] == consumed[1]
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata(expr.expression, compile=compile, budget=200).evaluate(None)
+        assert err.value.error == "D1014"
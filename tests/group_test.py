@@ -0,0 +1,47 @@
+import random
+
+import jsonata
+from jsonata import functions, utils
+
+
+def flags(value):
+    if isinstance(value, utils.Utils.JList):
+        return value.sequence, value.keep_singleton, value.cons
+    return None
+
+
+class TestGroup:
+
+    def test_accumulate_matches_append(self):
+        rnd = random.Random(7)
+        choices = [None, 1, "a", {"k": 1}, [1, 2], utils.Utils.create_sequence(3), []]
+        for _ in range(200):
+            items = [rnd.choice(choices) for _ in range(rnd.randint(1, 6))]
+            expected = items[0]
+            data, owned = items[0], False
+            for item in items[1:]:
+                expected = functions.Functions.append(expected, item)
+                data, owned = jsonata.Jsonata.accumulate(data, item, owned)
+            assert data == expected
+            assert type(data) is type(expected)
+            assert flags(data) == flags(expected)
+
+    def test_accumulate_does_not_modify_items(self):
+        first = [1, 2]
+        data, owned = jsonata.Jsonata.accumulate(first, 3, False)
+        data, owned = jsonata.Jsonata.accumulate(data, [4], owned)
+        assert data == [1, 2, 3, 4]
+        assert first == [1, 2]
+
+    def test_skewed_groups(self):
+        data = [{"category": "a" if i % 10 else "b", "price": i} for i in range(1000)]
+        result = jsonata.Jsonata("${category: $sum(price)}").evaluate(data)
+        assert result == {"a": sum(i for i in range(1000) if i % 10), "b": sum(range(0, 1000, 10))}
+        result = jsonata.Jsonata("${category: $count(price)}").evaluate(data)
+        assert result == {"a": 900, "b": 100}
+
+    def test_tuple_stream_groups(self):
+        data = {"Order": [{"Id": "o1", "Product": [{"Name": "x", "Qty": 1}, {"Name": "y", "Qty": 2}]},
+                          {"Id": "o2", "Product": [{"Name": "x", "Qty": 3}]}]}
+        result = jsonata.Jsonata("Order@$o.$o.Product{Name: {'qty': $sum(Qty), 'orders': $o.Id}}").evaluate(data)
+        assert result == {"x": {"qty": 4, "orders": ["o1", "o2"]}, "y": {"qty": 2, "orders": "o1"}}
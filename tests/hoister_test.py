@@ -0,0 +1,130 @@
+import pytest
+
+import jsonata
+from jsonata import nodes
+from jsonata.hoister import Hoister
+
+
+def hoisted(expr, seen=None):
+    seen = set() if seen is None else seen
+    if id(expr) in seen:
+        return
+    seen.add(id(expr))
+    if isinstance(expr, nodes.HoistedNode):
+        yield expr.expression
+    for name, value in expr.items():
+        if name in ("ancestor", "owner"):
+            continue
+        for item in (value if isinstance(value, list) else [value]):
+            for child in (item if isinstance(item, list) else [item]):
+                if isinstance(child, nodes.Node):
+                    yield from hoisted(child, seen)
+
+
+def hoisted_types(text):
+    return [node.type for node in hoisted(jsonata.Jsonata(text).ast)]
+
+
+class FunctionCounter(jsonata.Jsonata.EvaluateListener):
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_entry(self, expr, input, environment):
+        if expr.type == "function":
+            self.calls += 1
+
+    def evaluate_exit(self, expr, input, environment, result):
+        pass
+
+
+DATA = {"items": [{"price": p, "name": n} for p, n in [(5, "a"), (20, "b"), (8, "c"), (13, "d")]],
+        "allowed": ["a", "c"]}
+
+
+class TestHoister:
+
+    def test_invariant_predicate_operand(self):
+        assert hoisted_types("items[price > $average($$.items.price)]") == ["function"]
+        assert hoisted_types("items.(price / $sum($$.items.price))") == ["function"]
+        assert hoisted_types("items[name in $$.allowed]") == ["path"]
+
+    @pytest.mark.parametrize("text", [
+        "items[price > $random()]",
+        "items[$millis() > price]",
+        "items[price = $count($shuffle($$))]",
+        "items[$string() = 'x']",
+        "items[$f($$) > 1]",
+        "items[$map($$, $f)]",
+        "items@$i[price > $i.price]",
+        "items[($y := 2; price > $y * $x)]",
+        "items[$map($$, function($v) { $v.price * price })]",
+        "$eval('1') + items[price > $sum($$.items.price)]",
+    ])
+    def test_not_invariant(self, text):
+        assert hoisted_types(text) == []
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_evaluated_once_per_loop(self, compile):
+        expr = jsonata.Jsonata("items[price > $average($$.items.price)].name", compile=compile)
+        counter = FunctionCounter()
+        expr.add_evaluate_listener(counter)
+        assert expr.evaluate(DATA) == ["b", "d"]
+        assert counter.calls == 1
+
+    def test_evaluated_once_per_enclosing_iteration(self):
+        expr = jsonata.Jsonata("groups.($l := limits; items[price >= $max($$.limits) - $min($l)].price)")
+        counter = FunctionCounter()
+        expr.add_evaluate_listener(counter)
+        data = {"limits": [10, 20],
+                "groups": [{"limits": [1, 5], "items": [{"price": 15}, {"price": 30}]},
+                           {"limits": [10], "items": [{"price": 5}, {"price": 15}]}]}
+        assert expr.evaluate(data) == [30, 15]
+        # once per group
+        assert counter.calls == 2 * 2
+
+    def test_results(self):
+        assert jsonata.Jsonata("items[name in $$.allowed].price").evaluate(DATA) == [5, 8]
+        assert jsonata.Jsonata("items.(price / $sum($$.items.price))").evaluate({"items": [{"price": 1}, {"price": 3}]}) \
+            == [0.25, 0.75]
+        assert jsonata.Jsonata("items[$uppercase(name) in $map($$.allowed, function($v) { $uppercase($v) })].name") \
+            .evaluate(DATA) == ["a", "c"]
+        assert jsonata.Jsonata("items[price > $x * 2].name").evaluate(DATA, {"x": 6}) == ["b", "d"]
+
+    def test_registered_function_is_not_cached(self):
+        expr = jsonata.Jsonata("items[price > $sum($$.limits)].price")
+        calls = []
+        expr.register_lambda("sum", lambda x: calls.append(x) or len(calls) * 10)
+        assert expr.evaluate({"limits": [1], "items": [{"price": 15}, {"price": 15}, {"price": 15}]}) == 15
+        assert len(calls) == 3
+
+    def test_errors_unchanged(self):
+        expr = jsonata.Jsonata("items[price > $error($$.name)]")
+        assert expr.evaluate({"items": [], "name": "a"}) is None
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate({"items": [{"price": 1}], "name": "a"})
+        assert err.value.error == "D3137"
+
+    def test_escaped_lambda(self):
+        expr = jsonata.Jsonata("($fs := items[true].function() { $sum($$.items.price) }; $fs[1]())")
+        assert expr.evaluate({"items": [{"price": 1}, {"price": 2}]}) == 3
+
+    @pytest.mark.parametrize("text,expected", [
+        ("[1, a.b, $substring($string(a), 0, 3), $max([a, 1]), $random()]", (False,) * 5),
+        ("[$f(1), $map(a, $string), $map(a, $f), a ~> $f, $eval('1'), function($x) { $x }(1)]", (True,) * 6),
+        ("[$sum(a.$f()), a ~> $string]", (True, False)),
+        ("[$x := $f(1), $g($x)]", (False, False)),
+        ("[[$y := 1], $f(1), $f(2)]", (False, False, False)),
+        ("[($y := $f(1); $y), function($v) { ($z := $v) }($f(2))]", (True, True)),
+    ])
+    def test_branch_mask(self, text, expected):
+        expr = jsonata.Jsonata(text).ast
+        # marked when parsed
+        assert expr.blocking == expected
+        assert Hoister.branch_mask(expr, expr.expressions) == expected
+
+    def test_branches_marked_when_parsed(self):
+        assert jsonata.Jsonata("$f(1, $g(2))").ast.blocking == (False, True)
+        assert jsonata.Jsonata("{'a': $f(1), 'b': a}").ast.blocking == (True, False)
+        step = jsonata.Jsonata("items{name: $f(price)}").ast
+        assert step.group.blocking == (True,)
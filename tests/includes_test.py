@@ -0,0 +1,44 @@
+import jsonata
+
+ORDERS = {"orders": [{"id": i, "status": s} for i, s in enumerate(["new", "paid", "shipped", "lost", 1, True, 1.0])]}
+ALLOWED = ["paid", "shipped", "returned", "refunded", "open", "held", "billed", "closed", 1]
+
+
+class TestIncludes:
+
+    def test_scalar_semantics(self):
+        assert jsonata.Jsonata("1 in [1.0, 2]").evaluate(None) is True
+        assert jsonata.Jsonata("true in [1, 2]").evaluate(None) is False
+        assert jsonata.Jsonata("1 in [true]").evaluate(None) is False
+        assert jsonata.Jsonata("'a' in 'a'").evaluate(None) is True
+        assert jsonata.Jsonata("$x in [1]").evaluate(None) is False
+
+    def test_filter_with_variable(self):
+        expr = jsonata.Jsonata("orders[status in $allowed].id")
+        assert expr.evaluate(ORDERS, {"allowed": ALLOWED}) == [1, 2, 4, 6]
+
+    def test_filter_with_literal_array(self):
+        expr = jsonata.Jsonata("orders[status in ['paid', 'shipped', 'a', 'b', 'c', 'd', 'e', 'f', 1.0]].id")
+        assert expr.evaluate(ORDERS) == [1, 2, 4, 6]
+
+    def test_filter_with_objects(self):
+        data = {"items": [{"k": {"a": 1}}, {"k": {"a": True}}, {"k": [1, 2]}, {"k": {"a": 1.0}}]}
+        expr = jsonata.Jsonata("items[k in $keys]")
+        keys = [{"a": 1}, [1, 2]] + [{"b": i} for i in range(10)]
+        assert expr.evaluate(data, {"keys": keys}) == [data["items"][0], data["items"][2], data["items"][3]]
+
+    def test_index_reused(self, monkeypatch):
+        built = []
+        includes_index = jsonata.Jsonata.includes_index
+        monkeypatch.setattr(jsonata.Jsonata, "includes_index",
+                            staticmethod(lambda rhs: built.append(rhs) or includes_index(rhs)))
+        expr = jsonata.Jsonata("orders[status in $allowed].id")
+        assert expr.evaluate(ORDERS, {"allowed": ALLOWED}) == [1, 2, 4, 6]
+        assert len(built) == 1
+
+    def test_varying_rhs(self):
+        data = {"rows": [{"v": i, "set": list(range(i, i + 10))} for i in range(5)]}
+        expr = jsonata.Jsonata("rows[($s := set; v + 9 in $s)].v")
+        assert expr.evaluate(data) == [0, 1, 2, 3, 4]
+        expr = jsonata.Jsonata("rows#$i[3 in set and $i in [0, 1, 2, 3, 4, 5, 6, 7, 8]].v")
+        assert expr.evaluate(data) == [0, 1, 2, 3]
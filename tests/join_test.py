@@ -0,0 +1,78 @@
+import pytest
+
+import jsonata
+
+
+class BinaryCounter(jsonata.Jsonata.EvaluateListener):
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_entry(self, expr, input, environment):
+        if expr.type == "binary":
+            self.calls += 1
+
+    def evaluate_exit(self, expr, input, environment, result):
+        pass
+
+
+KEYS = [1, 1.0, True, "1", None, [1, 2], [1.0, 2], {"a": 1}, {"a": 1.0}, [], 2, "x", False, 0]
+
+DATA = {
+    "library": {
+        "isbn": 2,
+        "loans": [{"isbn": k, "who": i} for i, k in enumerate(KEYS)] + [{"who": "none"}],
+        "books": [{"isbn": k, "title": i} for i, k in enumerate(reversed(KEYS))] + [{"title": "none"}],
+    }
+}
+
+
+# the predicate in parentheses is a block, which is evaluated by nested loops
+def nested_loop(text):
+    return text.replace("[$l.isbn=$b.isbn]", "[($l.isbn=$b.isbn)]").replace("[$b.isbn=$l.isbn]", "[($b.isbn=$l.isbn)]")
+
+
+class TestJoin:
+
+    @pytest.mark.parametrize("text", [
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn].{'who': $l.who, 'title': $b.title}",
+        "library.loans@$l.books@$b[$b.isbn=$l.isbn].[$l.who, $b.title]",
+        "library.loans@$l.books@$b#$i[$l.isbn=$b.isbn].[$l.who, $i]",
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn]#$i.[$l.who, $i]",
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn][$b.title > 3].[$l.who, $b.title]",
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn]^(>$b.title).[$l.who, $b.title]",
+        "library.loans@$l.books@$b[isbn=$b.isbn].[$l.who, $b.title]",
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn].%.isbn",
+        "library.loans@$l.books@$b[$l.isbn=$b.isbn]{$string($l.who): $b.title}",
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_same_result(self, text, compile):
+        expected = jsonata.Jsonata(nested_loop(text)).evaluate(DATA)
+        assert jsonata.Jsonata(text, compile=compile).evaluate(DATA) == expected
+
+    def test_no_predicate_evaluations(self):
+        text = "library.loans@$l.books@$b[$l.isbn=$b.isbn].title"
+        expr = jsonata.Jsonata(text)
+        counter = BinaryCounter()
+        expr.add_evaluate_listener(counter)
+        expr.evaluate(DATA)
+        assert counter.calls == 0
+
+        expr = jsonata.Jsonata(nested_loop(text))
+        counter = BinaryCounter()
+        expr.add_evaluate_listener(counter)
+        expr.evaluate(DATA)
+        assert counter.calls == (len(KEYS) + 1) ** 2
+
+    def test_order(self):
+        data = {"a": [{"k": 1, "n": "x"}, {"k": 2, "n": "y"}, {"k": 1, "n": "z"}],
+                "b": [{"k": 2, "m": 1}, {"k": 1, "m": 2}, {"k": 1, "m": 3}]}
+        expr = jsonata.Jsonata("a@$a.b@$b[$a.k=$b.k].($a.n & $b.m)")
+        assert expr.evaluate(data) == ["x2", "x3", "y1", "z2", "z3"]
+
+    def test_unhashable_keys(self):
+        # compared one by one, as by the nested loops
+        expr = jsonata.Jsonata("a@$a.b@$b[$a.k=$b.k].$b.n")
+        expr.set_validate_input(False)
+        data = {"a": [{"k": {1}}, {"k": 2}], "b": [{"k": {1}, "n": 1}, {"k": 2, "n": 2}, {"k": {1}, "n": 3}]}
+        assert expr.evaluate(data) == [1, 3, 2]
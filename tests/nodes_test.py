@@ -0,0 +1,46 @@
+import jsonata
+from jsonata import nodes, parser
+
+
+def walk(node, seen):
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    yield node
+    for _, value in node.items():
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            items = item if isinstance(item, list) else [item]
+            for child in items:
+                if isinstance(child, nodes.Node):
+                    yield from walk(child, seen)
+
+
+class TestNodes:
+
+    def test_lowered_tree(self):
+        expr = jsonata.Jsonata("Account.Order@$o.Product[Price > 30]{Name: $sum(Quantity)} ~> "
+                               "$map(function($v, $k) { $k & %.OrderID })")
+        tree = list(walk(expr.ast, set()))
+        assert len(tree) > 10
+        for node in tree:
+            assert isinstance(node, nodes.Node)
+            assert not isinstance(node, parser.Parser.Symbol)
+            assert not hasattr(node, "__dict__")
+            assert not hasattr(node, "_outer_instance")
+
+    def test_unlowered_tree(self):
+        p = parser.Parser()
+        p.lower_ast = False
+        ast = p.parse("a.b[0]")
+        assert isinstance(ast, parser.Parser.Symbol)
+        assert isinstance(ast, nodes.Node)
+        lowered = parser.Parser.lower(ast)
+        assert isinstance(lowered, nodes.PathNode)
+        assert [step.value for step in lowered.steps] == ["a", "b"]
+        assert lowered.steps[1].stages[0].expr.value == 0
+
+    def test_shared_slots(self):
+        expr = jsonata.Jsonata("Account.Order.Product.%.OrderID")
+        data = {"Account": {"Order": [{"OrderID": "o1", "Product": [{"Name": "Hat"}]}]}}
+        assert expr.evaluate(data) == "o1"
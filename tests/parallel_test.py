@@ -0,0 +1,90 @@
+import copy
+import itertools
+import pickle
+
+import pytest
+
+import jsonata
+
+
+def double(v):
+    return v * 2
+
+
+class Counter(jsonata.Jsonata.EvaluateListener):
+
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_entry(self, expr, input, environment):
+        self.calls += 1
+
+    def evaluate_exit(self, expr, input, environment, result):
+        pass
+
+
+class TestParallel:
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_pickle(self, compile):
+        expr = jsonata.Jsonata("{'a': $double(a) + $k, 'b': b}", compile=compile, budget=1000)
+        expr.register_lambda("double", double)
+        expr.assign("k", 1)
+        expr.add_evaluate_listener(Counter())
+        expr.set_output_convert_nulls(False)
+        expr.evaluate({"a": 1})
+        clone = pickle.loads(pickle.dumps(expr))
+        assert clone.environment is not expr.environment
+        assert clone.environment.lookup("$") is None
+        data = {"a": 2, "b": None}
+        assert clone.evaluate(data) == expr.evaluate(data)
+        assert clone.evaluate(data)["b"] is jsonata.Utils.NULL_VALUE
+        assert clone.environment.listeners[0].calls > 0
+        assert clone.environment.bounds.budget == 1000
+        with pytest.raises(jsonata.JException) as err:
+            clone.evaluate({"a": list(range(1000))})
+        assert err.value.error == "D1014"
+
+    def test_pickle_lambda(self):
+        expr = jsonata.Jsonata("$f()")
+        expr.register_lambda("f", lambda: 1)
+        with pytest.raises((pickle.PicklingError, AttributeError)):
+            pickle.dumps(expr)
+
+    def test_pickle_exception(self):
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("a + 1").evaluate({"a": "x"})
+        clone = pickle.loads(pickle.dumps(err.value))
+        assert (clone.error, clone.location, str(clone)) == (err.value.error, err.value.location, str(err.value))
+        clone = pickle.loads(pickle.dumps(jsonata.EvaluationCancelled()))
+        assert isinstance(clone, jsonata.EvaluationCancelled) and clone.error == "D1015"
+
+    def test_copy(self):
+        expr = jsonata.Jsonata("a")
+        context = copy.copy(expr)
+        assert context.ast is expr.ast and context.environment is expr.environment
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_evaluate_parallel(self, compile):
+        expr = jsonata.Jsonata("$double(a) + $k", compile=compile)
+        expr.register_lambda("double", double)
+        inputs = [{"a": i} for i in range(100)] + [{"a": "x"}, {"a": [1, 2]}]
+        expected = list(expr.evaluate_many(inputs, {"k": 1}))
+        results = list(expr.evaluate_parallel(inputs, processes=2, chunksize=7, bindings={"k": 1}))
+        assert results[:100] == expected[:100]
+        for result, error in zip(results[100:], expected[100:]):
+            assert (type(result), result.error, str(result)) == (type(error), error.error, str(error))
+
+    def test_chunksize(self):
+        # the variables assigned by an input do not reach the next ones
+        expr = jsonata.Jsonata("[$seen, $seen := $]")
+        inputs = list(range(10))
+        expected = [expr.evaluate(v) for v in inputs]
+        for chunksize in (1, 3, 10):
+            assert list(expr.evaluate_parallel(inputs, processes=2, chunksize=chunksize)) == expected
+
+    def test_lazy(self):
+        expr = jsonata.Jsonata("$ * 2")
+        results = expr.evaluate_parallel(itertools.count(), processes=2, chunksize=5)
+        assert list(itertools.islice(results, 12)) == list(range(0, 24, 2))
+        results.close()
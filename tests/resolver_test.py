@@ -0,0 +1,69 @@
+import jsonata
+from jsonata import nodes, resolver
+
+
+def variables(node, seen=None):
+    seen = set() if seen is None else seen
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    if isinstance(node, nodes.VariableNode):
+        yield node
+    for name, value in node.items():
+        if name == "ancestor":
+            continue
+        for item in (value if isinstance(value, list) else [value]):
+            for child in (item if isinstance(item, list) else [item]):
+                if isinstance(child, nodes.Node):
+                    yield from variables(child, seen)
+
+
+def resolved(expr):
+    return {v.value for v in variables(expr.ast) if v.builtin is not None}
+
+
+class TestResolver:
+
+    def test_builtins_resolved(self):
+        expr = jsonata.Jsonata("$sum($map(a, $abs)) & $x")
+        assert resolved(expr) == {"sum", "map", "abs"}
+        assert expr.evaluate({"a": [1, -2]}, {"x": "!"}) == "3!"
+
+    def test_bound_names_not_resolved(self):
+        expr = jsonata.Jsonata("($sum := function($x) { $count($x) }; $sum([1, 2, 3]))")
+        assert resolved(expr) == {"count"}
+        assert expr.evaluate(None) == 3
+
+    def test_lambda_parameter_shadows(self):
+        expr = jsonata.Jsonata("(function($string) { $string + 1 })(2)")
+        assert resolved(expr) == set()
+        assert expr.evaluate(None) == 3
+
+    def test_focus_and_index_shadow(self):
+        expr = jsonata.Jsonata("a@$count#$sum.($count & $sum)")
+        assert resolved(expr) == set()
+        assert expr.evaluate({"a": ["x", "y"]}) == ["x0", "y1"]
+
+    def test_external_bindings_shadow(self):
+        expr = jsonata.Jsonata("$sum(a)")
+        assert expr.evaluate({"a": [1, 2]}) == 3
+        assert expr.evaluate({"a": [1, 2]}, {"sum": jsonata.Jsonata.JLambda(lambda x: "bound")}) == "bound"
+        expr.assign("sum", jsonata.Jsonata.JLambda(lambda x: "assigned"))
+        assert expr.evaluate({"a": [1, 2]}) == "assigned"
+
+    def test_registered_function_shadows(self):
+        expr = jsonata.Jsonata("$string(a)")
+        expr.register_lambda("string", lambda x: "registered")
+        assert expr.evaluate({"a": 1}) == "registered"
+
+    def test_lambda_keeps_defining_scope(self):
+        expr = jsonata.Jsonata("$f($count)")
+        f = jsonata.Jsonata("function($g) { $g([1, 2]) }").evaluate(None)
+        assert expr.evaluate(None, {"f": f, "count": jsonata.Jsonata.JLambda(lambda x: "bound")}) == "bound"
+
+    def test_eval_disables_resolution(self):
+        expr = jsonata.Jsonata("($eval('$sum := function($x) { 42 }'); $sum([1]))")
+        assert resolved(expr) == set()
+        assert expr.evaluate(None) == 42
+        ast = jsonata.Jsonata.get_parser().parse("$eval(a) & $string(1)")
+        assert resolver.Resolver.resolve(ast, jsonata.Jsonata.static_frame.bindings) == 0
@@ -0,0 +1,40 @@
+import random
+
+import jsonata
+from jsonata import functions, utils
+
+
+def flags(value):
+    return (value.sequence, value.outer_wrapper, value.tuple_stream, value.keep_singleton, value.cons)
+
+
+class TestSequence:
+
+    def test_append_to_sequence_matches_append(self):
+        rnd = random.Random(11)
+        choices = [None, 0, "a", {"k": 1}, [1, [2]], utils.Utils.create_sequence(3), []]
+        for _ in range(200):
+            expected = utils.Utils.create_sequence()
+            expected.keep_singleton = rnd.random() < 0.5
+            result = utils.Utils.create_sequence()
+            result.keep_singleton = expected.keep_singleton
+            for _ in range(rnd.randint(0, 5)):
+                value = rnd.choice(choices)
+                expected = functions.Functions.append(expected, value)
+                assert utils.Utils.append_to_sequence(result, value) is result
+            assert result == expected
+            assert flags(result) == flags(expected)
+
+    def test_array_constructor(self):
+        expr = jsonata.Jsonata("[a, [b], c, d]")
+        assert expr.evaluate({"a": [1, 2], "b": 3, "c": 4}) == [1, 2, [3], 4]
+        assert jsonata.Jsonata("[1..5, 7]").evaluate(None) == [1, 2, 3, 4, 5, 7]
+
+    def test_wildcard(self):
+        assert jsonata.Jsonata("*").evaluate({"a": 1}) == 1
+        assert jsonata.Jsonata("*").evaluate({"a": [1]}) == [1]
+        assert jsonata.Jsonata("*").evaluate({"a": 1, "b": [2, [3]], "c": 4}) == [1, 2, 3, 4]
+
+    def test_spread(self):
+        assert jsonata.Jsonata("$spread($)").evaluate([{"a": 1, "b": 2}, [{"c": 3}]]) == [{"a": 1}, {"b": 2}, {"c": 3}]
+        assert jsonata.Jsonata("$spread($)").evaluate([{"a": 1}]) == [{"a": 1}]
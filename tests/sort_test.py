@@ -0,0 +1,74 @@
+import pytest
+
+import jsonata
+
+
+class TestSort:
+
+    def test_stable(self):
+        data = [{"k": i % 3, "i": i} for i in range(30)]
+        result = jsonata.Jsonata("$^(k).i").evaluate(data)
+        assert result == [d["i"] for d in sorted(data, key=lambda d: d["k"])]
+        result = jsonata.Jsonata("$^(>k).i").evaluate(data)
+        assert result == [d["i"] for d in sorted(data, key=lambda d: d["k"], reverse=True)]
+
+    def test_multiple_terms(self):
+        data = [{"p": p, "n": n} for p in (3, 1, 2) for n in ("b", "c", "a")]
+        result = jsonata.Jsonata("$^(>p, n).(p & n)").evaluate(data)
+        assert result == ["3a", "3b", "3c", "2a", "2b", "2c", "1a", "1b", "1c"]
+
+    def test_mixed_numbers(self):
+        result = jsonata.Jsonata("$^($)").evaluate([2, 1.5, 1, 1.0, 0.5])
+        assert result == [0.5, 1, 1.0, 1.5, 2]
+
+    def test_undefined_last(self):
+        data = [{"a": 2}, {}, {"a": 1}, {"b": 1}, {"a": 3}]
+        assert jsonata.Jsonata("$^(a).a").evaluate(data) == [1, 2, 3]
+        assert jsonata.Jsonata("$^(>a)").evaluate(data) == [{"a": 3}, {"a": 2}, {"a": 1}, {}, {"b": 1}]
+
+    def test_type_errors(self):
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("$^($)").evaluate([1, "a"])
+        assert err.value.error == "T2007"
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("$^($)").evaluate([1, True])
+        assert err.value.error == "T2008"
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("$^(a, b)").evaluate([{"a": 1, "b": 1}, {"a": 1, "b": "x"}])
+        assert err.value.error == "T2007"
+
+    @pytest.mark.parametrize("text,data,error", [
+        ("$^($)", [1, "a", True], "T2007"),
+        ("$^($)", [True, 1, "a"], "T2008"),
+        ("$^($)", ["a", 1, {"x": 1}], "T2007"),
+        ("$^(a, b)", [{"a": 1, "b": "x"}, {"a": 2, "b": True}, {"a": 1, "b": 2}, {"a": 2, "b": 1}], "T2007"),
+        ("$^(b)", [{"a": 1, "b": "x"}, {"a": 2, "b": True}, {"a": 1, "b": 2}, {"a": 2, "b": 1}], "T2008"),
+    ])
+    def test_first_type_error(self, text, data, error):
+        # the error of the first pair of items a comparison sort compares
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata(text).evaluate(data)
+        assert err.value.error == error
+
+    def test_no_comparison_no_error(self):
+        # a value that is never compared to another one is not type checked
+        assert jsonata.Jsonata("$^($)").evaluate([{"a": 1}]) == {"a": 1}
+        assert jsonata.Jsonata("$^(a)").evaluate([{"a": True}, {}]) == [{"a": True}, {}]
+        # later terms are only evaluated for items that tie on the earlier ones
+        data = [{"a": 2, "b": "x"}, {"a": 1, "b": 2}]
+        assert jsonata.Jsonata("$^(a, b).a").evaluate(data) == [1, 2]
+        assert jsonata.Jsonata("$^(a, $error('tie')).a").evaluate(data) == [1, 2]
+
+    def test_term_evaluated_once_per_item(self):
+        calls = []
+        expr = jsonata.Jsonata("$^($key($)).v")
+        expr.register_lambda("key", lambda x: calls.append(x) or x["k"])
+        data = [{"k": k, "v": k} for k in (5, 3, 9, 1, 7, 2)]
+        assert expr.evaluate(data) == [1, 2, 3, 5, 7, 9]
+        assert len(calls) == len(data)
+
+    def test_tuple_sort(self):
+        data = {"Order": [{"Id": "b", "Product": [{"Price": 3}, {"Price": 1}]},
+                          {"Id": "a", "Product": [{"Price": 2}]}]}
+        result = jsonata.Jsonata("Order#$i.Product^(>$i, Price).(Id & $i & Price)").evaluate(data)
+        assert result == ["12", "01", "03"]
@@ -0,0 +1,114 @@
+import pytest
+
+import jsonata
+from jsonata import jexception
+
+
+def tracked(expression, compile=False):
+    # $tick($) returns its argument and counts the calls
+    calls = []
+    expr = jsonata.Jsonata(expression, compile=compile)
+    expr.register_lambda("tick", lambda x: calls.append(x) or x)
+    return expr, calls
+
+
+DATA = {
+    "a": [
+        {"b": [1, 2]},
+        {"b": 3},
+        {"b": [[4, 5]]},
+        {"c": 6},
+        {"b": None},
+        {"b": [7, {"d": 8}]},
+    ],
+    "single": {"b": [[1, 2]]},
+    "nested": {"b": {"c": [[1], [2, 3]]}},
+}
+
+# pairs of expressions that mean the same; the second is not evaluated lazily
+EQUIVALENT = [
+    ("(a.b)[{}]", "(a.b; a.b)[{}]"),
+    ("(a.b.d)[{}]", "(a.b.d; a.b.d)[{}]"),
+    ("(single.b)[{}]", "(single.b; single.b)[{}]"),
+    ("(nested.b.c)[{}]", "(nested.b.c; nested.b.c)[{}]"),
+    ("(a.[b])[{}]", "(a.[b]; a.[b])[{}]"),
+    ("(a.b[])[{}]", "(a.b[]; a.b[])[{}]"),
+    ("(missing.b)[{}]", "(missing.b; missing.b)[{}]"),
+    ("$filter(a.b, function($v) {{ $v != 3 }})[{}]", "$filter((a.b; a.b), function($v) {{ $v != 3 }})[{}]"),
+    ("$filter(a.b, function($v, $i) {{ $i % 2 = 0 }})[{}]",
+     "$filter((a.b; a.b), function($v, $i) {{ $i % 2 = 0 }})[{}]"),
+    ("$filter(single.b, function($v) {{ true }})[{}]", "$filter((single.b; single.b), function($v) {{ true }})[{}]"),
+]
+
+
+class TestStream:
+
+    @pytest.mark.parametrize("streamed, full", EQUIVALENT)
+    @pytest.mark.parametrize("index", ["0", "1", "2", "5", "1.5", "-1", "-0.5", "100"])
+    def test_same_result(self, streamed, full, index):
+        expected = jsonata.Jsonata(full.format(index)).evaluate(DATA)
+        assert jsonata.Jsonata(streamed.format(index)).evaluate(DATA) == expected
+
+    @pytest.mark.parametrize("expression", ["a.b", "a.b.d", "single.b", "nested.b.c", "missing", "a.c"])
+    def test_exists_and_single(self, expression):
+        expected = jsonata.Jsonata("$exists((" + expression + "; " + expression + "))").evaluate(DATA)
+        assert jsonata.Jsonata("$exists(" + expression + ")").evaluate(DATA) == expected
+        try:
+            expected = jsonata.Jsonata("$single((" + expression + "; " + expression + "))").evaluate(DATA)
+        except jexception.JException as e:
+            with pytest.raises(jexception.JException) as err:
+                jsonata.Jsonata("$single(" + expression + ")").evaluate(DATA)
+            assert err.value.error == e.error
+        else:
+            assert jsonata.Jsonata("$single(" + expression + ")").evaluate(DATA) == expected
+
+    def test_positional_predicate_stops_early(self):
+        expr, calls = tracked("(items.$tick($))[1]")
+        assert expr.evaluate({"items": list(range(1000))}) == 1
+        assert calls == [0, 1]
+
+    def test_negative_predicate_reads_everything(self):
+        expr, calls = tracked("(items.$tick($))[-1]")
+        assert expr.evaluate({"items": list(range(1000))}) == 999
+        assert len(calls) == 1000
+
+    def test_intermediate_steps_are_lazy(self):
+        expr, calls = tracked("(groups.$tick($).values)[2]")
+        data = {"groups": [{"values": [1, 2]}, {"values": [3, 4]}, {"values": [5, 6]}]}
+        assert expr.evaluate(data) == 3
+        assert len(calls) == 2
+
+    def test_exists_stops_early(self):
+        expr, calls = tracked("$exists(items.$tick($))")
+        assert expr.evaluate({"items": list(range(1000))}) is True
+        assert calls == [0]
+
+    def test_single_stops_early(self):
+        expr, calls = tracked("$single(items.$tick($))")
+        with pytest.raises(jexception.JException) as err:
+            expr.evaluate({"items": list(range(1000))})
+        assert err.value.error == "D3138"
+        assert calls == [0, 1]
+
+    def test_filter_stops_early(self):
+        expr, calls = tracked("$filter(items.$tick($), function($v) { $v % 10 = 9 })[1]")
+        assert expr.evaluate({"items": list(range(1000))}) == 19
+        assert len(calls) == 20
+
+    def test_filter_with_array_argument(self):
+        expr, calls = tracked("$filter(items.$tick($), function($v, $i, $a) { $v = $count($a) - 1 })[0]")
+        assert expr.evaluate({"items": list(range(10))}) == 9
+        assert len(calls) == 10
+
+    def test_filter_errors(self):
+        with pytest.raises(jexception.JException) as err:
+            jsonata.Jsonata("$filter(a.b, 1)[0]").evaluate(DATA)
+        assert err.value.error == "T0410"
+
+    def test_compiled(self):
+        for expression, result, count in [("(items.$tick($))[1]", 1, 2),
+                                          ("$exists(items.$tick($))", True, 1),
+                                          ("$filter(items.$tick($), function($v) { $v > 2 })[0]", 3, 4)]:
+            expr, calls = tracked(expression, compile=True)
+            assert expr.evaluate({"items": list(range(100))}) == result
+            assert len(calls) == count
@@ -0,0 +1,96 @@
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+
+import pytest
+
+import jsonata
+
+GROUPS = pathlib.Path("jsonata/test/test-suite/groups")
+DATASETS = pathlib.Path("jsonata/test/test-suite/datasets")
+
+# guardrail and time related cases take long or depend on the clock
+SKIPPED = ("D1011", "D1012", "U1001")
+SLOW = 0.1
+
+THREADS = int(os.environ.get("JSONATA_STRESS_THREADS", "4"))
+
+
+def outcome(expr, data, bindings):
+    try:
+        return "result", expr.evaluate(data, bindings)
+    except Exception as err:
+        return "error", getattr(err, "error", type(err).__name__)
+
+
+def load_cases():
+    cases = []
+    datasets = {}
+    for path in sorted(GROUPS.glob("*/*.json")):
+        with open(path, encoding="utf-8") as f:
+            defs = json.load(f)
+        for test_def in defs if isinstance(defs, list) else [defs]:
+            text = test_def.get("expr")
+            if text is None or test_def.get("timelimit") is not None or test_def.get("depth") is not None:
+                continue
+            code = test_def.get("code") or (test_def.get("error") or {}).get("code")
+            if code in SKIPPED:
+                continue
+            data = test_def.get("data")
+            if "data" in test_def and data is None:
+                data = jsonata.Utils.NULL_VALUE
+            dataset = test_def.get("dataset")
+            if data is None and dataset is not None:
+                if dataset not in datasets:
+                    with open(DATASETS / (dataset + ".json"), encoding="utf-8") as f:
+                        datasets[dataset] = json.load(f)
+                data = datasets[dataset]
+            try:
+                expr = jsonata.Jsonata(text, compile=True)
+            except Exception:
+                continue
+            bindings = test_def.get("bindings")
+            start = time.perf_counter()
+            expected = outcome(expr, data, bindings)
+            if time.perf_counter() - start > SLOW:
+                continue
+            # deterministic cases only ($now(), $random(), ...)
+            if outcome(expr, data, bindings) == expected:
+                cases.append((expr, data, bindings, expected))
+    return cases
+
+
+@pytest.mark.skipif(not GROUPS.is_dir(), reason="test suite submodule not checked out")
+class TestStress:
+
+    def test_suite_from_threads(self):
+        # each compiled expression of the suite is evaluated by all threads
+        # at once, from a different starting point in each thread
+        cases = load_cases()
+        assert len(cases) > 1000
+        barrier = threading.Barrier(THREADS)
+        failures = []
+
+        def run(offset):
+            barrier.wait()
+            for i in range(len(cases)):
+                expr, data, bindings, expected = cases[(i + offset * len(cases) // THREADS) % len(cases)]
+                actual = outcome(expr, data, bindings)
+                if actual != expected:
+                    failures.append((expr.expression, expected, actual))
+
+        threads = [threading.Thread(target=run, args=(t,)) for t in range(THREADS)]
+        # switch threads as often as possible (with the GIL)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert failures == []
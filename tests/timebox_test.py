@@ -0,0 +1,233 @@
+import threading
+import time
+
+import pytest
+
+import jsonata
+from jsonata import timebox
+
+
+class TestTimebox:
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_infinite_tail_recursion(self, compile):
+        expr = jsonata.Jsonata("($f := function($n) { $f($n + 1) }; $f(0))", timeout=100, compile=compile)
+        start = time.monotonic()
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1012"
+        assert time.monotonic() - start < 5
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_stack(self, compile):
+        text = "($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(%d))"
+        expr = jsonata.Jsonata(text % 10, stack=100, compile=compile)
+        assert expr.evaluate(None) == 10
+        expr = jsonata.Jsonata(text % 100, stack=100, compile=compile)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1011"
+        # the depth is counted from 0 again
+        assert jsonata.Jsonata(text % 10, stack=100, compile=compile).evaluate(None) == 10
+
+    def test_native_higher_order_function(self):
+        expr = jsonata.Jsonata("$count($map($, $string))", timeout=50)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(list(range(1000000)))
+        assert err.value.error == "D1012"
+
+    def test_no_hooks(self):
+        expr = jsonata.Jsonata("a + 1", timeout=1000, stack=100)
+        assert not expr.environment.hooked
+        assert isinstance(expr.environment.bounds, timebox.Timebox)
+        assert expr.evaluate({"a": 1}) == 2
+        assert expr.environment.bounds.depth == 0
+
+    def test_timeout_per_evaluation(self):
+        expr = jsonata.Jsonata("a + 1", timeout=100)
+        time.sleep(0.2)
+        assert expr.evaluate({"a": 1}) == 2
+
+    def test_nested_evaluation(self):
+        # an evaluation within an evaluation does not restart the clock
+        expr = jsonata.Jsonata("$f()", timeout=100)
+        expr.register_lambda("f", lambda: time.sleep(0.06) or jsonata.Jsonata("($sleep(); 1)").evaluate(None, bindings))
+        bindings = jsonata.Jsonata.Frame(None)
+        bindings.bind("sleep", jsonata.Jsonata.JLambda(lambda: time.sleep(0.06)))
+        bindings.bounds = expr.environment.bounds
+        expr.environment.bounds.interval = 1
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1012"
+
+    def test_interval(self):
+        frame = jsonata.Jsonata.Frame(None)
+        box = timebox.Timebox(frame, 10, None, 1000)
+        frame.bind("sleep", jsonata.Jsonata.JLambda(lambda: time.sleep(0.02)))
+        # less than 1000 steps
+        assert jsonata.Jsonata("($sleep(); 1)").evaluate(None, frame) == 1
+        box.interval = 1
+        with pytest.raises(jsonata.JException) as err:
+            jsonata.Jsonata("($sleep(); 1)").evaluate(None, frame)
+        assert err.value.error == "D1012"
+
+
+def usage(expr, data, bindings=None):
+    # the result and the usage reported by an evaluation
+    reported = []
+    result = expr.evaluate(data, bindings, usage=reported.append)
+    assert len(reported) <= 1
+    return result, reported[0] if reported else None
+
+
+class TestBudget:
+
+    TEXT = "$sum(items[price > 10].(price * quantity))"
+    DATA = {"items": [{"price": p, "quantity": 2} for p in range(20)]}
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_deterministic(self, compile):
+        expr = jsonata.Jsonata(self.TEXT, budget=100000, compile=compile)
+        result, consumed = usage(expr, self.DATA)
+        assert result == 270
+        assert consumed.steps > 0 and consumed.items > 0
+        assert consumed.total == consumed.steps + consumed.items
+        for _ in range(3):
+            assert usage(expr, self.DATA) == (270, consumed)
+            assert usage(jsonata.Jsonata(self.TEXT, budget=100000, compile=compile), self.DATA) == (270, consumed)
+        # without runtime bounds
+        assert usage(jsonata.Jsonata(self.TEXT, compile=compile), self.DATA) == (270, None)
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_exceeded(self, compile):
+        total = usage(jsonata.Jsonata(self.TEXT, budget=100000, compile=compile), self.DATA)[1].total
+        assert jsonata.Jsonata(self.TEXT, budget=total, compile=compile).evaluate(self.DATA) == 270
+        expr = jsonata.Jsonata(self.TEXT, budget=total - 1, compile=compile)
+        reported = []
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(self.DATA, usage=reported.append)
+        assert err.value.error == "D1014"
+        # the failed evaluation is not reported
+        assert reported == []
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_usage_callback(self, compile):
+        expr = jsonata.Jsonata(self.TEXT, budget=100000, compile=compile)
+        alone = usage(expr, self.DATA)[1]
+        # per input
+        small = {"items": self.DATA["items"][15:]}
+        reported = []
+        assert list(expr.evaluate_many([self.DATA, small, self.DATA], usage=reported.append)) == [270, 170, 270]
+        assert reported[0] == reported[2] != reported[1]
+        # a nested evaluation reports its own cost
+        nested = []
+        outer = jsonata.Jsonata("$f()", budget=100000, compile=compile)
+        outer.register_lambda("f", lambda: expr.evaluate(self.DATA, bindings, usage=nested.append))
+        bindings = jsonata.Jsonata.Frame(None)
+        bindings.bounds = outer.environment.bounds
+        reported = []
+        assert outer.evaluate(None, usage=reported.append) == 270
+        assert nested == [alone]
+        assert nested[0].total < reported[0].total
+
+    def test_items(self):
+        expr = jsonata.Jsonata("$count([1..100000])", budget=1000)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1014"
+
+    def test_native_higher_order_function(self):
+        expr = jsonata.Jsonata("$count($map($, $string))", budget=1000)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(list(range(2000)))
+        assert err.value.error == "D1014"
+
+    def test_infinite_loop(self):
+        expr = jsonata.Jsonata("($f := function($n) { $f($n + 1) }; $f(0))", budget=10000)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None)
+        assert err.value.error == "D1014"
+
+    def test_eval(self):
+        expr = jsonata.Jsonata("$eval($text)", budget=1000)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None, {"text": "$count([1..100000])"})
+        assert err.value.error == "D1014"
+        # and the other guardrails
+        expr = jsonata.Jsonata("$eval($text)", stack=50)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None, {"text": "($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(100))"})
+        assert err.value.error == "D1011"
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None, {"text": "1 + \"a\""})
+        assert err.value.error == "D3121"
+
+    def test_bindings_frame(self):
+        expr = jsonata.Jsonata(self.TEXT)
+        frame = jsonata.Jsonata.Frame(None)
+        frame.set_runtime_bounds(None, None, 10)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(self.DATA, frame)
+        assert err.value.error == "D1014"
+        assert usage(expr, self.DATA) == (270, None)
+
+
+class TestCancellation:
+
+    LOOP = "($f := function($n) { $f($n + 1) }; $f(0))"
+
+    def test_cancelled(self):
+        token = jsonata.CancellationToken()
+        token.cancel()
+        with pytest.raises(jsonata.EvaluationCancelled) as err:
+            jsonata.Jsonata("1 + 1").evaluate(None, cancel=token)
+        assert err.value.error == "D1015"
+        assert isinstance(err.value, jsonata.JException)
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_cancel_from_thread(self, compile):
+        expr = jsonata.Jsonata(self.LOOP, compile=compile)
+        event = threading.Event()
+        timer = threading.Timer(0.1, event.set)
+        timer.start()
+        start = time.monotonic()
+        with pytest.raises(jsonata.EvaluationCancelled):
+            expr.evaluate(None, cancel=jsonata.CancellationToken(event))
+        assert time.monotonic() - start < 5
+        timer.join()
+
+    @pytest.mark.parametrize("text", [
+        "$count($map($, $string))",
+        "$count($filter($, function($v) { $v % 2 }))",
+        "$foldl($, function($a, $v) { $a + $v })",
+        "$count($sort($, function($a, $b) { $a < $b }))",
+        "$count($[$ % 2 = 0].($ * 2))",
+    ])
+    def test_deadline(self, text):
+        expr = jsonata.Jsonata(text)
+        with pytest.raises(jsonata.EvaluationCancelled):
+            expr.evaluate(list(range(100000)), cancel=jsonata.CancellationToken.after(0.01))
+
+    def test_eval(self):
+        expr = jsonata.Jsonata("$eval($text)")
+        with pytest.raises(jsonata.EvaluationCancelled):
+            expr.evaluate(None, {"text": self.LOOP}, cancel=jsonata.CancellationToken.after(0.05))
+        token = jsonata.CancellationToken()
+        cancel = jsonata.Jsonata.JLambda(token.cancel)
+        results = expr.evaluate_many([1, 2], {"text": "($cancel(); %s)" % self.LOOP, "cancel": cancel}, cancel=token)
+        with pytest.raises(jsonata.EvaluationCancelled):
+            next(results)
+
+    def test_bounds_kept(self):
+        expr = jsonata.Jsonata("($f := function($n) { $n = 0 ? 0 : 1 + $f($n - 1) }; $f(100))", stack=50)
+        with pytest.raises(jsonata.JException) as err:
+            expr.evaluate(None, {"x": 1}, cancel=jsonata.CancellationToken())
+        assert err.value.error == "D1011"
+
+    def test_token_not_kept(self):
+        expr = jsonata.Jsonata("$x + 1")
+        token = jsonata.CancellationToken()
+        assert expr.evaluate(None, {"x": 1}, cancel=token) == 2
+        token.cancel()
+        assert expr.environment.bounds is None
+        assert expr.evaluate(None, {"x": 1}) == 2
@@ -0,0 +1,71 @@
+import pickle
+
+import pytest
+
+import jsonata
+
+
+def lazy(text, compile):
+    expr = jsonata.Jsonata(text, compile=compile)
+    expr.set_validate_input(True, lazy=True)
+    return expr
+
+
+def error(expr, data):
+    with pytest.raises(Exception) as err:
+        expr.evaluate(data)
+    return type(err.value), str(err.value)
+
+
+class TestLazyValidation:
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_untouched(self, compile):
+        data = {"header": {"id": 1}, "body": [{"a": {1, 2}}, object()], "other": {(1, 2): 3}}
+        assert lazy("header.id", compile).evaluate(data) == 1
+        assert lazy("header.*", compile).evaluate(data) == 1
+        assert lazy("header.**.id", compile).evaluate(data) == 1
+        assert lazy("$exists(other)", compile).evaluate(data) is True
+        with pytest.raises(ValueError):
+            jsonata.Jsonata("header.id", compile=compile).evaluate(data)
+
+    @pytest.mark.parametrize("text,data", [
+        ("a", {"a": {1, 2}}),
+        ("a.b", {"a": [{"b": 1}, object()]}),
+        ("a.b", {"a": [[{"b": 1}, [object()]]]}),
+        ("a.b", {"a": [{"b": [1, b"x"]}]}),
+        ("a.*", {"a": {"b": 1, "c": {1}}}),
+        ("a.*", {"a": {"b": 1, (1, 2): 2}}),
+        ("**", {"a": [{"b": {"c": [1, {1}]}}]}),
+        ("**", {"a": {"b": {(1, 2): 2}}}),
+        ("$", [1, {1}]),
+        ("$", {1}),
+        ("$lookup(a, 'b')", {"a": {"b": {1}}}),
+        ("a.b[0]", {"a": {"b": [1, {"c": {1}}]}}),
+        ("a.b[-1]", {"a": {"b": [[object()], 1]}}),
+        ("$keys(a)", {"a": {"b": 1, (1, 2): 2}}),
+        ("$keys(a)", {"a": [{"b": 1}, {(1, 2): 2}]}),
+        ("a.$string()", {"a": {"b": {1}}}),
+        ("$string(a, true)", {"a": [object()]}),
+    ])
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_touched(self, text, data, compile):
+        expected = error(jsonata.Jsonata(text, compile=compile), data)
+        assert error(lazy(text, compile), data) == expected
+
+    @pytest.mark.parametrize("compile", [False, True])
+    def test_circular(self, compile):
+        data = {"a": 1}
+        data["b"] = data
+        assert lazy("b.b.b.a", compile).evaluate(data) == 1
+        with pytest.raises(jsonata.JException) as err:
+            lazy("**", compile).evaluate(data)
+        assert err.value.error == "D1013"
+
+    def test_settings(self):
+        expr = lazy("a", False)
+        assert expr.is_validate_input() and expr.is_validate_input_lazily()
+        assert pickle.loads(pickle.dumps(expr)).is_validate_input_lazily()
+        expr.set_validate_input(False, lazy=True)
+        assert not expr.is_validate_input_lazily()
+        assert expr.evaluate({"a": {1}}) == {1}